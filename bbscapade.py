@@ -7,129 +7,68 @@ import os
 import time
 import random
 import sys
-from typing import Dict, List, Any
+import asyncio
+import argparse
+import logging
+import threading
+import contextlib
+import json
+import re
+import uuid
+import sqlite3
+import heapq
+import collections
+import itertools
+import enum
+import array
+import datetime
+from dataclasses import dataclass, field, asdict
+from typing import Dict, List, Any, Optional, Tuple, Iterable, Sequence
 import signal
+import importlib
+import inspect
+import shutil
+import string
+import textwrap
 
-# Third-party libraries
-import anthropic
+# Third-party libraries. The heavy ones (anthropic, pyfiglet) are imported
+# where they are first needed, so startup never waits on them and offline or
+# cached sessions never load the SDK at all.
 from colorama import init, Fore, Back, Style
-import pyfiglet
-import simpleaudio as sa
-from dotenv import load_dotenv
-import requests
 
-# Initialize colorama
-init(autoreset=True)
+# Initialize colorama (resets are written explicitly by BBScapade._print so
+# that local and telnet callers see the same byte stream)
+init()
 
-# Load environment variables from .env file
-load_dotenv()
+logger = logging.getLogger("bbscapade")
 
-# Get API key from environment variables
-CLAUDE_API_KEY = os.getenv("CLAUDE_API_KEY")
-if not CLAUDE_API_KEY:
-    print(f"{Fore.RED}Error: CLAUDE_API_KEY not found in environment variables.")
-    print(f"{Fore.YELLOW}Please create a .env file with your API key or set it in your environment.")
-    sys.exit(1)
+# List of retro BBS-style taglines, used instead of the generated one 40% of the time
+LOCAL_TAGLINES = (
+    "Where Reality Takes a Coffee Break!",
+    "Uploading Weirdness Since 198X",
+    "All Your Bandwidth Are Belong To Us",
+    "The Digital Playground for Keyboard Cowboys",
+    "Dial In, Tune Out, Drop Packets",
+    "Serving Internet Weirdness at 2400 Baud",
+    "Where Electrons Go to Party!",
+    "Your Computer's Favorite Hangout",
+    "Faster Than a 14.4k Modem!",
+    "The Information Superhighway's Best Rest Stop",
+    "Bringing Digital Dreams to Digital Screens",
+    "Press Any Key to Continue... ANY Key!",
+    "No Carrier? No Problem!",
+    "Loading Nostalgia... Please Wait...",
+    "Where Text is King and Graphics are Optional",
+    "Breaking the Internet Before It Was Cool",
+    "Packet Loss is Just Part of the Experience",
+    "Keeping Modems Warm Since the 80s",
+    "Connecting Digital Souls at the Speed of Light",
+    "The Place Where Time Stands Still at 9600 Baud"
+)
 
-# Initialize Claude client
-claude = anthropic.Anthropic(api_key=CLAUDE_API_KEY)
-
-class BBScapade:
-    def __init__(self):
-        self.client = claude
-        self.logged_in = False
-        self.user_name = ""
-        self.current_board = "Main"
-        self.messages = []
-        
-    def play_dialup_sound(self):
-        """Play the classic dialup modem sound"""
-        try:
-            # Use afplay to play the sound file at 2x speed
-            os.system('afplay -r 2 assets/dialup.wav &')
-
-            # Display "Connecting..." while the sound plays
-            self._slow_print(f"{Fore.CYAN}Connecting to BBS", end="")
-            for _ in range(10):
-                time.sleep(1.2)
-                print(f"{Fore.CYAN}.", end="", flush=True)
-            print()
-            
-        except FileNotFoundError:
-            print(f"{Fore.YELLOW}Warning: Dialup sound file not found. Continuing without sound.")
-            time.sleep(2)
-
-    def display_welcome_screen(self):
-        """Display the welcome ASCII art and info"""
-        # Clear the screen
-        os.system('cls' if os.name == 'nt' else 'clear')
-        
-        # Generate random BBS name and tagline from Claude
-        bbs_info = self._generate_bbs_info()
-        
-        # Get a random font for the BBS name
-        fonts = ['slant', 'banner', 'big', 'block', 'bubble', 'digital', 'ivrit', 
-                'mini', 'script', 'shadow', 'small', 'smscript', 'standard']
-        font = random.choice(fonts)
-        
-        # Get random colors for different elements
-        colors = [Fore.CYAN, Fore.GREEN, Fore.YELLOW, Fore.MAGENTA, Fore.RED, Fore.BLUE, Fore.WHITE]
-        name_color = random.choice(colors)
-        tagline_color = random.choice(colors)
-        border_color = random.choice(colors)
-        info_label_color = random.choice(colors)
-        info_value_color = random.choice(colors)
-        
-        # Display BBS name with random font
-        try:
-            figlet_text = pyfiglet.figlet_format(bbs_info["name"], font=font)
-        except Exception:
-            # Fallback to standard font if the chosen one fails
-            figlet_text = pyfiglet.figlet_format(bbs_info["name"], font="standard")
-            
-        print(f"{name_color}{figlet_text}")
-        
-        # Randomly decide whether to use the API tagline or generate a new one
-        if random.random() < 0.4:  # 40% chance to use a local tagline
-            # List of retro BBS-style taglines
-            taglines = [
-                "Where Reality Takes a Coffee Break!",
-                "Uploading Weirdness Since 198X",
-                "All Your Bandwidth Are Belong To Us",
-                "The Digital Playground for Keyboard Cowboys",
-                "Dial In, Tune Out, Drop Packets",
-                "Serving Internet Weirdness at 2400 Baud",
-                "Where Electrons Go to Party!",
-                "Your Computer's Favorite Hangout",
-                "Faster Than a 14.4k Modem!",
-                "The Information Superhighway's Best Rest Stop",
-                "Bringing Digital Dreams to Digital Screens",
-                "Press Any Key to Continue... ANY Key!",
-                "No Carrier? No Problem!",
-                "Loading Nostalgia... Please Wait...",
-                "Where Text is King and Graphics are Optional",
-                "Breaking the Internet Before It Was Cool",
-                "Packet Loss is Just Part of the Experience",
-                "Keeping Modems Warm Since the 80s",
-                "Connecting Digital Souls at the Speed of Light",
-                "The Place Where Time Stands Still at 9600 Baud"
-            ]
-            bbs_info['tagline'] = random.choice(taglines)
-        
-        # Display tagline
-        print(f"{tagline_color}{Style.BRIGHT}{bbs_info['tagline']}{Style.RESET_ALL}")
-        print(f"{border_color}{'=' * 60}")
-        
-        # Display sysop info
-        print(f"{info_label_color}SysOp: {info_value_color}{bbs_info['sysop']}")
-        print(f"{info_label_color}Established: {info_value_color}{bbs_info['established']}")
-        print(f"{info_label_color}Node Count: {info_value_color}{bbs_info['nodes']}")
-        print(f"{border_color}{'=' * 60}")
-        
-        # Random ASCII art chance (25%)
-        if random.random() < 0.25:
-            ascii_arts = [
-                r"""
+# ASCII art shown on one welcome screen in four
+WELCOME_ARTS = (
+    r"""
                  ______________
                 /             /|
                 /____________/ |
@@ -138,7 +77,7 @@ class BBScapade:
                 | |_______| | /
                 |___________|/
                 """,
-                r"""
+    r"""
                  .---.
                 /_____\
                 ( '.' )
@@ -146,14 +85,14 @@ class BBScapade:
                 .-"`'`"-.
                 /________\
                 """,
-                r"""
+    r"""
                  ________
                 /  cO Od \
                 |   xxx   |
                 \   --   /
                  \______/
                 """,
-                r"""
+    r"""
                  _______
                 |.-----.|
                 ||x . x||
@@ -161,1028 +100,4007 @@ class BBScapade:
                 `--)-(--`
                 /__/_\__\
                 """,
-                r"""
+    r"""
                    _
                   [_]
                  /|_|\
                 (/ \ \)
                 """,
-            ]
-            print(f"{random.choice(colors)}{random.choice(ascii_arts)}")
-        
-        print(f"{Fore.CYAN}Welcome to this unique BBS experience!")
-        print(f"{Fore.CYAN}Each time you connect, a new randomly generated BBS awaits...")
-        print()
-
-    def _generate_bbs_info(self) -> Dict[str, Any]:
-        """Generate a random, weird, and funny BBS info using Claude"""
-        import json
-        import re
-        import time
-        import random
-
-        # Maximum number of retry attempts
-        max_retries = 3
-        # Initial delay between retries (in seconds)
-        base_delay = 1
-        
-        for attempt in range(max_retries):
-            try:
-                # Make the API call to Claude
-                message = claude.messages.create(
-                    model="claude-3-haiku-20240307",
-                    max_tokens=300,
-                    temperature=1.0,
-                    system="You are generating content for a nostalgic BBS simulation. Create weird, absurd, and hilarious BBS details. Be creative, funny, and strange but keep it appropriate.",
-                    messages=[
-                        {
-                            "role": "user",
-                            "content": "Generate a JSON-like structure for a fictional BBS with the following fields: name (short name, max 20 chars), tagline (funny/weird slogan), sysop (bizarre username), established (year between 1985-1995), nodes (number between 1-8), and a list of 3-5 bizarre board_names. Make it weird, absurd, and hilarious but appropriate. Return ONLY valid JSON."
-                        }
-                    ]
-                )
-                
-                # Extract the content from Claude's response
-                content = message.content[0].text
-                
-                # Try to find and parse JSON from the response
-                # First attempt: Look for JSON structure using regex
-                json_match = re.search(r'\{.*\}', content, re.DOTALL)
-                
-                if json_match:
-                    json_str = json_match.group(0)
-                    try:
-                        # Parse the JSON string
-                        response = json.loads(json_str)
-                        
-                        # Validate that all required fields are present
-                        required_fields = ["name", "tagline", "sysop", "established", "nodes", "board_names"]
-                        if all(field in response for field in required_fields):
-                            # Make sure name isn't too long
-                            if len(response["name"]) > 20:
-                                response["name"] = response["name"][:20]
-                            
-                            # Make sure board_names is a list
-                            if not isinstance(response["board_names"], list):
-                                raise ValueError("board_names is not a list")
-                                
-                            return response
-                    except (json.JSONDecodeError, ValueError) as e:
-                        print(f"{Fore.YELLOW}Warning: Error parsing JSON: {e}. Retrying...")
-                
-                # If we get here, something went wrong with parsing
-                # Wait before retrying with exponential backoff
-                if attempt < max_retries - 1:  # Don't sleep on the last attempt
-                    delay = base_delay * (2 ** attempt) + random.uniform(0, 0.5)
-                    print(f"{Fore.YELLOW}Retrying in {delay:.1f} seconds...")
-                    time.sleep(delay)
-                
-            except Exception as e:
-                # Wait before retrying
-                if attempt < max_retries - 1:  # Don't sleep on the last attempt
-                    delay = base_delay * (2 ** attempt) + random.uniform(0, 0.5)
-                    print(f"{Fore.RED}API call failed: {e}. Retrying in {delay:.1f} seconds...")
-                    time.sleep(delay)
-                else:
-                    print(f"{Fore.RED}API call failed after {max_retries} attempts: {e}")
-        
-        # If all retries failed, return fallback content
-        print(f"{Fore.RED}Failed to generate BBS info after {max_retries} attempts. Using fallback content.")
-        return {
-            "name": "ERROR BBS",
-            "tagline": "When in doubt, reboot!",
-            "sysop": "SysError",
-            "established": "1991",
-            "nodes": "1",
-            "board_names": ["Bug Reports", "System Failure", "Help Wanted"]
-        }
-
-    def login_screen(self):
-        """Display the login screen and handle user authentication"""
-        print(f"{Fore.GREEN}{'=' * 60}")
-        print(f"{Fore.CYAN}{Style.BRIGHT}LOGIN REQUIRED{Style.RESET_ALL}")
-        print(f"{Fore.GREEN}{'=' * 60}")
-        
-        self.user_name = input(f"{Fore.WHITE}Enter your handle: {Fore.YELLOW}")
-        print(f"{Fore.CYAN}Validating user credentials...")
-        time.sleep(1.5)
-        
-        print(f"{Fore.GREEN}Welcome aboard, {Fore.YELLOW}{self.user_name}{Fore.GREEN}!")
-        self.logged_in = True
-        time.sleep(1)
+)
 
-    def main_menu(self):
-        """Display and handle the main menu"""
-        while self.logged_in:
-            os.system('cls' if os.name == 'nt' else 'clear')
-            
-            # Choose a random menu style for this session
-            menu_style = random.choice(["standard", "boxed", "arrow", "retro", "ascii"])
-            
-            # Random colors
-            colors = [Fore.CYAN, Fore.GREEN, Fore.YELLOW, Fore.MAGENTA, Fore.RED, Fore.BLUE]
-            title_color = random.choice(colors)
-            option_color = random.choice([c for c in colors if c != title_color])
-            number_color = random.choice([c for c in colors if c not in [title_color, option_color]])
-            highlight_color = random.choice([c for c in colors if c not in [title_color, option_color, number_color]])
-            
-            # Display menu based on random style
-            if menu_style == "standard":
-                print(f"{title_color}{Style.BRIGHT}==== MAIN MENU ===={Style.RESET_ALL}")
-                print(f"{number_color}1. {option_color}Message Boards")
-                print(f"{number_color}2. {option_color}File Archives")
-                print(f"{number_color}3. {option_color}Door Games")
-                print(f"{number_color}4. {option_color}Chat with SysOp (AI)")
-                print(f"{number_color}5. {option_color}Logoff")
-            
-            elif menu_style == "boxed":
-                print(f"{title_color}╔══════════════════╗")
-                print(f"{title_color}║ {Style.BRIGHT}  MAIN MENU     {Style.RESET_ALL}{title_color}║")
-                print(f"{title_color}╠══════════════════╣")
-                print(f"{title_color}║ {number_color}1. {option_color}Message Boards {title_color}║")
-                print(f"{title_color}║ {number_color}2. {option_color}File Archives  {title_color}║")
-                print(f"{title_color}║ {number_color}3. {option_color}Door Games     {title_color}║")
-                print(f"{title_color}║ {number_color}4. {option_color}Chat with SysOp{title_color}║")
-                print(f"{title_color}║ {number_color}5. {option_color}Logoff         {title_color}║")
-                print(f"{title_color}╚══════════════════╝")
-            
-            elif menu_style == "arrow":
-                print(f"{title_color}{Style.BRIGHT}>>> MAIN MENU <<<{Style.RESET_ALL}")
-                print(f"{highlight_color}------------------")
-                print(f"{number_color}1 {highlight_color}-> {option_color}Message Boards")
-                print(f"{number_color}2 {highlight_color}-> {option_color}File Archives")
-                print(f"{number_color}3 {highlight_color}-> {option_color}Door Games")
-                print(f"{number_color}4 {highlight_color}-> {option_color}Chat with SysOp")
-                print(f"{number_color}5 {highlight_color}-> {option_color}Logoff")
-                print(f"{highlight_color}------------------")
-            
-            elif menu_style == "retro":
-                print(f"{title_color}■■■■■■■■■■■■■■■■■■■■■■■■")
-                print(f"{title_color}■ {Style.BRIGHT}BBS COMMAND CENTER{Style.RESET_ALL} {title_color}■")
-                print(f"{title_color}■■■■■■■■■■■■■■■■■■■■■■■■")
-                print(f"{option_color}  [{number_color}1{option_color}] Message Boards")
-                print(f"{option_color}  [{number_color}2{option_color}] File Archives")
-                print(f"{option_color}  [{number_color}3{option_color}] Door Games")
-                print(f"{option_color}  [{number_color}4{option_color}] Chat with SysOp")
-                print(f"{option_color}  [{number_color}5{option_color}] Logoff System")
-                print(f"{title_color}■■■■■■■■■■■■■■■■■■■■■■■■")
-            
-            else:  # ascii
-                menu_art = random.choice([
-                    r"""
+# Headers of the "ascii" main menu style
+MENU_ARTS = (
+    r"""
   /\/\   ___ _ __  _   _ 
  /    \ / _ \ '_ \| | | |
 / /\/\ \  __/ | | | |_| |
 \/    \/\___|_| |_|\__,_|
                     """,
-                    r"""
+    r"""
  __  __                  
 |  \/  | ___ _ __  _   _ 
 | |\/| |/ _ \ '_ \| | | |
 | |  | |  __/ | | | |_| |
 |_|  |_|\___|_| |_|\__,_|
                     """,
-                    r"""
+    r"""
    ___      _   _                 
   / __\__ _| | | | ___  _ __ ___  
  / /  / _` | |_| |/ _ \| '_ ` _ \ 
 / /__| (_| |  _  | (_) | | | | | |
 \____/\__,_|_| |_|\___/|_| |_| |_|
-                    """
-                ])
-                print(f"{title_color}{menu_art}")
-                print(f"{highlight_color}{'=' * 30}")
-                print(f"{number_color}1. {option_color}Message Boards")
-                print(f"{number_color}2. {option_color}File Archives")
-                print(f"{number_color}3. {option_color}Door Games")
-                print(f"{number_color}4. {option_color}Chat with SysOp")
-                print(f"{number_color}5. {option_color}Logoff")
-                print(f"{highlight_color}{'=' * 30}")
+                    """,
+)
+
+# Box art shown on a door game's title screen
+DOOR_GAME_ARTS = (
+    r"""
+             _____
+            |     |
+            | ◢■◣ |
+            | ■■■ |
+            |_____|
+            /    /|
+           /____/ |
+           |____|/
+            """,
+    r"""
+                ╔═══╗
+               ╔╝███╚╗
+               ╚╗███╔╝
+                ╚═══╝
+             ╔═╗     ╔═╗
+             ║ ╚═════╝ ║
+             ╚═════════╝
+            """,
+    r"""
+              /\
+             /  \
+            |    |
+            |    |--O
+            |    |  |'-.__
+           _|    |__|     `-.
+          /               /\ `\
+          \_______________/  \__)
+            """,
+    r"""
+             .-------.
+            /   o   /|
+           /_______/ |
+           |       | |
+           |       | /
+           |       |/
+            """,
+    r"""
+                 /\
+                /  \
+               /    \
+              /      \
+             /        \
+            /__________\
+            \__________/
+            """,
+)
+
+# Why the door game won't start today
+DOOR_GAME_ERRORS = (
+    "DOOR32.SYS not found. Did someone leave it open?",
+    "Error: Game requires 640K of RAM. Your system has only 638K available.",
+    "Fatal exception: CPU not radical enough for this gnarly game.",
+    "ALLOC: Memory fragmentation detected. Please defragment your brain and try again.",
+    "FOSSIL driver reports modem is too old for time travel functions.",
+    "ERROR: Required ANSI.SYS driver is on vacation until further notice.",
+    "CRITICAL: Failed to initialize the awesome-o-meter.",
+    "4913: Insufficient floppy disk capacity for storing high scores.",
+    "ERROR: SysOp unplugged the game to charge their Walkman.",
+    "VORTEX.DLL load failure: Please ensure your flux capacitor is properly connected.",
+)
+
+# Shown once a download completes
+DOWNLOAD_MESSAGES = (
+    "Your digital contraband has been secured!",
+    "File successfully smuggled through the information superhighway!",
+    "Download complete! No viruses detected... probably.",
+    "Congratulations! You've just increased your nerd cred by +5 points!",
+    "File downloaded faster than a caffeinated squirrel!",
+    "Your bits have successfully traveled through time from 1992!",
+    "Warning: This file may contain rad 90s content!",
+    "File downloaded and authenticated with dial-up handshake!",
+    "Download verified by digital archaeologists!",
+    "File transfer complete! Please rewind before returning.",
+)
+
+# Prompts under the main menu
+MENU_PROMPTS = ("Choose an option: ", "Enter selection: ", "Command: ", "Your choice? ", "What's your pleasure? ")
+
+# Colors the main menu and the welcome and door game screens pick from
+MENU_COLORS = (Fore.CYAN, Fore.GREEN, Fore.YELLOW, Fore.MAGENTA, Fore.RED, Fore.BLUE)
+SCREEN_COLORS = MENU_COLORS + (Fore.WHITE,)
+
+
+@dataclass
+class World:
+    """The generated BBS a caller is connected to, shared by every screen in a session"""
+    name: str
+    tagline: str
+    sysop: str
+    established: str
+    nodes: str
+    board_names: List[str] = field(default_factory=list)
+    id: str = field(default_factory=lambda: uuid.uuid4().hex)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "World":
+        """Build a World from the dict returned by generate_bbs_info (or to_dict)"""
+        world = cls(
+            name=str(data["name"])[:20],
+            tagline=str(data["tagline"]),
+            sysop=str(data["sysop"]),
+            established=str(data["established"]),
+            nodes=str(data["nodes"]),
+            board_names=[str(board) for board in data["board_names"]]
+        )
+        if data.get("id"):
+            world.id = str(data["id"])
+        return world
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+    @property
+    def file_areas(self) -> List[str]:
+        """File archive categories: the boards plus a general category"""
+        return ["General Software"] + self.board_names
+
+
+# Dates are kept as day numbers (date.toordinal()) so they sort in time
+# order, and sizes as bytes; both are only turned into text on screen.
+DATE_FORMAT = "%m-%d-%y"
+SIZE_PATTERN = r"(\d+(?:\.\d+)?)\s*([KkMmGg]?)"
+SIZE_UNITS = {"": 1, "K": 1024, "M": 1024 ** 2, "G": 1024 ** 3}
+
+
+def parse_date(text: str) -> int:
+    """The day number of a "MM-DD-YY" date"""
+    return datetime.datetime.strptime(text, DATE_FORMAT).date().toordinal()
+
+
+def format_date(day: int) -> str:
+    """A day number as "MM-DD-YY" """
+    return datetime.date.fromordinal(day).strftime(DATE_FORMAT)
+
+
+def parse_size(text: str) -> int:
+    """The size in bytes of a size such as "123 KB" or "1.23 MB" """
+    match = re.search(SIZE_PATTERN, text.replace(",", ""))
+    if not match:
+        raise ValueError(f"no size in {text!r}")
+    return int(float(match[1]) * SIZE_UNITS[match[2].upper()])
+
+
+def format_size(size: int) -> str:
+    """A size in bytes as "123 KB", or "1.23 MB" from 1 MB up"""
+    kb = size / 1024
+    return f"{round(kb)} KB" if kb < 1024 else f"{kb / 1024:.2f} MB"
+
+
+@dataclass(frozen=True)
+class Message:
+    """A message on a board. Author handles repeat across boards, so they are interned."""
+    __slots__ = ("author", "date", "subject", "content")
+    author: str
+    date: int
+    subject: str
+    content: str
+
+    def __post_init__(self):
+        object.__setattr__(self, "author", sys.intern(self.author))
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Message":
+        """Build a Message from to_dict() output, or from a stored dict with a "MM-DD-YY" date"""
+        date = data["date"]
+        return cls(author=str(data["author"]), date=parse_date(date) if isinstance(date, str) else int(date),
+                   subject=str(data["subject"]), content=str(data["content"]))
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"author": self.author, "date": self.date, "subject": self.subject, "content": self.content}
+
+
+# Message's slots, set directly when MessageColumns rebuilds a record from
+# values that are already clean: about twice as fast as the frozen
+# dataclass __init__, which also interns the author again
+_set_author, _set_date, _set_subject, _set_content = (Message.__dict__[name].__set__ for name in Message.__slots__)
+
+
+def _packed_message(author: str, date: int, subject: str, content: str) -> Message:
+    message = object.__new__(Message)
+    _set_author(message, author)
+    _set_date(message, date)
+    _set_subject(message, subject)
+    _set_content(message, content)
+    return message
+
+
+@dataclass(eq=False)
+class FileEntry:
+    """A file listing. Compared by identity, since the download count changes as it is downloaded."""
+    __slots__ = ("name", "description", "size", "date", "uploader", "downloads")
+    name: str
+    description: str
+    size: int
+    date: int
+    uploader: str
+    downloads: int
+
+    def __post_init__(self):
+        self.uploader = sys.intern(self.uploader)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "FileEntry":
+        """Build a FileEntry from to_dict() output, or from a stored dict with text dates and sizes"""
+        size, date = data["size"], data["date"]
+        return cls(name=str(data["name"]), description=str(data["description"]),
+                   size=parse_size(size) if isinstance(size, str) else int(size),
+                   date=parse_date(date) if isinstance(date, str) else int(date),
+                   uploader=str(data["uploader"]), downloads=int(data["downloads"]))
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"name": self.name, "description": self.description, "size": self.size, "date": self.date,
+                "uploader": self.uploader, "downloads": self.downloads}
+
+
+class MessageColumns:
+    """A board's messages stored column by column.
+
+    Boards are kept like this between visits: three lists of strings and an
+    array of day numbers cost far less than an object per message. Indexing
+    and iterating build Message records on the fly, which is cheap for the
+    one message a page shows but adds up over a whole board; a scan of every
+    message should read the columns instead.
+    """
+    __slots__ = ("authors", "dates", "subjects", "contents")
+
+    def __init__(self, messages: Iterable[Message] = ()):
+        self.authors: List[str] = []
+        self.dates = array.array("i")
+        self.subjects: List[str] = []
+        self.contents: List[str] = []
+        for message in messages:
+            self.append(message)
+
+    def append(self, message: Message):
+        self.authors.append(message.author)
+        self.dates.append(message.date)
+        self.subjects.append(message.subject)
+        self.contents.append(message.content)
+
+    def __len__(self) -> int:
+        return len(self.dates)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        return _packed_message(self.authors[index], self.dates[index], self.subjects[index], self.contents[index])
+
+    def __iter__(self):
+        return map(_packed_message, self.authors, self.dates, self.subjects, self.contents)
+
+
+def content_records(kind: str, items: Iterable[Any]) -> Sequence[Any]:
+    """Messages ("board") or file listings ("files") the way a session keeps them.
+
+    Items may be records or dicts read back from JSON; a board's messages
+    are packed into MessageColumns.
+    """
+    if kind == "board":
+        return MessageColumns(item if isinstance(item, Message) else Message.from_dict(item) for item in items)
+    return [item if isinstance(item, FileEntry) else FileEntry.from_dict(item) for item in items]
+
+
+def content_dicts(items: Iterable[Any]) -> List[Dict[str, Any]]:
+    """Messages or file listings as dicts, for storing as JSON"""
+    return [item.to_dict() for item in items]
+
+
+class CallerDisconnected(Exception):
+    """Raised when the caller hangs up in the middle of a session"""
+
+
+class Clock:
+    """Source of every artificial delay: typing effects, "loading" pauses,
+    modem speed. Real waits (API retries, latency budgets) don't go through it.
+
+    Clock.real() waits as asked, Clock.scaled(10) ten times faster and
+    Clock.zero() not at all, for automated runs and load tests.
+    """
+
+    def __init__(self, factor: float = 1.0):
+        # Multiplier applied to every delay
+        self.factor = max(factor, 0.0)
+
+    @classmethod
+    def real(cls) -> "Clock":
+        return cls(1.0)
+
+    @classmethod
+    def scaled(cls, speed: float) -> "Clock":
+        """A clock running `speed` times faster than real time"""
+        return cls(1.0 / speed) if speed > 0 else cls.zero()
+
+    @classmethod
+    def zero(cls) -> "Clock":
+        return cls(0.0)
+
+    def duration(self, seconds: float) -> float:
+        """How long a delay of `seconds` actually lasts on this clock"""
+        return seconds * self.factor
+
+    async def sleep_async(self, seconds: float):
+        """Wait out the delay without blocking the event loop; always yields to it, even on a zero clock"""
+        await asyncio.sleep(seconds * self.factor)
+
+
+class ConsoleTerminal:
+    """Terminal for a single local caller on stdin/stdout"""
+    local = True
+
+    # Without SIGWINCH (Windows), how often the window size is read again
+    SIZE_EVERY = 1.0
+
+    def __init__(self):
+        # The console window's size, read on first use and again after a resize
+        self._size: Optional[os.terminal_size] = None
+        self._size_read = 0.0
+        self._resize_signal = False
+        if hasattr(signal, "SIGWINCH"):
+            try:
+                signal.signal(signal.SIGWINCH, self._resized)
+                self._resize_signal = True
+            except ValueError:
+                # Signal handlers can only be set from the main thread
+                pass
+
+    def _resized(self, signum, frame):
+        self._size = None
+
+    def _window(self) -> os.terminal_size:
+        now = time.monotonic()
+        if self._size is None or (not self._resize_signal and now - self._size_read >= self.SIZE_EVERY):
+            self._size = shutil.get_terminal_size()
+            self._size_read = now
+        return self._size
+
+    @property
+    def columns(self) -> int:
+        return self._window().columns
+
+    @property
+    def rows(self) -> int:
+        return self._window().lines
+
+    async def write(self, text: str):
+        sys.stdout.write(text)
+        sys.stdout.flush()
+
+    async def readline(self) -> str:
+        # input() blocks, so read it on a daemon thread and hand the line back
+        # to the event loop; a daemon thread never holds up Ctrl-C on exit
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+
+        def read():
+            try:
+                line = sys.stdin.readline()
+            except Exception as e:
+                loop.call_soon_threadsafe(future.set_exception, e)
+                return
+            loop.call_soon_threadsafe(future.set_result, line)
+
+        threading.Thread(target=read, daemon=True).start()
+        line = await future
+        if not line:
+            raise CallerDisconnected()
+        return line.rstrip("\r\n")
+
+    async def clear(self):
+        # ANSI, as for telnet callers (colorama translates it on Windows)
+        await self.write("\x1b[2J\x1b[H")
+
+    async def close(self):
+        pass
+
+
+# Telnet protocol bytes (RFC 854)
+IAC = 255
+SB = 250
+SE = 240
+WILL = 251
+WONT = 252
+DO = 253
+DONT = 254
+NAWS = 31  # Negotiate About Window Size (RFC 1073)
+
+
+class TelnetTerminal:
+    """Terminal for a remote caller connected over telnet"""
+    local = False
+
+    # How long negotiate() waits for the client's window size
+    NAWS_TIMEOUT = 2.0
+    # Longest line kept; anything longer is cut into pieces of this size
+    MAX_LINE = 4096
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.reader = reader
+        self.writer = writer
+        # The client's window size, until it reports its own with NAWS (and
+        # again whenever its window is resized)
+        self.columns = 80
+        self.rows = 24
+        # Input with telnet commands stripped, waiting to be read as lines,
+        # and the start of a command that hasn't all arrived yet
+        self._pending = b""
+        self._partial = b""
+        self._negotiation: Optional[asyncio.Future] = None
+        self._naws_answered = False
+
+    def negotiate(self):
+        """Ask the client for its window size; the answer is read in the background.
+
+        Clients that don't support NAWS, or ignore telnet options altogether,
+        keep the default 80x24.
+        """
+        self.writer.write(bytes([IAC, DO, NAWS]))
+        self._negotiation = asyncio.ensure_future(self._read_window_size())
+
+    async def _read_window_size(self):
+        with contextlib.suppress(asyncio.TimeoutError, ConnectionError):
+            deadline = time.monotonic() + self.NAWS_TIMEOUT
+            while not self._naws_answered:
+                more = await asyncio.wait_for(self.reader.read(256), max(0.0, deadline - time.monotonic()))
+                if not more:
+                    break
+                self._feed(more)
+
+    async def write(self, text: str):
+        if self.writer.is_closing():
+            raise CallerDisconnected()
+        self.writer.write(text.replace("\r\n", "\n").replace("\n", "\r\n").encode("utf-8"))
+        try:
+            await self.writer.drain()
+        except ConnectionError:
+            raise CallerDisconnected()
+
+    async def readline(self) -> str:
+        if self._negotiation:
+            await self._negotiation
+        while b"\n" not in self._pending and len(self._pending) < self.MAX_LINE:
+            try:
+                data = await self.reader.read(256)
+            except ConnectionError:
+                raise CallerDisconnected()
+            if not data:
+                raise CallerDisconnected()
+            self._feed(data)
+        if b"\n" in self._pending[:self.MAX_LINE]:
+            line, _, self._pending = self._pending.partition(b"\n")
+        else:
+            line, self._pending = self._pending[:self.MAX_LINE], self._pending[self.MAX_LINE:]
+        return line.decode("utf-8", errors="replace").rstrip("\r\n\x00")
+
+    def _feed(self, data: bytes):
+        """Take bytes from the client: telnet commands are acted on and removed, the rest kept as input.
+
+        Commands are parsed from the byte stream before it is split into
+        lines, so a window size whose bytes include a newline (a 10-row
+        window) is read whole. A command cut off at the end of `data` waits
+        for the rest of it.
+        """
+        data = self._partial + data
+        out = bytearray()
+        i = 0
+        while i < len(data):
+            byte = data[i]
+            if byte != IAC:
+                out.append(byte)
+                i += 1
+                continue
+            if i + 1 == len(data):
+                break
+            command = data[i + 1]
+            if command == IAC:
+                # Escaped 0xFF data byte
+                out.append(IAC)
+                i += 2
+            elif command == SB:
+                end = self._subnegotiation_end(data, i + 2)
+                if end is None:
+                    break
+                self._subnegotiation(data[i + 2:end].replace(bytes([IAC, IAC]), bytes([IAC])))
+                i = end + 2
+            elif command in (WILL, WONT, DO, DONT):
+                if i + 2 == len(data):
+                    break
+                if command == WONT and data[i + 2] == NAWS:
+                    self._naws_answered = True
+                i += 3
+            else:
+                i += 2
+        # Never hold on to more than a line's worth of a runaway subnegotiation
+        self._partial = data[i:] if len(data) - i <= self.MAX_LINE else b""
+        self._pending += bytes(out)
+
+    @staticmethod
+    def _subnegotiation_end(data: bytes, start: int) -> Optional[int]:
+        """Index of the IAC SE that ends a subnegotiation whose payload starts at `start`, or None if not here yet"""
+        i = start
+        while i + 1 < len(data):
+            if data[i] == IAC:
+                if data[i + 1] == SE:
+                    return i
+                # IAC IAC is an escaped 0xFF in the payload
+                i += 2
+            else:
+                i += 1
+        return None
+
+    def _subnegotiation(self, payload: bytes):
+        # NAWS: width and height as 16-bit big-endian numbers; 0 means unknown
+        if len(payload) == 5 and payload[0] == NAWS:
+            self._naws_answered = True
+            columns, rows = int.from_bytes(payload[1:3], "big"), int.from_bytes(payload[3:5], "big")
+            self.columns = columns or self.columns
+            self.rows = rows or self.rows
+
+    async def clear(self):
+        await self.write("\x1b[2J\x1b[H")
+
+    async def close(self):
+        if self._negotiation:
+            self._negotiation.cancel()
+        if not self.writer.is_closing():
+            self.writer.close()
+        try:
+            await self.writer.wait_closed()
+        except ConnectionError:
+            pass
+
+
+class SingleFlight:
+    """Collapses concurrent calls for the same key into one in-flight call.
+
+    The first caller for a key starts the work; anyone asking for the same
+    key before it finishes awaits that same result instead of starting a
+    duplicate.
+    """
+
+    def __init__(self):
+        self.in_flight: Dict[Any, asyncio.Future] = {}
+        self.calls = 0
+        self.coalesced = 0
+
+    async def do(self, key, fn):
+        """Return the result of fn(), sharing it with concurrent callers for key"""
+        future = self.in_flight.get(key)
+        if future is None:
+            self.calls += 1
+            future = asyncio.ensure_future(fn())
+            self.in_flight[key] = future
+            future.add_done_callback(lambda done: self._forget(key, done))
+        else:
+            self.coalesced += 1
+        # Shielded so one waiter giving up (say, a cancelled prefetch) doesn't
+        # cancel the work for everyone else
+        return await asyncio.shield(future)
+
+    def _forget(self, key, future: asyncio.Future):
+        if self.in_flight.get(key) is future:
+            del self.in_flight[key]
+        # Mark the exception retrieved; the waiters re-raise it themselves
+        if not future.cancelled():
+            future.exception()
+
+    def summary(self) -> str:
+        return f"{self.calls} calls, {self.coalesced} coalesced, {len(self.in_flight)} in flight"
+
+
+class Priority(enum.IntEnum):
+    """Scheduling class of a Claude API call; lower values go first"""
+    INTERACTIVE = 0  # the caller is watching the SysOp type
+    ON_DEMAND = 1    # the caller is waiting on a loading screen
+    BACKGROUND = 2   # prefetching and pool refills
+
+
+class DeadlineExceeded(asyncio.TimeoutError):
+    """An API call could not be completed before its deadline"""
+
+
+class CircuitOpen(Exception):
+    """The API has been failing, so calls are refused without trying it"""
+
+
+class CircuitBreaker:
+    """Stops calling the API while it is down.
+
+    After `threshold` consecutive outage errors the circuit opens and calls
+    fail straight away with CircuitOpen, so screens fall back at once instead
+    of sitting through retries. Every `reset_after` seconds a single trial
+    call is let through; a success closes the circuit again.
+    """
+
+    def __init__(self, threshold: int = 5, reset_after: float = 30.0):
+        self.threshold = threshold
+        self.reset_after = reset_after
+        self.consecutive_failures = 0
+        self.opened_at: Optional[float] = None
+
+        # Metrics
+        self.trips = 0
+        self.rejected = 0
+
+    @property
+    def is_open(self) -> bool:
+        return self.opened_at is not None
+
+    def allow(self) -> bool:
+        """Whether a call may go ahead now"""
+        if self.opened_at is None:
+            return True
+        if time.monotonic() < self.opened_at + self.reset_after:
+            self.rejected += 1
+            return False
+        # Let this one through as the trial and hold everyone else off for
+        # another period, in case it never reports back
+        self.opened_at = time.monotonic()
+        return True
+
+    def success(self):
+        if self.opened_at is not None:
+            logger.info("Circuit closed: the API is answering again")
+        self.consecutive_failures = 0
+        self.opened_at = None
+
+    def failure(self):
+        self.consecutive_failures += 1
+        if self.consecutive_failures >= self.threshold:
+            if self.opened_at is None:
+                self.trips += 1
+                logger.warning("Circuit open after %d consecutive API failures; pausing calls for %.0fs",
+                               self.consecutive_failures, self.reset_after)
+            self.opened_at = time.monotonic()
+
+    def summary(self) -> str:
+        state = "open" if self.is_open else "closed"
+        return f"circuit {state}, {self.trips} trips, {self.rejected} calls refused"
+
+
+class LatencyTracker:
+    """Recent latencies of one kind of call, for deciding when to hedge"""
+
+    def __init__(self, size: int = 200, min_samples: int = 20):
+        self.samples = collections.deque(maxlen=size)
+        self.min_samples = min_samples
+
+    def record(self, seconds: float):
+        self.samples.append(seconds)
+
+    def p95(self) -> Optional[float]:
+        """95th percentile latency, or None until there are enough samples to trust it"""
+        if len(self.samples) < self.min_samples:
+            return None
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+
+
+class TokenBucket:
+    """Refills continuously at `rate_per_minute`, holding at most a minute's worth"""
+
+    def __init__(self, rate_per_minute: float):
+        self.capacity = float(rate_per_minute)
+        self.rate = rate_per_minute / 60.0
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until `amount` can be taken"""
+        self._refill()
+        amount = min(amount, self.capacity)
+        return 0.0 if self.level >= amount else (amount - self.level) / self.rate
+
+    def take(self, amount: float):
+        self._refill()
+        self.level -= min(amount, self.capacity)
+
+    def give_back(self, amount: float):
+        """Return an over-estimate once the real usage is known"""
+        self._refill()
+        self.level = min(self.capacity, self.level + amount)
+
+
+@dataclass(order=True)
+class _Ticket:
+    priority: int
+    seq: int
+    tokens: int = field(compare=False)
+    key: Any = field(compare=False, default=None)
+    future: Optional[asyncio.Future] = field(compare=False, default=None)
+    queued: float = field(compare=False, default=0.0)
+    stale: bool = field(compare=False, default=False)
+
+
+class ApiDispatcher:
+    """The one gateway every Claude API call goes through.
+
+    Calls wait in a priority queue and are released under requests-per-minute
+    and tokens-per-minute buckets and a cap on concurrent requests. Failed
+    calls are retried with backoff, honoring the API's retry-after header,
+    until the call's deadline, unless the circuit breaker has opened.
+    """
+
+    # How long each class of call may take, queueing and retries included
+    DEADLINES = {
+        Priority.INTERACTIVE: 30.0,
+        Priority.ON_DEMAND: 60.0,
+        Priority.BACKGROUND: 300.0,
+    }
+
+    def __init__(self, rpm: int = 50, tpm: int = 50000, max_in_flight: int = 16,
+                 breaker: Optional[CircuitBreaker] = None):
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self.max_in_flight = max_in_flight
+        self.in_flight = 0
+        self.paused_until = 0.0
+        self._queue: List[_Ticket] = []
+        self._by_key: Dict[Any, List[_Ticket]] = {}
+        self._seq = itertools.count()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._runner: Optional[asyncio.Task] = None
+        self.breaker = breaker or CircuitBreaker()
+
+        # Metrics
+        self.max_queue_depth = 0
+        self.waits = {priority: [0, 0.0, 0.0] for priority in Priority}  # count, total, max
+        self.retries = 0
+        self.rate_limited = 0
+        self.failures = 0
+
+    @property
+    def queue_depth(self) -> int:
+        return sum(1 for ticket in self._queue if not ticket.stale and not ticket.future.done())
+
+    async def call(self, fn, priority: Priority = Priority.ON_DEMAND, tokens: int = 1000,
+                   key: Any = None, deadline: Optional[float] = None):
+        """Run `fn()` (a coroutine function making one API request) when the limits allow"""
+        deadline = deadline or time.monotonic() + self.DEADLINES[priority]
+        attempt = 0
+        while True:
+            if not self.breaker.allow():
+                raise CircuitOpen("the API is failing; not calling it for now")
+            await self._acquire(priority, tokens, key, deadline)
+            try:
+                result = await fn()
+            except Exception as e:
+                if self._is_outage(e):
+                    self.breaker.failure()
+                delay = self._retry_delay(e, attempt)
+                if delay is None:
+                    self.failures += 1
+                    raise
+                if self.breaker.is_open:
+                    self.failures += 1
+                    raise CircuitOpen(f"gave up after {attempt + 1} attempts: {e}") from e
+                if time.monotonic() + delay >= deadline:
+                    self.failures += 1
+                    raise DeadlineExceeded(f"gave up after {attempt + 1} attempts: {e}") from e
+                self.retries += 1
+                attempt += 1
+                logger.warning("API call failed (%s), retrying in %.1fs", e, delay)
+                await asyncio.sleep(delay)
+                continue
+            finally:
+                self.in_flight -= 1
+                self._wake()
+
+            self.breaker.success()
+
+            # Hand back tokens we reserved but didn't use
+            usage = getattr(result, "usage", None)
+            if usage is not None:
+                used = (getattr(usage, "input_tokens", 0) or 0) + (getattr(usage, "output_tokens", 0) or 0)
+                if used and used < tokens:
+                    self.tokens.give_back(tokens - used)
+            return result
+
+    @staticmethod
+    def _is_connection_error(error: Exception) -> bool:
+        # If the SDK was never imported, the error can't have come from it
+        anthropic = sys.modules.get("anthropic")
+        return anthropic is not None and isinstance(error, (anthropic.APIConnectionError, anthropic.APITimeoutError))
+
+    @classmethod
+    def _is_outage(cls, error: Exception) -> bool:
+        """Whether an error means the API is down, rather than busy or refusing this request"""
+        if cls._is_connection_error(error):
+            return True
+        status = getattr(error, "status_code", None)
+        return status is not None and status >= 500
+
+    def _retry_delay(self, error: Exception, attempt: int) -> Optional[float]:
+        """Seconds to wait before retrying, or None if the error isn't worth retrying"""
+        status = getattr(error, "status_code", None)
+        if self._is_connection_error(error):
+            pass
+        elif status in (408, 409, 429) or (status is not None and status >= 500):
+            pass
+        else:
+            return None
+
+        delay = min(30.0, 2 ** attempt) + random.uniform(0, 0.5)
+        response = getattr(error, "response", None)
+        retry_after = response.headers.get("retry-after") if response is not None else None
+        if retry_after:
+            try:
+                delay = max(float(retry_after), 0.0)
+            except ValueError:
+                pass
+        if status in (429, 529):
+            # Everyone backs off, not just this call
+            self.rate_limited += 1
+            self.paused_until = max(self.paused_until, time.monotonic() + delay)
+        return delay
+
+    def boost(self, key: Any, priority: Priority):
+        """Raise the priority of queued calls for `key` (a caller is now waiting on them)"""
+        for ticket in self._by_key.get(key, []):
+            if ticket.priority > priority and not ticket.future.done():
+                ticket.stale = True
+                boosted = _Ticket(int(priority), next(self._seq), ticket.tokens, key, ticket.future, ticket.queued)
+                heapq.heappush(self._queue, boosted)
+                self._by_key[key].append(boosted)
+        self._wake()
+
+    async def _acquire(self, priority: Priority, tokens: int, key: Any, deadline: float):
+        loop = asyncio.get_running_loop()
+        if self._runner is None or self._runner.done():
+            self._wakeup = asyncio.Event()
+            self._runner = asyncio.ensure_future(self._run())
+
+        ticket = _Ticket(int(priority), next(self._seq), tokens, key, loop.create_future(), time.monotonic())
+        heapq.heappush(self._queue, ticket)
+        if key is not None:
+            self._by_key.setdefault(key, []).append(ticket)
+        self.max_queue_depth = max(self.max_queue_depth, self.queue_depth)
+        self._wake()
+
+        try:
+            await asyncio.wait_for(asyncio.shield(ticket.future), timeout=max(0.0, deadline - time.monotonic()))
+        except asyncio.TimeoutError:
+            self._withdraw(ticket)
+            raise DeadlineExceeded("timed out waiting for an API slot")
+        except asyncio.CancelledError:
+            self._withdraw(ticket)
+            raise
+        finally:
+            if key is not None:
+                remaining = [t for t in self._by_key.get(key, []) if t.future is not ticket.future]
+                if remaining:
+                    self._by_key[key] = remaining
+                else:
+                    self._by_key.pop(key, None)
+
+        waited = time.monotonic() - ticket.queued
+        stats = self.waits[priority]
+        stats[0] += 1
+        stats[1] += waited
+        stats[2] = max(stats[2], waited)
+
+    def _withdraw(self, ticket: _Ticket):
+        """Take back the ticket of a caller that stopped waiting, returning its slot if it was granted"""
+        if not ticket.future.done():
+            ticket.future.cancel()
+        elif not ticket.future.cancelled():
+            # Granted just as the caller gave up: give the slot back
+            self.in_flight -= 1
+            self._wake()
+
+    def _wake(self):
+        if self._wakeup:
+            self._wakeup.set()
+
+    async def _run(self):
+        """Release queued calls in priority order as the limits allow"""
+        while True:
+            # Drop calls that were boosted, cancelled or timed out
+            while self._queue and (self._queue[0].stale or self._queue[0].future.done()):
+                heapq.heappop(self._queue)
+
+            wait = None
+            if self._queue and self.in_flight < self.max_in_flight:
+                ticket = self._queue[0]
+                wait = max(
+                    self.paused_until - time.monotonic(),
+                    self.requests.wait_time(1),
+                    self.tokens.wait_time(ticket.tokens)
+                )
+                if wait <= 0:
+                    heapq.heappop(self._queue)
+                    self.requests.take(1)
+                    self.tokens.take(ticket.tokens)
+                    self.in_flight += 1
+                    ticket.future.set_result(None)
+                    continue
+
+            # Sleep until something changes or the head of the queue can go
+            self._wakeup.clear()
+            with contextlib.suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(self._wakeup.wait(), timeout=wait)
+
+    def summary(self) -> str:
+        waits = ", ".join(
+            f"{priority.name.lower()} {stats[0]} waited avg {stats[1] / stats[0]:.2f}s max {stats[2]:.2f}s"
+            for priority, stats in self.waits.items() if stats[0]
+        )
+        return (f"queue {self.queue_depth} (max {self.max_queue_depth}), {self.in_flight} in flight, "
+                f"{self.retries} retries, {self.rate_limited} rate limited, {self.failures} failed, "
+                f"{self.breaker.summary()}; {waits}")
+
+
+# Content generators make Claude answer by calling one of these tools, so the
+# reply is always a JSON object in a known shape rather than prose with JSON
+# somewhere inside it. validate_record() checks every reply against the same
+# schema before it is used.
+MESSAGE_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "subject": {"type": "string", "description": "Subject line of the post"},
+        "content": {"type": "string", "description": "The post itself, 3-6 sentences"}
+    },
+    "required": ["subject", "content"]
+}
+
+FILE_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "name": {"type": "string", "description": "File name, 8.3 format preferred"},
+        "description": {"type": "string", "description": "One-line description"},
+        "size": {"type": "string", "pattern": SIZE_PATTERN, "description": "Size as \"XXX KB\" or \"X.XX MB\", 25KB-3MB"}
+    },
+    "required": ["name", "description", "size"]
+}
+
+BBS_INFO_TOOL = {
+    "name": "create_bbs",
+    "description": "Record the details of a fictional BBS.",
+    "input_schema": {
+        "type": "object",
+        "properties": {
+            "name": {"type": "string", "maxLength": 20, "description": "Short name, max 20 characters"},
+            "tagline": {"type": "string", "description": "Funny or weird slogan"},
+            "sysop": {"type": "string", "description": "Bizarre username of the SysOp"},
+            "established": {"type": "integer", "minimum": 1985, "maximum": 1995},
+            "nodes": {"type": "integer", "minimum": 1, "maximum": 8},
+            "board_names": {"type": "array", "items": {"type": "string"}, "minItems": 1, "maxItems": 5}
+        },
+        "required": ["name", "tagline", "sysop", "established", "nodes", "board_names"]
+    }
+}
+
+MESSAGES_TOOL = {
+    "name": "post_messages",
+    "description": "Post messages to a BBS message board.",
+    "input_schema": {
+        "type": "object",
+        "properties": {"messages": {"type": "array", "items": MESSAGE_SCHEMA}},
+        "required": ["messages"]
+    }
+}
+
+FILES_TOOL = {
+    "name": "list_files",
+    "description": "Add file listings to a BBS file section.",
+    "input_schema": {
+        "type": "object",
+        "properties": {"files": {"type": "array", "items": FILE_SCHEMA}},
+        "required": ["files"]
+    }
+}
+
+
+def validate_record(schema: Dict[str, Any], value: Any) -> Any:
+    """Check a value from Claude against a tool schema, returning it cleaned up.
+
+    Handles the subset of JSON Schema the tools above use. Strings are
+    stripped, cut to maxLength and searched for their pattern, numbers given
+    as strings are converted and arrays are cut to maxItems; anything else
+    that doesn't fit raises ValueError.
+    """
+    kind = schema.get("type")
+    if kind == "object":
+        if not isinstance(value, dict):
+            raise ValueError(f"expected an object, got {type(value).__name__}")
+        missing = [name for name in schema.get("required", []) if name not in value]
+        if missing:
+            raise ValueError(f"missing {', '.join(missing)}")
+        properties = schema.get("properties", {})
+        return {name: validate_record(properties[name], item) if name in properties else item
+                for name, item in value.items()}
+    if kind == "array":
+        if not isinstance(value, list):
+            raise ValueError(f"expected an array, got {type(value).__name__}")
+        if len(value) < schema.get("minItems", 0):
+            raise ValueError(f"expected at least {schema['minItems']} items, got {len(value)}")
+        value = value[:schema.get("maxItems", len(value))]
+        return [validate_record(schema["items"], item) for item in value] if "items" in schema else value
+    if kind == "string":
+        if not isinstance(value, (str, int, float)) or isinstance(value, bool):
+            raise ValueError(f"expected a string, got {type(value).__name__}")
+        value = str(value).strip()
+        if not value:
+            raise ValueError("empty string")
+        if "pattern" in schema and not re.search(schema["pattern"], value):
+            raise ValueError(f"{value!r} doesn't match {schema['pattern']!r}")
+        return value[:schema.get("maxLength", len(value))]
+    if kind == "integer":
+        try:
+            value = int(str(value).strip())
+        except ValueError:
+            raise ValueError(f"expected an integer, got {value!r}") from None
+        return min(max(value, schema.get("minimum", value)), schema.get("maximum", value))
+    return value
+
+
+def tool_input(message, tool: Dict[str, Any]) -> Dict[str, Any]:
+    """The validated input of the tool call in a Messages API response"""
+    for block in message.content:
+        if getattr(block, "type", None) == "tool_use" and block.name == tool["name"]:
+            return validate_record(tool["input_schema"], block.input)
+    raise ValueError(f"no {tool['name']} call in response")
+
+
+def estimate_tokens(request: Dict[str, Any]) -> int:
+    """Rough token count of a Messages API request: ~4 characters per token plus the reply"""
+    chars = sum(len(json.dumps(request.get(part, ""))) for part in ("system", "messages", "tools"))
+    return chars // 4 + request.get("max_tokens", 0)
+
+
+class JsonArrayParser:
+    """Pulls the objects out of a JSON array as its text streams in.
+
+    feed() returns each element object as soon as its closing brace arrives.
+    Text before the opening bracket is skipped, and so is any element that
+    doesn't parse, so a truncated or slightly malformed reply still gives up
+    every object it completed.
+    """
+
+    def __init__(self):
+        self.started = False   # seen the opening bracket
+        self.finished = False  # seen the closing bracket
+        self.skipped = 0       # elements that weren't valid JSON
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._element: List[str] = []
+
+    def feed(self, text: str) -> List[Dict[str, Any]]:
+        """Consume the next piece of the stream, returning the objects it completed"""
+        completed = []
+        for ch in text:
+            if self.finished:
+                break
+            if not self.started:
+                if ch == "[":
+                    self.started = True
+                    self._depth = 1
+                continue
+
+            inside = self._depth >= 2
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+            elif ch == '"':
+                self._in_string = True
+            elif ch in "[{":
+                self._depth += 1
+            elif ch in "]}":
+                self._depth -= 1
+
+            if self._depth == 0:
+                self.finished = True
+            elif inside or self._depth >= 2:
+                self._element.append(ch)
+                if self._depth == 1:
+                    element = "".join(self._element)
+                    self._element = []
+                    try:
+                        value = json.loads(element)
+                    except ValueError:
+                        self.skipped += 1
+                        continue
+                    if isinstance(value, dict):
+                        completed.append(value)
+        return completed
+
+
+class ContentProgress:
+    """How much of a board or file area has been generated so far.
+
+    Items are published in their final order as soon as they finish
+    streaming, so a screen can show the first message while the rest of the
+    board is still being written.
+    """
+
+    def __init__(self, items: Optional[Sequence[Any]] = None, done: bool = False):
+        # Never changed in place, only replaced, so a cached board is used as is
+        self.items: Sequence[Any] = items if items is not None else []
+        self.done = done
+        self.error: Optional[BaseException] = None
+        self._changed = asyncio.Event()
+
+    def update(self, items: Sequence[Any]):
+        if not self.done:
+            self.items = items
+            self._notify()
+
+    def finish(self, items: Sequence[Any]):
+        self.items = items
+        self.done = True
+        self._notify()
+
+    def fail(self, error: BaseException):
+        self.error = error
+        self.done = True
+        self._notify()
+
+    def _notify(self):
+        # Wake everyone waiting on the current event and start a new one
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    async def wait_for(self, count: int) -> bool:
+        """Wait until `count` items are ready; False if there will never be that many"""
+        while len(self.items) < count and not self.done:
+            await self._changed.wait()
+        if len(self.items) < count and self.error:
+            raise self.error
+        return len(self.items) >= count
+
+    async def result(self) -> Sequence[Any]:
+        """Wait for generation to finish and return every item"""
+        while not self.done:
+            await self._changed.wait()
+        if self.error:
+            raise self.error
+        return self.items
+
+
+@dataclass
+class GenerationStats:
+    """How often structured content from Claude had to be thrown away or asked for again"""
+    requests: int = 0        # generation requests made
+    retries: int = 0         # requests repeated because the reply was unusable
+    parse_failures: int = 0  # replies with no usable tool input at all
+    rejected: int = 0        # records dropped by validation
+    truncated: int = 0       # replies cut off at max_tokens
+    hedges: int = 0          # duplicate requests sent because the first was slow
+    hedge_wins: int = 0      # hedges that answered first
+
+    def rate(self, count: int) -> float:
+        return count / self.requests if self.requests else 0.0
+
+    def summary(self) -> str:
+        return (f"{self.requests} requests, {self.parse_failures} parse failures "
+                f"({self.rate(self.parse_failures):.0%}), {self.retries} retries "
+                f"({self.rate(self.retries):.0%}), {self.rejected} records rejected, "
+                f"{self.truncated} truncated, {self.hedges} hedged ({self.hedge_wins} won)")
+
+
+class MarkovChain:
+    """Word-level Markov chain for stringing together plausible BBS sentences"""
+
+    def __init__(self, text: str, order: int = 2):
+        self.order = order
+        self.starts: List[Tuple[str, ...]] = []
+        self.transitions: Dict[Tuple[str, ...], List[str]] = {}
+        for line in text.splitlines():
+            for sentence in re.split(r"(?<=[.!?])\s+", line.strip()):
+                words = sentence.split()
+                if len(words) <= order:
+                    continue
+                self.starts.append(tuple(words[:order]))
+                for i in range(len(words) - order):
+                    self.transitions.setdefault(tuple(words[i:i + order]), []).append(words[i + order])
+
+    def sentence(self, rng: random.Random, max_words: int = 25) -> str:
+        """One sentence, stopping at the end of a corpus sentence or after max_words"""
+        state = rng.choice(self.starts)
+        words = list(state)
+        while len(words) < max_words and words[-1][-1] not in ".!?":
+            followers = self.transitions.get(state)
+            if not followers:
+                break
+            word = rng.choice(followers)
+            words.append(word)
+            state = state[1:] + (word,)
+        text = " ".join(words)
+        return text if text[-1] in ".!?" else text.rstrip(",;:") + "."
+
+
+def _weighted(pairs):
+    """(items, cumulative weights) for random.choices from [(item, weight), ...]"""
+    items = [item for item, _ in pairs]
+    return items, list(itertools.accumulate(weight for _, weight in pairs))
+
+
+class ProceduralEngine:
+    """Makes worlds, boards, messages and file listings locally, without Claude.
+
+    Names come from weighted word grammars, and message and file text from
+    weighted templates filled in with sentences from a Markov chain trained
+    on the bundled corpus (assets/corpus.txt). Everything takes microseconds,
+    so this backs offline mode and every fallback.
+    """
+
+    CORPUS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "assets", "corpus.txt")
+
+    # Handles for message authors, uploaders and SysOps
+    HANDLE_PREFIXES = ["Cyber", "Hack", "Pixel", "Digital", "Quantum", "Retro", "Rad", "Neon", "Disk", "Data",
+                       "Modem", "Glitch", "Bit", "Byte", "Floppy", "Dial", "Logic", "Turbo", "Laser", "Vector"]
+    HANDLE_SUFFIXES = ["Master", "Wizard", "Kid", "Punk", "Surfer", "Slayer", "Runner", "Jockey", "Ninja", "Guru",
+                       "Lord", "Pirate", "Cowboy", "Phantom", "Ghost", "Warrior", "Wrangler", "Dude", "Hacker", "Phoenix"]
+
+    # Words the templates below are filled in with
+    ADJECTIVES = ["Neon", "Haunted", "Electric", "Cosmic", "Rusty", "Phantom", "Turbo", "Midnight", "Quantum",
+                  "Soggy", "Forbidden", "Glowing", "Radioactive", "Lost", "Fuzzy", "Sentient", "Mysterious"]
+    NOUNS = ["Toaster", "Modem", "Llama", "Vortex", "Basement", "Floppy", "Goose", "Circuit", "Pickle", "Nebula",
+             "Lighthouse", "Waffle", "Tentacle", "Joystick", "Pretzel", "Mainframe", "Cassette", "Raccoon"]
+    THINGS = ["floppy disk", "toaster", "lava lamp", "modem", "joystick", "vending machine", "dot matrix printer",
+              "answering machine", "screensaver", "calculator", "microwave", "VCR", "pager", "pet rock", "keyboard"]
+    CREATURES = ["ghost", "alien", "robot", "raccoon", "time traveler", "weather balloon", "bear", "goose",
+                 "lizard", "dragon", "llama", "mime", "sentient toaster"]
+    PLACES = ["basement", "arcade", "mall food court", "server closet", "computer lab", "garage", "attic",
+              "laundromat", "bowling alley", "lighthouse", "school cafeteria", "parking lot"]
+    STATES = ["possessed", "humming", "speaking Latin", "glowing", "purring", "printing poetry", "ejecting disks",
+              "dialing by itself", "running backwards", "demanding snacks", "receiving signals", "sulking"]
+
+    BBS_NAMES = _weighted([
+        ("{Adj} {Noun}", 4), ("{Noun}{NameSuffix}", 3), ("The {Noun} {NameSuffix}", 2), ("{Adj}{Noun} BBS", 2)
+    ])
+    NAME_SUFFIXES = ["Net", "Link", "Zone", "Hub", "Land", "Base", "Matrix", "Systems", "Central", "Hole"]
+    BBS_TAGLINES = _weighted([
+        ("Home of the {Adj} {Noun} Since 19{year}", 2), ("Where Every {Noun} Has a Secret", 2),
+        ("Now With 40% More {Noun}s!", 2), ("Keep Your Hands Off the {Noun}", 1),
+        ("Powered by One {Adj} {Noun}", 2), ("Est. 19{year} in a {place}", 1)
+    ])
+    SYSOPS = _weighted([
+        ("{handle}", 4), ("Sysop {Noun}", 1), ("Captain {Noun}", 1), ("Dr. {Noun}", 1), ("The {Adj} One", 1)
+    ])
+    BOARD_NAMES = _weighted([
+        ("{Adj} {Noun} Support", 2), ("{Noun} Sightings", 3), ("{Adj} Tech Talk", 2), ("{Creature} Rights Forum", 2),
+        ("The {Place} Files", 2), ("{Noun} Trading Post", 2), ("Paranormal {Noun}s", 1), ("{Adj} Recipes", 1),
+        ("{Thing} Repair Clinic", 2), ("Time Travel Q&A", 1)
+    ])
+
+    SUBJECTS = _weighted([
+        ("My {thing} is {state}", 5), ("{Creature} in the {place}?", 4), ("Anyone else seen a {creature}?", 3),
+        ("HELP: {thing} problem", 3), ("Re: {thing} is {state}", 3), ("Warning about the {place}", 2),
+        ("FS: slightly haunted {thing}", 2), ("Theory about {topic}", 2), ("Is this normal?", 1),
+        ("!!! {CREATURE} ALERT !!!", 1), ("{topic} question", 2)
+    ])
+    OPENERS = _weighted([
+        ("Okay, this is going to sound weird, but my {thing} is {state}.", 4),
+        ("Posting this in {board} because I don't know where else to go.", 3),
+        ("Has anyone else had trouble with a {creature} in the {place}?", 3),
+        ("So I was down in the {place} last night.", 3),
+        ("", 4)
+    ])
+    CLOSERS = _weighted([
+        ("Please advise.", 3), ("Reply here or leave me E-Mail.", 3), ("Don't tell the SysOp.", 2),
+        ("More updates as the situation develops.", 2), ("", 6)
+    ])
+
+    EXTENSIONS = _weighted([
+        ("ZIP", 6), ("ARJ", 3), ("LZH", 2), ("EXE", 3), ("COM", 1), ("TXT", 3), ("GIF", 3), ("BMP", 1),
+        ("WAV", 1), ("MOD", 2), ("ANS", 2), ("BAS", 1)
+    ])
+    FILE_STEMS = ["GHOST", "TOAST", "MODEM", "ZAP", "DOOM", "ALIEN", "WARP", "MEGA", "PIXEL", "HACK", "FLOP",
+                  "TURBO", "LLAMA", "VORTEX", "GOOSE", "BLIP", "MUTANT", "COSMIC"]
+    FILE_DESCRIPTIONS = {
+        "archive": ["Archive of {topic} files and utilities.", "Complete {topic} collection, {count} files.",
+                    "Everything you need for {topic}, compressed.", "Mystery archive found in the {place}."],
+        "program": ["Executable program related to {topic}. May require DOS.", "{Adj} {topic} utility v{version}.",
+                    "Turns your PC into a {thing}. Probably.", "Shareware {topic} tool. Register for $5!"],
+        "text": ["Documentation or text file about {topic}.", "The truth about the {creature} in the {place}.",
+                 "FAQ: what to do when your {thing} is {state}.", "Transcript of a very strange chat session."],
+        "image": ["Image file showing {topic} related graphics.", "Blurry photo of a {creature} in the {place}.",
+                  "{Adj} {noun} art, 16 colors."],
+        "sound": ["Sound file with {topic} audio.", "Recording of my {thing} {state}.",
+                  "Tracker module with cool {topic} tunes."],
+        "ansi": ["ANSI art file depicting {topic} scenes.", "{Adj} ANSI logo for your BBS."],
+        "source": ["BASIC source code for a {topic} utility.", "Source for a {creature} simulator."],
+    }
+    FILE_KINDS = {"ZIP": "archive", "ARJ": "archive", "LZH": "archive", "EXE": "program", "COM": "program",
+                  "TXT": "text", "GIF": "image", "BMP": "image", "WAV": "sound", "MOD": "sound", "ANS": "ansi",
+                  "BAS": "source"}
+
+    # Door games
+    GAME_PREFIXES = ["Cyber", "Galactic", "Mega", "Quantum", "Astro", "Neon", "Digital",
+                     "Turbo", "Rad", "Techno", "Laser", "Pixel", "Retro", "Ultra", "Hyper"]
+    GAME_WORDS = ["Quest", "Warriors", "Battle", "Lords", "Dungeon", "Realm", "Maze",
+                  "Empire", "Raiders", "Traders", "Command", "Arena", "Conquest", "Clash"]
+    GAME_SUFFIXES = ["II", "3000", "Master", "Online", "Pro", "Plus", "X", "Deluxe", "Adventure",
+                     "Challenge", "World", "Zone", "Championship"]
+    COMPANY_PREFIXES = ["Stellar", "Atomic", "Byte", "Razor", "Binary", "Digital", "Thunder",
+                        "Lightning", "Silicon", "Mystic", "Radical", "Elite", "Omega"]
+    COMPANY_SUFFIXES = ["Software", "Games", "Interactive", "Systems", "Productions",
+                        "Entertainment", "Computing", "Designs", "Studios"]
+    GAME_TAGLINES = [
+        "Enter the arena... if you dare!",
+        "The final frontier of online gaming!",
+        "Where legends are made!",
+        "Your reality just got virtual!",
+        "Challenge awaits the brave!",
+        "The ultimate test of skill!",
+        "Can you survive the digital onslaught?",
+        "Prepare for electronic combat!",
+        "Journey into the digital unknown!",
+        "Fame and fortune await the victorious!",
+        "The electronic battlefield beckons!",
+        "Are you elite enough?",
+        "Venture beyond the modem's call!"
+    ]
+
+    SYSOP_OPENERS = ["BLEEP!", "KZZZT!", "*crunches cyber-cola*", "Whoa.", "Heh.", "Ahem...", "*adjusts tinfoil hat*", ""]
+
+    def __init__(self, corpus_path: Optional[str] = None, seed: Optional[int] = None):
+        self.random = random.Random(seed)
+        path = corpus_path or self.CORPUS
+        try:
+            with open(path, encoding="utf-8") as f:
+                text = f.read()
+        except OSError as e:
+            logger.warning("No corpus for the procedural engine (%s); using the taglines instead", e)
+            text = "\n".join(LOCAL_TAGLINES)
+        self.chain = MarkovChain(text)
+
+    def _pick(self, weighted) -> str:
+        items, cum_weights = weighted
+        return self.random.choices(items, cum_weights=cum_weights)[0]
+
+    def _fill(self, template: str, **slots) -> str:
+        """Fill a template's slots with random words (capitalized variants for capitalized slot names)"""
+        rng = self.random
+        creature = rng.choice(self.CREATURES)
+        place = rng.choice(self.PLACES)
+        thing = rng.choice(self.THINGS)
+        noun = rng.choice(self.NOUNS)
+        words = {
+            "Adj": rng.choice(self.ADJECTIVES), "Noun": noun, "noun": noun.lower(),
+            "NameSuffix": rng.choice(self.NAME_SUFFIXES), "thing": thing, "Thing": thing.title(),
+            "creature": creature, "Creature": creature.title(), "CREATURE": creature.upper(),
+            "place": place, "Place": place.title(), "state": rng.choice(self.STATES),
+            "year": rng.randint(85, 95), "handle": self.handle(), "version": f"{rng.randint(1, 4)}.{rng.randint(0, 9)}",
+            "count": rng.randint(3, 99)
+        }
+        words.update(slots)
+        return template.format(**words)
+
+    def handle(self) -> str:
+        """A BBS-style username"""
+        rng = self.random
+        number = str(rng.randint(1, 99)) if rng.random() < 0.4 else ""  # 40% chance of having a number
+        return rng.choice(self.HANDLE_PREFIXES) + rng.choice(self.HANDLE_SUFFIXES) + number
+
+    def authors(self, count: int) -> List[str]:
+        return [self.handle() for _ in range(count)]
+
+    def world_info(self) -> Dict[str, Any]:
+        """A world in the same shape generate_bbs_info returns"""
+        rng = self.random
+        tagline = rng.choice(LOCAL_TAGLINES) if rng.random() < 0.5 else self._fill(self._pick(self.BBS_TAGLINES))
+        count = rng.randint(3, 5)
+        board_names = []
+        while len(board_names) < count:
+            board = self._fill(self._pick(self.BOARD_NAMES))
+            if board not in board_names:
+                board_names.append(board)
+        return {
+            "name": self._fill(self._pick(self.BBS_NAMES))[:20],
+            "tagline": tagline,
+            "sysop": self._fill(self._pick(self.SYSOPS)),
+            "established": rng.randint(1985, 1995),
+            "nodes": rng.randint(1, 8),
+            "board_names": board_names
+        }
+
+    def message(self, board_name: str) -> Dict[str, str]:
+        """One message's subject and content (3-6 sentences)"""
+        topic = board_name.lower()
+        sentences = [self._fill(self._pick(self.OPENERS), board=board_name, topic=topic)]
+        sentences += [self.chain.sentence(self.random) for _ in range(self.random.randint(2, 4))]
+        sentences.append(self._fill(self._pick(self.CLOSERS)))
+        return {
+            "subject": self._fill(self._pick(self.SUBJECTS), topic=board_name),
+            "content": " ".join(sentence for sentence in sentences if sentence)
+        }
+
+    def messages(self, board_name: str, authors: List[str], dates: List[int]) -> List[Message]:
+        """A message for each author and date"""
+        return [Message(author=author, date=date, **self.message(board_name)) for author, date in zip(authors, dates)]
+
+    def file(self, category: str) -> Dict[str, Any]:
+        """One file listing's name, description and size in bytes"""
+        rng = self.random
+        ext = self._pick(self.EXTENSIONS)
+        words = re.findall(r"[A-Za-z]+", category) or ["FILE"]
+        style = rng.random()
+        if style < 0.4:
+            stem = "".join(word[0] for word in words)[:3].upper() + str(rng.randint(1, 999))
+        elif style < 0.7:
+            stem = words[0][:5].upper() + str(rng.randint(1, 99))
+        else:
+            stem = rng.choice(self.FILE_STEMS) + str(rng.randint(1, 99))
+
+        description = self._fill(rng.choice(self.FILE_DESCRIPTIONS[self.FILE_KINDS[ext]]), topic=category.lower())
+        if rng.random() < 0.3:
+            description += " " + self.chain.sentence(rng, max_words=10)
+
+        # Mostly small files: 25 KB to 3 MB, skewed towards the low end
+        kb = int(25 * (3072 / 25) ** (rng.random() ** 1.8))
+        return {"name": f"{stem[:8]}.{ext}", "description": description, "size": kb * 1024}
+
+    def files(self, category: str, uploaders: List[str], dates: List[int], downloads: List[int]) -> List[FileEntry]:
+        """A file listing for each uploader, date and download count"""
+        return [FileEntry(date=date, uploader=uploader, downloads=count, **self.file(category))
+                for uploader, date, count in zip(uploaders, dates, downloads)]
+
+    def door_game(self) -> Dict[str, Any]:
+        """A door game's name, year, publisher and tagline"""
+        rng = self.random
+        # 50% chance to add a suffix
+        suffix = " " + rng.choice(self.GAME_SUFFIXES) if rng.random() < 0.5 else ""
+        return {
+            'name': f"{rng.choice(self.GAME_PREFIXES)} {rng.choice(self.GAME_WORDS)}{suffix}",
+            'year': rng.randint(1987, 1993),
+            'company': f"{rng.choice(self.COMPANY_PREFIXES)} {rng.choice(self.COMPANY_SUFFIXES)}",
+            'tagline': rng.choice(self.GAME_TAGLINES)
+        }
+
+    def sysop_reply(self) -> str:
+        """A rambling SysOp chat reply"""
+        sentences = [self.random.choice(self.SYSOP_OPENERS)]
+        sentences += [self.chain.sentence(self.random) for _ in range(self.random.randint(1, 3))]
+        return " ".join(sentence for sentence in sentences if sentence)
+
+
+def create_client():
+    """Build the Claude client (importing the SDK takes over a second, so only on first use)"""
+    api_key = os.getenv("CLAUDE_API_KEY")
+    if not api_key:
+        raise RuntimeError("CLAUDE_API_KEY not found in environment variables")
+
+    import anthropic
+
+    # Async so one caller waiting on the API never stalls the other nodes.
+    # Retries are left to ApiDispatcher, which honors retry-after and each
+    # request's deadline.
+    return anthropic.AsyncAnthropic(api_key=api_key, max_retries=0)
+
+
+class ContentGenerator:
+    """Generates worlds, boards and file listings with Claude.
+
+    Holds no per-caller state, so one instance is shared by every session
+    and by the world pool. Offline, everything comes from the procedural
+    engine and Claude is never called.
+    """
+
+    def __init__(self, client=None, dispatcher: Optional[ApiDispatcher] = None,
+                 engine: Optional[ProceduralEngine] = None, offline: bool = False):
+        self.offline = offline
+        self._client = client
+        self.dispatcher = dispatcher or ApiDispatcher()
+        self.engine = engine or ProceduralEngine()
+
+        # Shared by every session so identical content requests are made once
+        self.flights = SingleFlight()
+
+        # Partial results of content being generated, by content key, for
+        # screens that show items as they arrive
+        self.progress: Dict[Any, ContentProgress] = {}
+
+        self.stats = GenerationStats()
+
+        # Time until each kind of request has something usable, by tool name
+        self.latency: Dict[str, LatencyTracker] = collections.defaultdict(LatencyTracker)
+
+    @property
+    def client(self):
+        """The Claude client, built on the first API call"""
+        if self._client is None:
+            if self.offline:
+                raise RuntimeError("Claude is not available offline")
+            self._client = create_client()
+        return self._client
+
+    async def _create(self, priority: Priority, key: Any = None, label: str = "create", **request):
+        """Send a Messages API request through the dispatcher, hedged if it runs slow"""
+        async def attempt(commit):
+            message = await self.dispatcher.call(
+                lambda: self.client.messages.create(**request),
+                priority,
+                estimate_tokens(request),
+                key=key
+            )
+            commit()
+            return message
+
+        return await self._hedged(label, priority, attempt)
+
+    async def _hedged(self, label: str, priority: Priority, attempt):
+        """Run attempt(commit), racing a second copy of it if the first is slower than usual.
+
+        When the first copy hasn't committed by the p95 latency recorded for
+        `label`, an identical hedge request starts. attempt calls commit() as
+        soon as it has something to use: the first copy to do so gets True and
+        its result is returned; the other gets False and should stop. Background
+        work is never hedged, since no one is waiting on it.
+        """
+        tracker = self.latency[label]
+        tasks: List[asyncio.Task] = []
+        leader = None
+
+        def start():
+            index = len(tasks)
+            began = time.monotonic()
+
+            def commit() -> bool:
+                nonlocal leader
+                if leader is None:
+                    leader = index
+                    tracker.record(time.monotonic() - began)
+                    if index:
+                        self.stats.hedge_wins += 1
+                return leader == index
+
+            tasks.append(asyncio.ensure_future(attempt(commit)))
+
+        start()
+        try:
+            hedge_after = tracker.p95()
+            if hedge_after is not None and priority < Priority.BACKGROUND:
+                await asyncio.wait(tasks, timeout=hedge_after)
+                if leader is None and not tasks[0].done() and not self.dispatcher.breaker.is_open:
+                    self.stats.hedges += 1
+                    logger.debug("%s request slower than p95 (%.2fs), hedging", label, hedge_after)
+                    start()
+
+            pending = set(tasks)
+            while pending and not (leader is not None and tasks[leader].done()):
+                _, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+        errors = [task.exception() for task in tasks if task.done() and not task.cancelled() and task.exception()]
+        if leader is not None:
+            return tasks[leader].result()
+        if errors:
+            raise errors[0]
+        return tasks[0].result()
+
+    async def generate_world(self, fallback: bool = True, priority: Priority = Priority.ON_DEMAND) -> World:
+        """Generate a new world, ready to hand to a caller"""
+        world = World.from_dict(await self.generate_bbs_info(fallback=fallback, priority=priority))
+
+        # Randomly decide whether to use the API tagline or a local one
+        if random.random() < 0.4:  # 40% chance to use a local tagline
+            world.tagline = random.choice(LOCAL_TAGLINES)
+
+        return world
+
+    async def generate_bbs_info(self, fallback: bool = True, priority: Priority = Priority.ON_DEMAND) -> Dict[str, Any]:
+        """Generate a random, weird, and funny BBS info using Claude.
+
+        If every attempt fails, returns a procedurally generated BBS, or raises
+        when fallback is False.
+        """
+        if self.offline:
+            return self.engine.world_info()
+
+        # Maximum number of attempts at getting a valid reply (API errors
+        # are retried by the dispatcher). Forcing the tool call means the
+        # first attempt almost always does.
+        max_retries = 3
+        
+        for attempt in range(max_retries):
+            self.stats.requests += 1
+            if attempt:
+                self.stats.retries += 1
+            try:
+                # Make the API call to Claude
+                message = await self._create(
+                    priority,
+                    label=BBS_INFO_TOOL["name"],
+                    model="claude-3-haiku-20240307",
+                    max_tokens=300,
+                    temperature=1.0,
+                    system="You are generating content for a nostalgic BBS simulation. Create weird, absurd, and hilarious BBS details. Be creative, funny, and strange but keep it appropriate.",
+                    tools=[BBS_INFO_TOOL],
+                    tool_choice={"type": "tool", "name": BBS_INFO_TOOL["name"]},
+                    messages=[
+                        {
+                            "role": "user",
+                            "content": "Create a fictional BBS with a short name (max 20 chars), a funny/weird tagline, a bizarre SysOp username, a year established between 1985-1995, a number of nodes between 1-8, and 3-5 bizarre board names. Make it weird, absurd, and hilarious but appropriate."
+                        }
+                    ]
+                )
+            except Exception as e:
+                # The dispatcher has already retried for as long as the deadline allows
+                logger.error("API call failed: %s", e)
+                break
+            
+            try:
+                return tool_input(message, BBS_INFO_TOOL)
+            except ValueError as e:
+                # Ask again straight away, a bad answer isn't a reason to back off
+                self.stats.parse_failures += 1
+                logger.warning("Unusable BBS info on attempt %d (%s), retrying...", attempt + 1, e)
+        
+        if not fallback:
+            raise RuntimeError(f"Failed to generate BBS info after {max_retries} attempts")
+        
+        # If all retries failed, make one up locally
+        logger.error("Failed to generate BBS info after %d attempts. Using fallback content.", max_retries)
+        return self.engine.world_info()
+
+    # Items asked for per API call. Short completions come back quickly and
+    # stay well clear of max_tokens; the chunks for one board or file area are
+    # requested concurrently and merged back in order.
+    MESSAGES_PER_REQUEST = 3
+    FILES_PER_REQUEST = 5
+
+    @staticmethod
+    def _chunks(count, size):
+        """Split `count` items into (start, length) pieces of at most `size`"""
+        return [(start, min(size, count - start)) for start in range(0, count, size)]
+
+    async def _stream_tool_items(self, priority: Priority, key: Any, tool: Dict[str, Any], on_item, **request):
+        """Make Claude call `tool` with a list of records, passing each valid record to on_item as it streams in.
+
+        The tool's input holds a single array; records arrive as soon as they
+        close. If the stream breaks or is cut off at max_tokens, the records
+        already received are kept.
+        """
+        (field_name, array_schema), = tool["input_schema"]["properties"].items()
+        item_schema = array_schema["items"]
+        received = []
+
+        async def stream_items(commit):
+            parser = JsonArrayParser()
+            try:
+                async with self.client.messages.stream(**request) as stream:
+                    async for event in stream:
+                        if event.type != "input_json":
+                            continue
+                        for raw in parser.feed(event.partial_json):
+                            try:
+                                item = validate_record(item_schema, raw)
+                            except ValueError as e:
+                                self.stats.rejected += 1
+                                logger.debug("Rejected %s record: %s", tool["name"], e)
+                                continue
+                            if not commit():
+                                # The other copy of a hedged request got here first
+                                return None
+                            received.append(item)
+                            on_item(item)
+                    final = await stream.get_final_message()
+            except Exception as e:
+                # A retry would hand out the same records again, so keep what
+                # made it through
+                if not received:
+                    raise
+                logger.warning("Content stream broke after %d records: %s", len(received), e)
+                return None
+            if not parser.started:
+                self.stats.parse_failures += 1
+                raise ValueError(f"no {field_name} in {tool['name']} call")
+            if getattr(final, "stop_reason", None) == "max_tokens":
+                self.stats.truncated += 1
+                logger.info("Content stream truncated, kept %d records", len(received))
+            return final
+
+        async def attempt(commit):
+            return await self.dispatcher.call(
+                lambda: stream_items(commit),
+                priority,
+                estimate_tokens(request),
+                key=key
+            )
+
+        self.stats.requests += 1
+        await self._hedged(tool["name"], priority, attempt)
+        return received
+
+    async def _gather_chunks(self, label, key, count, size, request_chunk, shape, fallback,
+                             limit: Optional[asyncio.Semaphore] = None):
+        """Generate `count` items in concurrent chunks, merged in order.
+
+        request_chunk(length, part, parts, on_item) streams one chunk's raw
+        objects to on_item, shape(index, raw) turns one into a finished item,
+        and fallback(start, length) fills in a chunk that produced nothing.
+        With no fallback, a chunk that produces nothing makes the whole lot
+        fail with RuntimeError instead. Each chunk's request holds `limit`
+        while it runs, if given. While this runs, the items ready so far
+        (every finished chunk plus the one streaming after them) are
+        published to self.progress[key].
+        """
+        chunks = self._chunks(count, size)
+        # Without a limit every chunk goes at once
+        limit = limit or asyncio.Semaphore(len(chunks))
+        parts = [[] for _ in chunks]
+        done = [False] * len(chunks)
+        progress = self.progress.setdefault(key, ContentProgress()) if key is not None else None
+
+        def publish():
+            if progress is None:
+                return
+            ready = []
+            for part_items, part_done in zip(parts, done):
+                ready.extend(part_items)
+                if not part_done:
+                    break
+            progress.update(ready)
+
+        async def generate(part, start, length):
+            def on_item(raw):
+                if len(parts[part]) < length:
+                    parts[part].append(shape(start + len(parts[part]), raw))
+                    publish()
+
+            try:
+                async with limit:
+                    await request_chunk(length, part, len(chunks), on_item)
+            except Exception as e:
+                # May be running in the background, so log rather than print
+                logger.warning("Error generating %s (part %d/%d): %s", label, part + 1, len(chunks), e)
+            if not parts[part] and fallback is not None:
+                parts[part] = fallback(start, length)
+            done[part] = True
+            publish()
+
+        try:
+            await asyncio.gather(*(generate(part, start, length) for part, (start, length) in enumerate(chunks)))
+        finally:
+            if key is not None and self.progress.get(key) is progress:
+                del self.progress[key]
+
+        failed = sum(1 for part_items in parts if not part_items)
+        if failed:
+            error = RuntimeError(f"Failed to generate {label} ({failed} of {len(chunks)} parts)")
+            if progress is not None:
+                progress.fail(error)
+            raise error
+
+        items = [item for part_items in parts for item in part_items]
+        if progress is not None:
+            progress.finish(items)
+        return items
+
+    async def generate_board_messages(self, board_name, priority: Priority = Priority.ON_DEMAND, key: Any = None,
+                                      num_messages: Optional[int] = None, fallback: bool = True,
+                                      limit: Optional[asyncio.Semaphore] = None):
+        """Generate random messages for a board using Claude.
+
+        Parts that Claude fails to write are made up locally, or raise
+        RuntimeError when fallback is False. The board's requests each hold
+        `limit` while they run, if given.
+        """
+        # Number of messages to generate (3-7 unless asked for more)
+        if num_messages is None:
+            num_messages = random.randint(3, 7)
+        
+        # Generate author names for this board
+        authors = self._generate_random_authors(num_messages)
+        
+        # Generate dates, oldest first
+        dates = self._random_dates(num_messages)
+        
+        if self.offline:
+            return self._generate_fallback_messages(board_name, num_messages, authors, dates)
+        
+        def request_chunk(length, part, parts, on_item):
+            return self._generate_message_chunk(board_name, length, part, parts, priority, key, on_item)
+
+        def shape(index, item):
+            return Message(
+                author=authors[index],
+                date=dates[index],
+                subject=item['subject'],
+                content=item['content']
+            )
+
+        def fallback_chunk(start, length):
+            return self._generate_fallback_messages(board_name, length, authors[start:start + length],
+                                                    dates[start:start + length])
+
+        return await self._gather_chunks(f"messages for {board_name!r}", key, num_messages,
+                                         self.MESSAGES_PER_REQUEST, request_chunk, shape,
+                                         fallback_chunk if fallback else None, limit)
+
+    async def _generate_message_chunk(self, board_name, count, part, parts, priority, key, on_item):
+        """Stream `count` messages from Claude; one of `parts` concurrent requests for a board"""
+        batch = f" This is batch {part + 1} of {parts} for the board, so pick topics of your own." if parts > 1 else ""
+        return await self._stream_tool_items(
+            priority,
+            key,
+            MESSAGES_TOOL,
+            on_item,
+            model="claude-3-haiku-20240307",
+            # Roughly 150 tokens per message plus room for the JSON wrapper
+            max_tokens=200 * count + 100,
+            temperature=1.0,
+            system="You are a creative writer generating content for a nostalgic BBS simulation set in the late 1980s/early 1990s. Create weird, zany, and funny messages that might appear on a message board. The style should be reminiscent of old adventure games like Maniac Mansion, Space Quest, or Zork - full of strange scenarios, paranormal phenomena, and quirky humor. Keep each message between 3-6 sentences.",
+            messages=[
+                {
+                    "role": "user",
+                    "content": f"Generate {count} bizarre, funny messages for a BBS board called '{board_name}'. Each message should include a subject line and content. The messages should be weird, zany, and in the style of old 80s adventure games like Maniac Mansion. Make the content appropriately weird for this specific board topic.{batch}"
+                }
+            ],
+            tools=[MESSAGES_TOOL],
+            tool_choice={"type": "tool", "name": MESSAGES_TOOL["name"]}
+        )
+
+    def _random_dates(self, count):
+        """Random dates in the past (as day numbers), sorted oldest first"""
+        years = list(range(1985, 1996))
+        months = list(range(1, 13))
+        days = list(range(1, 29))  # Simplified - not checking month length
+        
+        dates = []
+        for _ in range(count):
+            month, day = random.choice(months), random.choice(days)
+            dates.append(datetime.date(random.choice(years), month, day).toordinal())
+        
+        # Day numbers sort chronologically ("MM-DD-YY" text sorted by month)
+        dates.sort()
+        return dates
+
+    def _random_downloads(self, count):
+        """Download counts for files listed oldest first"""
+        downloads = []
+        for i in range(count):
+            # Older files have more downloads (generally)
+            base_downloads = random.randint(0, 50)
+            age_factor = (count - i) / count  # 1.0 for oldest, near 0 for newest
+            download_count = int(base_downloads + (age_factor * random.randint(0, 150)))
+            downloads.append(download_count)
+        return downloads
+
+    def fallback_content(self, kind, name):
+        """Canned messages ("board") or file listings ("files"), for when Claude can't be waited for"""
+        if kind == "board":
+            count = random.randint(3, 7)
+            return self._generate_fallback_messages(name, count, self._generate_random_authors(count),
+                                                    self._random_dates(count))
+        count = random.randint(10, 20)
+        return self._generate_fallback_files(name, count, self._generate_random_authors(count),
+                                             self._random_dates(count), self._random_downloads(count))
+
+    def _generate_fallback_messages(self, board_name, num_messages, authors, dates):
+        """Generate messages locally, for offline mode or if Claude API fails"""
+        return self.engine.messages(board_name, authors[:num_messages], dates[:num_messages])
+
+    def _generate_random_authors(self, count):
+        """Generate random BBS-style usernames for message authors"""
+        return self.engine.authors(count)
+
+    async def generate_category_files(self, category, priority: Priority = Priority.ON_DEMAND, key: Any = None,
+                                      num_files: Optional[int] = None, fallback: bool = True,
+                                      limit: Optional[asyncio.Semaphore] = None):
+        """Generate themed files for a category using Claude.
+
+        Parts that Claude fails to write are made up locally, or raise
+        RuntimeError when fallback is False. The area's requests each hold
+        `limit` while they run, if given.
+        """
+        # Number of files to generate (10-20 unless asked for more)
+        if num_files is None:
+            num_files = random.randint(10, 20)
+        
+        # Generate file details
+        
+        # 1. Generate random uploaders
+        uploaders = self._generate_random_authors(num_files)
+        
+        # 2. Generate random dates (older files first)
+        dates = self._random_dates(num_files)
+        
+        # 3. Random download counts (more for older files)
+        downloads = self._random_downloads(num_files)
+        
+        if self.offline:
+            return self._generate_fallback_files(category, num_files, uploaders, dates, downloads)
+        
+        def request_chunk(length, part, parts, on_item):
+            return self._generate_file_chunk(category, length, part, parts, priority, key, on_item)
+
+        def shape(index, item):
+            return FileEntry(
+                name=item['name'],
+                description=item['description'],
+                size=parse_size(item['size']),
+                date=dates[index],
+                uploader=uploaders[index],
+                downloads=downloads[index]
+            )
+
+        def fallback_chunk(start, length):
+            end = start + length
+            return self._generate_fallback_files(category, length, uploaders[start:end], dates[start:end],
+                                                 downloads[start:end])
+
+        return await self._gather_chunks(f"files for {category!r}", key, num_files,
+                                         self.FILES_PER_REQUEST, request_chunk, shape,
+                                         fallback_chunk if fallback else None, limit)
+
+    async def _generate_file_chunk(self, category, count, part, parts, priority, key, on_item):
+        """Stream `count` file listings from Claude; one of `parts` concurrent requests for a category"""
+        batch = f" This is batch {part + 1} of {parts} for the section, so avoid the most obvious names." if parts > 1 else ""
+        return await self._stream_tool_items(
+            priority,
+            key,
+            FILES_TOOL,
+            on_item,
+            model="claude-3-haiku-20240307",
+            # Roughly 60 tokens per listing plus room for the JSON wrapper
+            max_tokens=100 * count + 100,
+            temperature=1.0,
+            system="You are generating content for a nostalgic BBS file section from the late 1980s/early 1990s. Create weird, amusing, and period-appropriate file listings for downloading. Files should match the category theme and include typical file types from that era (.zip, .arj, .exe, .txt, .gif, .bmp, .com, etc.). Be creative and quirky but appropriate.",
+            messages=[
+                {
+                    "role": "user",
+                    "content": f"Generate {count} file listings for a BBS file section called '{category}'. Each file should have a name (8.3 format preferred but not required) and a brief description. Make them weird, quirky, and appropriate for the late 80s/early 90s BBS era. The files should relate to the '{category}' theme. Each file also needs a size in the 25KB-3MB range, mostly smaller files.{batch}"
+                }
+            ],
+            tools=[FILES_TOOL],
+            tool_choice={"type": "tool", "name": FILES_TOOL["name"]}
+        )
+
+    def _generate_fallback_files(self, category, num_files, uploaders, dates, downloads):
+        """Generate file listings locally, for offline mode or if Claude API fails"""
+        return self.engine.files(category, uploaders[:num_files], dates[:num_files], downloads[:num_files])
+
+
+@dataclass
+class PooledWorld:
+    """A world together with all of its pre-generated content"""
+    world: World
+    board_messages: Dict[str, MessageColumns]
+    file_categories: Dict[str, List[FileEntry]]
+    created: float
+
+
+class WorldPool:
+    """Bounded on-disk pool of fully generated worlds.
+
+    A background task keeps up to `depth` worlds (with their boards and file
+    listings) on disk, so a new caller can be handed a complete BBS instantly
+    instead of waiting on Claude. The pool directory may be shared with other
+    processes; all disk access runs in the default executor so it never
+    stalls the nodes sharing the event loop.
+    """
+
+    def __init__(self, generator: ContentGenerator, directory: str, depth: int = 4,
+                 concurrency: int = 2, max_age: float = 24 * 3600):
+        self.generator = generator
+        self.directory = directory
+        self.depth = depth
+        self.concurrency = concurrency
+        self.max_age = max_age
+        self.refilling = 0
+        # Worlds on disk as of the last look, for summary()
+        self.ready = 0
+        self._wakeup: Optional[asyncio.Event] = None
+
+        # Metrics
+        self.hits = 0
+        self.misses = 0
+        self.refills = 0
+        self.refill_failures = 0
+        self.refill_seconds = 0.0
+
+        os.makedirs(directory, exist_ok=True)
+
+    async def _run(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(None, fn, *args)
+
+    def _listing(self) -> List[Tuple[float, str]]:
+        """(mtime, path) of each pooled world file, oldest first.
+
+        Files claimed by another session or process while the directory is
+        being listed are skipped.
+        """
+        listing = []
+        for name in os.listdir(self.directory):
+            if not name.endswith(".json"):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                listing.append((os.path.getmtime(path), path))
+            except OSError:
+                continue
+        return sorted(listing)
+
+    def _ready_files(self) -> List[str]:
+        """Pooled world files, oldest first"""
+        return [path for _, path in self._listing()]
+
+    def _prune_stale(self) -> int:
+        """Delete worlds older than max_age, returning how many are left"""
+        cutoff = time.time() - self.max_age
+        left = 0
+        for mtime, path in self._listing():
+            if mtime >= cutoff:
+                left += 1
+                continue
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(path)
+        return left
+
+    async def pop(self) -> Optional[PooledWorld]:
+        """Take a ready world out of the pool, or None if it is empty"""
+        pooled = await self._run(self._claim)
+        if pooled:
+            self.hits += 1
+            self.ready = max(0, self.ready - 1)
+        else:
+            self.misses += 1
+        self._wake()
+        return pooled
+
+    def _claim(self) -> Optional[PooledWorld]:
+        """Take the oldest readable world file off disk; blocking, so run in the executor"""
+        self._prune_stale()
+        for path in self._ready_files():
+            # Claim the file by renaming it, so two sessions (or processes)
+            # never get the same world
+            claimed = f"{path}.{os.getpid()}.{uuid.uuid4().hex}.claimed"
+            try:
+                os.rename(path, claimed)
+            except FileNotFoundError:
+                continue
+            try:
+                with open(claimed, encoding="utf-8") as f:
+                    data = json.load(f)
+                pooled = PooledWorld(
+                    world=World.from_dict(data["world"]),
+                    board_messages={name: content_records("board", items)
+                                    for name, items in data["board_messages"].items()},
+                    file_categories={name: content_records("files", items)
+                                     for name, items in data["file_categories"].items()},
+                    created=data["created"]
+                )
+            except (OSError, ValueError, KeyError, TypeError) as e:
+                logger.warning("Discarding unreadable pooled world %s: %s", path, e)
+                continue
+            finally:
+                with contextlib.suppress(FileNotFoundError):
+                    os.remove(claimed)
+            return pooled
+        return None
+
+    def _wake(self):
+        if self._wakeup:
+            self._wakeup.set()
+
+    async def _produce(self) -> PooledWorld:
+        """Generate a world and all of its content.
+
+        Raises if Claude fails on any part of it, so that canned content
+        made up during an outage never ends up in the pool.
+        """
+        world = await self.generator.generate_world(fallback=False, priority=Priority.BACKGROUND)
+        boards = await asyncio.gather(*(self.generator.generate_board_messages(board, Priority.BACKGROUND,
+                                                                               fallback=False)
+                                        for board in world.board_names))
+        files = await asyncio.gather(*(self.generator.generate_category_files(category, Priority.BACKGROUND,
+                                                                              fallback=False)
+                                       for category in world.file_areas))
+        return PooledWorld(
+            world=world,
+            board_messages={name: content_records("board", items)
+                            for name, items in zip(world.board_names, boards)},
+            file_categories=dict(zip(world.file_areas, files)),
+            created=time.time()
+        )
+
+    async def _refill(self, semaphore: asyncio.Semaphore):
+        """Add one world to the pool"""
+        try:
+            async with semaphore:
+                started = time.monotonic()
+                pooled = await self._produce()
+                elapsed = time.monotonic() - started
+
+            await self._run(self._write, pooled)
+
+            self.refills += 1
+            self.ready += 1
+            self.refill_seconds += elapsed
+            logger.info("World pool: added %r in %.1fs (%s)", pooled.world.name, elapsed, self.summary())
+        except Exception as e:
+            self.refill_failures += 1
+            logger.warning("World pool: refill failed: %s", e)
+            # Back off so an outage doesn't turn into a tight retry loop
+            await asyncio.sleep(30)
+        finally:
+            self.refilling -= 1
+            self._wake()
+
+    def _write(self, pooled: PooledWorld):
+        """Add a world file atomically, so pop() never sees a half-written world"""
+        path = os.path.join(self.directory, f"{pooled.world.id}.json")
+        temp_path = f"{path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump({
+                "world": pooled.world.to_dict(),
+                "board_messages": {name: content_dicts(items) for name, items in pooled.board_messages.items()},
+                "file_categories": {name: content_dicts(items) for name, items in pooled.file_categories.items()},
+                "created": pooled.created
+            }, f)
+        os.replace(temp_path, path)
+
+    async def run(self):
+        """Keep the pool topped up until cancelled"""
+        self._wakeup = asyncio.Event()
+        semaphore = asyncio.Semaphore(self.concurrency)
+        refills = set()
+        try:
+            while True:
+                self._wakeup.clear()
+                try:
+                    self.ready = await self._run(self._prune_stale)
+                    for _ in range(max(0, self.depth - self.ready - self.refilling)):
+                        self.refilling += 1
+                        task = asyncio.ensure_future(self._refill(semaphore))
+                        refills.add(task)
+                        task.add_done_callback(refills.discard)
+                except Exception:
+                    # Keep refilling; the directory may come back
+                    logger.exception("World pool: checking %s failed", self.directory)
+
+                # Wake up on a pop or a finished refill, or periodically to expire old worlds
+                with contextlib.suppress(asyncio.TimeoutError):
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=min(60, self.max_age))
+        finally:
+            for task in refills:
+                task.cancel()
+
+    def summary(self) -> str:
+        mean = self.refill_seconds / self.refills if self.refills else 0.0
+        return (f"{self.ready}/{self.depth} ready, {self.hits} hits, {self.misses} misses, "
+                f"{self.refills} refills averaging {mean:.1f}s, {self.refill_failures} failed")
+
+
+class ContentStore:
+    """Persistent SQLite cache of generated worlds, boards and file areas.
+
+    Content is keyed by world id plus board or category name, so revisiting a
+    world (or sharing one between callers) never asks Claude twice for the
+    same thing. The database runs in WAL mode so readers never block each
+    other or the writer; every thread gets its own connection.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS worlds (
+            id TEXT PRIMARY KEY,
+            data TEXT NOT NULL,
+            created REAL NOT NULL,
+            accessed REAL NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS content (
+            world_id TEXT NOT NULL,
+            kind TEXT NOT NULL,
+            name TEXT NOT NULL,
+            data TEXT NOT NULL,
+            bytes INTEGER NOT NULL,
+            created REAL NOT NULL,
+            accessed REAL NOT NULL,
+            PRIMARY KEY (world_id, kind, name)
+        );
+        CREATE INDEX IF NOT EXISTS content_by_board ON content (kind, name, created);
+        CREATE INDEX IF NOT EXISTS content_by_accessed ON content (accessed);
+        CREATE INDEX IF NOT EXISTS worlds_by_accessed ON worlds (accessed);
+    """
+
+    # Check the size limit after this many writes
+    EVICT_EVERY = 50
+    # Reads only note access times in memory, so they never take the write
+    # lock; the times are written in one batch at most this often
+    TOUCH_EVERY = 60.0
+
+    def __init__(self, path: str, max_bytes: int = 256 * 1024 * 1024, max_age: float = 30 * 24 * 3600):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self._local = threading.local()
+        self._writes = 0
+        self._touch_lock = threading.Lock()
+        self._world_touches: Dict[str, float] = {}
+        self._content_touches: Dict[Tuple[str, str, str], float] = {}
+        self._flushed = time.monotonic()
+
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        with self._connection() as db:
+            db.executescript(self.SCHEMA)
+        self.evict()
+
+    def _connection(self) -> sqlite3.Connection:
+        """This thread's connection to the database"""
+        db = getattr(self._local, "db", None)
+        if db is None:
+            db = sqlite3.connect(self.path, timeout=30)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            self._local.db = db
+        return db
+
+    def save_world(self, world: World):
+        now = time.time()
+        with self._connection() as db:
+            db.execute(
+                "INSERT INTO worlds (id, data, created, accessed) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(id) DO UPDATE SET data = excluded.data, accessed = excluded.accessed",
+                (world.id, json.dumps(world.to_dict()), now, now)
+            )
+
+    def load_world(self, world_id: str) -> Optional[World]:
+        row = self._connection().execute("SELECT data FROM worlds WHERE id = ?", (world_id,)).fetchone()
+        if row is None:
+            return None
+        self._touch(self._world_touches, world_id)
+        return World.from_dict(json.loads(row[0]))
+
+    def get(self, world_id: str, kind: str, name: str) -> Optional[Sequence[Any]]:
+        """Stored messages ("board") or file listings ("files"), or None"""
+        row = self._connection().execute(
+            "SELECT data FROM content WHERE world_id = ? AND kind = ? AND name = ?",
+            (world_id, kind, name)
+        ).fetchone()
+        if row is None:
+            return None
+        self._touch(self._content_touches, (world_id, kind, name))
+        return self._records(kind, name, row[0])
+
+    def latest(self, kind: str, name: str) -> Optional[Sequence[Any]]:
+        """The newest content stored under this board or category name in any world, or None"""
+        row = self._connection().execute(
+            "SELECT data FROM content WHERE kind = ? AND name = ? ORDER BY created DESC LIMIT 1",
+            (kind, name)
+        ).fetchone()
+        return self._records(kind, name, row[0]) if row else None
+
+    def _touch(self, touches: Dict[Any, float], key: Any):
+        """Note that a world or some content was read, writing the access times out when they are due"""
+        with self._touch_lock:
+            touches[key] = time.time()
+            due = time.monotonic() - self._flushed >= self.TOUCH_EVERY
+        if due:
+            self.flush_access_times()
+
+    def flush_access_times(self):
+        """Write out the access times noted since the last flush, in one transaction"""
+        with self._touch_lock:
+            worlds, self._world_touches = self._world_touches, {}
+            content, self._content_touches = self._content_touches, {}
+            self._flushed = time.monotonic()
+        if not worlds and not content:
+            return
+        with self._connection() as db:
+            db.executemany("UPDATE worlds SET accessed = MAX(accessed, ?) WHERE id = ?",
+                           [(accessed, world_id) for world_id, accessed in worlds.items()])
+            db.executemany("UPDATE content SET accessed = MAX(accessed, ?) "
+                           "WHERE world_id = ? AND kind = ? AND name = ?",
+                           [(accessed,) + key for key, accessed in content.items()])
+
+    def _records(self, kind: str, name: str, data: str) -> Optional[Sequence[Any]]:
+        """Stored content as records, or None if it can't be read back"""
+        try:
+            return content_records(kind, json.loads(data))
+        except (ValueError, KeyError, TypeError) as e:
+            logger.warning("Ignoring unreadable stored %s %r: %s", kind, name, e)
+            return None
+
+    def put(self, world_id: str, kind: str, name: str, items: Iterable[Any]):
+        data = json.dumps(content_dicts(items))
+        now = time.time()
+        with self._connection() as db:
+            db.execute(
+                "INSERT OR REPLACE INTO content (world_id, kind, name, data, bytes, created, accessed) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (world_id, kind, name, data, len(data), now, now)
+            )
+        self._writes += 1
+        if self._writes % self.EVICT_EVERY == 0:
+            self.evict()
+
+    def evict(self):
+        """Drop content older than max_age, then least recently used content until under max_bytes"""
+        self.flush_access_times()
+        cutoff = time.time() - self.max_age
+        with self._connection() as db:
+            db.execute("DELETE FROM content WHERE accessed < ?", (cutoff,))
+            db.execute("DELETE FROM worlds WHERE accessed < ?", (cutoff,))
+
+            total = db.execute("SELECT COALESCE(SUM(bytes), 0) FROM content").fetchone()[0]
+            if total <= self.max_bytes:
+                return
+            excess = total - self.max_bytes
+            rows = db.execute("SELECT rowid, bytes FROM content ORDER BY accessed").fetchall()
+            doomed = []
+            for rowid, size in rows:
+                if excess <= 0:
+                    break
+                doomed.append((rowid,))
+                excess -= size
+            db.executemany("DELETE FROM content WHERE rowid = ?", doomed)
+            logger.info("Content store: evicted %d entries to stay under %d bytes", len(doomed), self.max_bytes)
+
+    # Async wrappers so sessions never block the event loop on disk I/O
+
+    async def _run(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(None, fn, *args)
+
+    async def save_world_async(self, world: World):
+        await self._run(self.save_world, world)
+
+    async def load_world_async(self, world_id: str) -> Optional[World]:
+        return await self._run(self.load_world, world_id)
+
+    async def get_async(self, world_id: str, kind: str, name: str) -> Optional[Sequence[Any]]:
+        return await self._run(self.get, world_id, kind, name)
+
+    async def latest_async(self, kind: str, name: str) -> Optional[Sequence[Any]]:
+        return await self._run(self.latest, kind, name)
+
+    async def put_async(self, world_id: str, kind: str, name: str, items: Iterable[Any]):
+        await self._run(self.put, world_id, kind, name, items)
+
+
+class DialupSound:
+    """The modem handshake, decoded into memory once and played in-process
+    with simpleaudio.
+
+    Anything that stops it playing (no simpleaudio, no sound file, no audio
+    device) just means a silent connect.
+    """
+
+    PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "assets", "dialup.wav")
+    # Played at double speed, so it lasts about as long as a real handshake
+    SPEED = 2
+
+    # (frames, channels, bytes per sample, sample rate) once decoded, shared
+    # by every session; False if there is nothing to play
+    _decoded = None
+    _lock = threading.Lock()
+
+    def __init__(self):
+        self.playing = None
+
+    @classmethod
+    def preload(cls) -> bool:
+        """Decode the sound file, if that hasn't been done yet; False if it can't be played"""
+        with cls._lock:
+            if cls._decoded is None:
+                try:
+                    import wave
+                    with wave.open(cls.PATH, "rb") as sound:
+                        cls._decoded = (sound.readframes(sound.getnframes()), sound.getnchannels(),
+                                        sound.getsampwidth(), sound.getframerate())
+                except FileNotFoundError as e:
+                    # Ships next to this file, so missing means a broken install
+                    logger.warning("Dialup sound unavailable: %s", e)
+                    cls._decoded = False
+                except (OSError, EOFError, wave.Error) as e:
+                    logger.info("Dialup sound unavailable: %s", e)
+                    cls._decoded = False
+        return bool(cls._decoded)
+
+    def play(self) -> bool:
+        """Start playing in the background; False if there was no sound to play"""
+        if not self.preload():
+            return False
+        frames, channels, sample_width, rate = self._decoded
+        try:
+            import simpleaudio
+            self.playing = simpleaudio.play_buffer(frames, channels, sample_width, rate * self.SPEED)
+        except Exception as e:
+            # ImportError, or simpleaudio's own error when there's no device
+            logger.info("Not playing the dialup sound: %s", e)
+            return False
+        return True
+
+    def stop(self):
+        """Cut the sound off, as the carrier is detected"""
+        if self.playing is not None:
+            self.playing.stop()
+            self.playing = None
+
+
+# Figlet fonts the BBS name and door game titles are drawn in
+WELCOME_FONTS = ('slant', 'banner', 'big', 'block', 'bubble', 'digital', 'ivrit',
+                 'mini', 'script', 'shadow', 'small', 'smscript', 'standard')
+DOOR_GAME_FONTS = ('big', 'block', 'bubble', 'digital', 'ivrit', 'banner')
+
+
+class FigletFonts:
+    """Figlet fonts, each parsed once, and a bounded LRU of the banners drawn with them.
+
+    pyfiglet reads and parses a font file on every figlet_format() call;
+    here that happens once per font, and drawing a banner that was drawn
+    before is a dictionary lookup.
+    """
+
+    FALLBACK = "standard"
+
+    def __init__(self, fonts=WELCOME_FONTS + DOOR_GAME_FONTS, max_banners: int = 256):
+        self.fonts = tuple(dict.fromkeys(fonts + (self.FALLBACK,)))
+        self.max_banners = max_banners
+        # pyfiglet.Figlet per (font, width); None for a font that failed to load
+        self._figlets: Dict[Tuple[str, int], Any] = {}
+        self._banners: "collections.OrderedDict[Tuple[str, str, int], str]" = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def preload(self, width: int = 80):
+        """Parse every font, dropping any that pyfiglet can't load; safe to run on a background thread"""
+        for font in self.fonts:
+            self._figlet(font, width)
+
+    def usable(self, fonts) -> List[str]:
+        """The fonts in `fonts` that loaded, or just the fallback if none did"""
+        usable = [font for font in fonts if self._figlet(font, 80) is not None]
+        return usable or [self.FALLBACK]
+
+    def _figlet(self, font: str, width: int):
+        key = (font, width)
+        if key not in self._figlets:
+            with self._lock:
+                if key not in self._figlets:
+                    import pyfiglet
+                    try:
+                        self._figlets[key] = pyfiglet.Figlet(font=font, width=width)
+                    except Exception as e:
+                        logger.warning("Figlet font %r unavailable: %s", font, e)
+                        self._figlets[key] = None
+        return self._figlets[key]
+
+    def render(self, text: str, font: str, width: int = 80) -> str:
+        """`text` drawn in `font` (the fallback font if that one is unavailable), wrapped at `width`"""
+        key = (text, font, width)
+        banner = self._banners.get(key)
+        if banner is not None:
+            self.hits += 1
+            self._banners.move_to_end(key)
+            return banner
+
+        self.misses += 1
+        figlet = self._figlet(font, width) or self._figlet(self.FALLBACK, width)
+        banner = str(figlet.renderText(text))
+        self._banners[key] = banner
+        if len(self._banners) > self.max_banners:
+            self._banners.popitem(last=False)
+        return banner
+
+
+# Shared by every session
+figlet_fonts = FigletFonts()
+
+
+class ModemLine:
+    """Terminal wrapper sending everything written to it at the speed of a
+    modem line, so every screen draws the way it did at 300-57600 baud.
+
+    Bytes are metered by a token bucket refilled from the time that really
+    passed, so oversleeping on one chunk buys a bigger next one and the line
+    keeps its average speed instead of drifting slow. Each write waits its
+    turn without blocking the event loop, so one slow line never holds up
+    the other callers on the server.
+    """
+
+    # How often paced output is written
+    TICK = 0.02
+
+    def __init__(self, terminal, baud: int = 2400, clock: Optional[Clock] = None):
+        self.terminal = terminal
+        self.clock = clock or Clock.real()
+        # 8N1 framing: ten bits on the wire per character
+        self.chars_per_second = max(baud, 1) / 10
+        # A tick's worth of characters, plus whatever one late wakeup owes
+        self.burst = max(1.0, self.chars_per_second * self.TICK)
+        self.level = self.burst
+        self.updated = time.monotonic()
+
+    @property
+    def local(self) -> bool:
+        return self.terminal.local
+
+    @property
+    def columns(self) -> int:
+        return self.terminal.columns
+
+    @property
+    def rows(self) -> int:
+        return self.terminal.rows
+
+    def _refill(self):
+        now = time.monotonic()
+        # Line time runs at the clock's speed
+        elapsed = (now - self.updated) / self.clock.factor
+        self.level = min(2 * self.burst, self.level + elapsed * self.chars_per_second)
+        self.updated = now
+
+    async def write(self, text: str):
+        if not self.clock.factor:
+            await self.terminal.write(text)
+            return
+        start = 0
+        while start < len(text):
+            # Wait until a whole tick's worth can go out, rather than
+            # dribbling out a character at a time
+            self._refill()
+            wanted = min(self.burst, len(text) - start)
+            if self.level < wanted:
+                await self.clock.sleep_async((wanted - self.level) / self.chars_per_second)
+                self._refill()
+            chunk = text[start:start + max(1, int(self.level))]
+            self.level -= len(chunk)
+            start += len(chunk)
+            await self.terminal.write(chunk)
+
+    async def readline(self) -> str:
+        return await self.terminal.readline()
+
+    async def clear(self):
+        await self.terminal.clear()
+
+    async def close(self):
+        await self.terminal.close()
+
+
+# Color (SGR) sequences, and every CSI sequence, which take up no columns
+_SGR = re.compile(r"\x1b\[([0-9;]*)m")
+_CSI = re.compile(r"\x1b\[[0-9;?]*[A-Za-z]")
+
+
+# Characters that show the foreground color, and characters that show anything
+# at all (a space shows the background, underline and reverse video)
+_INKED = re.compile(r"[^\s\b]")
+_SHOWN = re.compile(r"[^\n\r\b]")
+
+
+class AnsiMinimizer:
+    """Rewrites output to carry only the color and attribute changes the terminal needs.
+
+    The SGR state the terminal is in is tracked alongside the state the text
+    asks for, and the difference is sent just before the next character it
+    would show on: a color set and then reset with nothing drawn in between
+    never goes out, and a line starting with the color the last one ended in
+    starts with nothing.
+    """
+
+    # State: foreground, background, intensity ("1" bold, "2" dim), italic,
+    # underline, blink, reverse. Colors are kept as their SGR parameters.
+    DEFAULT = ("", "", "", False, False, False, False)
+    FLAGS = {3: ("3", "23"), 4: ("4", "24"), 5: ("5", "25"), 6: ("7", "27")}
+    _FLAG_PARAMS = {on: (index, True) for index, (on, _) in FLAGS.items()}
+    _FLAG_PARAMS.update({off: (index, False) for index, (_, off) in FLAGS.items()})
+
+    def __init__(self):
+        self.current = self.DEFAULT
+        self.wanted = self.DEFAULT
+        self.raw_bytes = 0
+        self.sent_bytes = 0
+
+    def feed(self, text: str) -> str:
+        """`text` with its SGR sequences replaced by the changes that matter"""
+        out = []
+        start = 0
+        for match in _CSI.finditer(text):
+            self._literal(text[start:match.start()], out)
+            sequence = match.group(0)
+            if sequence[-1] == "m":
+                self.wanted = self._apply(self.wanted, sequence[2:-1])
+            else:
+                # Erasing fills with the background color
+                if sequence[-1] in "JK" and self._paint(self.wanted) != self._paint(self.current):
+                    out.append(self._sync())
+                out.append(sequence)
+            start = match.end()
+        self._literal(text[start:], out)
+        result = "".join(out)
+        self.raw_bytes += len(text)
+        self.sent_bytes += len(result)
+        return result
+
+    def settle(self) -> str:
+        """Whatever is still needed to put the terminal in the state written so far (say, before input is echoed)"""
+        result = self._sync() if self.wanted != self.current else ""
+        self.sent_bytes += len(result)
+        return result
+
+    def summary(self) -> str:
+        saved = 1 - self.sent_bytes / self.raw_bytes if self.raw_bytes else 0.0
+        return f"{self.raw_bytes} bytes written, {self.sent_bytes} sent ({saved:.0%} saved)"
+
+    @staticmethod
+    def _paint(state) -> tuple:
+        # What a space shows: background, underline and reverse video
+        return state[1], state[4], state[6]
+
+    def _literal(self, text: str, out: List[str]):
+        if not text:
+            return
+        if self.wanted != self.current:
+            pattern = _SHOWN if self._paint(self.wanted) != self._paint(self.current) else _INKED
+            match = pattern.search(text)
+            if match:
+                out.append(text[:match.start()])
+                out.append(self._sync())
+                text = text[match.start():]
+        out.append(text)
+
+    def _sync(self) -> str:
+        """The shortest SGR sequence taking the terminal from the current state to the wanted one"""
+        current, wanted = self.current, self.wanted
+        self.current = wanted
+        if wanted == self.DEFAULT:
+            return "\x1b[0m"
+
+        changes = []
+        if wanted[2] != current[2]:
+            changes.append(wanted[2] if not current[2] else f"22;{wanted[2]}" if wanted[2] else "22")
+        if wanted[0] != current[0]:
+            changes.append(wanted[0] or "39")
+        if wanted[1] != current[1]:
+            changes.append(wanted[1] or "49")
+        for index, (on, off) in self.FLAGS.items():
+            if wanted[index] != current[index]:
+                changes.append(on if wanted[index] else off)
+
+        fresh = ["0"] + [value for value in wanted[:3] if value]
+        fresh += [on for index, (on, _) in self.FLAGS.items() if wanted[index]]
+        params = changes if len(";".join(changes)) <= len(";".join(fresh)) else fresh
+        return f"\x1b[{';'.join(params)}m"
+
+    def _apply(self, state, params: str) -> tuple:
+        state = list(state)
+        values = params.split(";")
+        index = 0
+        while index < len(values):
+            value = values[index] or "0"
+            index += 1
+            if value == "0":
+                state = list(self.DEFAULT)
+            elif value in ("1", "2"):
+                state[2] = value
+            elif value == "22":
+                state[2] = ""
+            elif value in self._FLAG_PARAMS:
+                flag, on = self._FLAG_PARAMS[value]
+                state[flag] = on
+            elif value in ("38", "48"):
+                # 256-color and truecolor: 38;5;n or 38;2;r;g;b
+                width = 2 if values[index:index + 1] == ["5"] else 4
+                state[0 if value == "38" else 1] = ";".join(values[index - 1:index + width])
+                index += width
+            elif value == "39":
+                state[0] = ""
+            elif value == "49":
+                state[1] = ""
+            elif value.isdigit() and (30 <= int(value) <= 37 or 90 <= int(value) <= 97):
+                state[0] = value
+            elif value.isdigit() and (40 <= int(value) <= 47 or 100 <= int(value) <= 107):
+                state[1] = value
+        return tuple(state)
+
+
+class ScreenRenderer:
+    """Builds each screen in a back buffer and sends it in a single write.
+
+    The rows of the previous frame (the front buffer) are kept, along with
+    anything written below them since, for as long as they are known to be
+    on the caller's screen. A new frame then repaints only the rows that
+    changed, such as the body of the next message on a board; the full
+    clear-and-draw is used when nothing is known about the screen, or when
+    that would be shorter anyway.
+    """
+
+    CLEAR = "\x1b[2J\x1b[H"
+
+    def __init__(self, terminal):
+        self.terminal = terminal
+        # Rows on screen since the last clear (None for a row whose contents
+        # aren't known); None altogether once the screen has scrolled
+        self.front: Optional[List[Optional[str]]] = None
+        # Rows of the frame being built; None outside a frame
+        self.back: Optional[List[str]] = None
+        # Colors in effect at the end of the last row written to, which a new
+        # row starts with so that it can be repainted on its own
+        self._colors = ""
+        # Everything sent goes through here, whatever its escape codes say
+        self.ansi = AnsiMinimizer()
+
+        self.frames = 0
+        self.partial_frames = 0
+
+    def clear(self):
+        """Start a new frame; nothing is sent until flush()"""
+        self.back = [""]
+        self._colors = ""
+
+    async def write(self, text: str):
+        """Add text to the frame being built, or send it straight away outside a frame"""
+        if self.back is not None:
+            self._extend(self.back, text)
+            return
+        if self.front is not None:
+            self._extend(self.front, text)
+            self._check_front(text.count("\n") + 1)
+        text = self.ansi.feed(text)
+        if text:
+            await self.terminal.write(text)
+
+    def typed(self):
+        """Record that the caller typed a line at the bottom of the screen"""
+        if self.front is not None:
+            self.front[-1] = None
+            self.front.append(self._colors)
+            self._check_front(1)
+
+    async def flush(self, settle: bool = False):
+        """Send the frame being built, if there is one.
+
+        With `settle`, also bring the terminal's colors up to date with
+        everything written, as the caller's typing is about to be echoed in
+        them.
+        """
+        out = ""
+        if self.back is not None:
+            back, self.back = self.back, None
+            frame = self.CLEAR + "\n".join(back)
+            if self.front is not None:
+                repaint = self._repaint(self.front, back)
+                if len(repaint) < len(frame):
+                    frame = repaint
+                    self.partial_frames += 1
+            self.frames += 1
+            self.front = back
+            self._check_front(len(back))
+            out = self.ansi.feed(frame)
+        if settle:
+            out += self.ansi.settle()
+        if out:
+            await self.terminal.write(out)
+
+    def _repaint(self, front: List[Optional[str]], back: List[str]) -> str:
+        """Escape sequences turning the rows on screen into the new frame"""
+        out = []
+        if len(front) > len(back):
+            # Wipe everything below the new frame
+            out.append(f"\x1b[{len(back) + 1};1H\x1b[J")
+        for row, line in enumerate(back):
+            # The last row is always drawn, to leave the cursor after it
+            if row == len(back) - 1 or row >= len(front) or front[row] != line:
+                out.append(f"\x1b[{row + 1};1H{line}\x1b[K")
+        return "".join(out)
+
+    def _extend(self, rows: List[Optional[str]], text: str):
+        for index, part in enumerate(text.split("\n")):
+            if index:
+                rows.append(self._colors)
+            if rows[-1] is not None:
+                rows[-1] += part
+            # Nearly every line ends in a reset, so only what follows the
+            # last one needs scanning
+            reset = part.rfind(Style.RESET_ALL)
+            if reset >= 0:
+                self._colors = ""
+                part = part[reset + len(Style.RESET_ALL):]
+            if "\x1b" in part:
+                for match in _SGR.finditer(part):
+                    if match.group(1) in ("", "0"):
+                        self._colors = ""
+                    else:
+                        self._colors += match.group(0)
+
+    def _check_front(self, changed: int):
+        """Forget the screen once it has scrolled, or one of the last `changed` rows has wrapped"""
+        if self.front is None:
+            return
+        # Frames taller or wider than the caller's screen scroll or wrap,
+        # after which the rows on screen are no longer known
+        rows, columns = self.terminal.rows, self.terminal.columns
+        if len(self.front) > rows or any(
+                row is not None and len(row) > columns and len(_CSI.sub("", row)) > columns
+                for row in self.front[-changed:]):
+            self.front = None
+
+
+class BaudRenderer:
+    """Writes streamed text to a terminal as it arrives.
+
+    feed() never waits, so the stream is read at full speed while the text
+    goes out at whatever pace the terminal (a ModemLine) allows.
+    """
+
+    def __init__(self, terminal):
+        self.terminal = terminal
+        self.queue: asyncio.Queue = asyncio.Queue()
+        self.task: Optional[asyncio.Task] = None
+
+    async def __aenter__(self):
+        self.task = asyncio.ensure_future(self._render())
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self.queue.put_nowait(None)
+        await self.task
+
+    def feed(self, text: str):
+        """Queue text as it arrives from the stream"""
+        if text:
+            self.queue.put_nowait(text)
+
+    async def _render(self):
+        while True:
+            text = await self.queue.get()
+            if text is None:
+                break
+            # Send everything that has arrived in one go
+            finished = False
+            while not self.queue.empty():
+                more = self.queue.get_nowait()
+                if more is None:
+                    finished = True
+                    break
+                text += more
+            await self.terminal.write(text)
+            if finished:
+                break
+
+
+class ScreenTemplate:
+    """A screen layout compiled once into a single format string.
+
+    Each line ends in a color reset and a newline, as BBScapade._print
+    writes it. Fields naming a style ({bright}, {reset}) or a color
+    ({cyan}, {white}, ...) are filled in when the template is built; every
+    other field is a slot that render() fills in, such as the random colors
+    of the main menu or the name of a file.
+    """
+
+    FIXED = {
+        "bright": Style.BRIGHT, "reset": Style.RESET_ALL,
+        "white": Fore.WHITE, "yellow": Fore.YELLOW, "green": Fore.GREEN, "cyan": Fore.CYAN,
+        "magenta": Fore.MAGENTA, "red": Fore.RED, "blue": Fore.BLUE,
+    }
+
+    def __init__(self, *lines: str):
+        parts = []
+        slots = set()
+        for line in lines:
+            for literal, name, spec, conversion in string.Formatter().parse(line):
+                parts.append(literal.replace("{", "{{").replace("}", "}}"))
+                if name is None:
+                    continue
+                if name in self.FIXED and not spec and not conversion:
+                    parts.append(self.FIXED[name])
+                else:
+                    parts.append("{%s%s%s}" % (name, f"!{conversion}" if conversion else "", f":{spec}" if spec else ""))
+                    slots.add(name)
+            parts.append(f"{Style.RESET_ALL}\n" if line else "\n")
+        self.source = "".join(parts)
+        self.slots = frozenset(slots)
+        # str.format of the compiled source does the whole render in C
+        self.render = self.source.format
+
+
+RULE = "=" * 60
+
+MENU_TEMPLATES = {
+    "standard": ScreenTemplate(
+        "{title}{bright}==== MAIN MENU ===={reset}",
+        "{number}1. {option}Message Boards",
+        "{number}2. {option}File Archives",
+        "{number}3. {option}Door Games",
+        "{number}4. {option}Chat with SysOp (AI)",
+        "{number}5. {option}Logoff",
+    ),
+    "boxed": ScreenTemplate(
+        "{title}╔══════════════════╗",
+        "{title}║ {bright}  MAIN MENU     {reset}{title}║",
+        "{title}╠══════════════════╣",
+        "{title}║ {number}1. {option}Message Boards {title}║",
+        "{title}║ {number}2. {option}File Archives  {title}║",
+        "{title}║ {number}3. {option}Door Games     {title}║",
+        "{title}║ {number}4. {option}Chat with SysOp{title}║",
+        "{title}║ {number}5. {option}Logoff         {title}║",
+        "{title}╚══════════════════╝",
+    ),
+    "arrow": ScreenTemplate(
+        "{title}{bright}>>> MAIN MENU <<<{reset}",
+        "{highlight}------------------",
+        "{number}1 {highlight}-> {option}Message Boards",
+        "{number}2 {highlight}-> {option}File Archives",
+        "{number}3 {highlight}-> {option}Door Games",
+        "{number}4 {highlight}-> {option}Chat with SysOp",
+        "{number}5 {highlight}-> {option}Logoff",
+        "{highlight}------------------",
+    ),
+    "retro": ScreenTemplate(
+        "{title}■■■■■■■■■■■■■■■■■■■■■■■■",
+        "{title}■ {bright}BBS COMMAND CENTER{reset} {title}■",
+        "{title}■■■■■■■■■■■■■■■■■■■■■■■■",
+        "{option}  [{number}1{option}] Message Boards",
+        "{option}  [{number}2{option}] File Archives",
+        "{option}  [{number}3{option}] Door Games",
+        "{option}  [{number}4{option}] Chat with SysOp",
+        "{option}  [{number}5{option}] Logoff System",
+        "{title}■■■■■■■■■■■■■■■■■■■■■■■■",
+    ),
+    "ascii": ScreenTemplate(
+        "{title}{art}",
+        "{highlight}" + "=" * 30,
+        "{number}1. {option}Message Boards",
+        "{number}2. {option}File Archives",
+        "{number}3. {option}Door Games",
+        "{number}4. {option}Chat with SysOp",
+        "{number}5. {option}Logoff",
+        "{highlight}" + "=" * 30,
+    ),
+}
+
+WELCOME_TEMPLATE = ScreenTemplate(
+    "{name_color}{banner}",
+    "{tagline_color}{bright}{tagline}{reset}",
+    "{border_color}" + RULE,
+    "{label_color}SysOp: {value_color}{sysop}",
+    "{label_color}Established: {value_color}{established}",
+    "{label_color}Node Count: {value_color}{nodes}",
+    "{border_color}" + RULE,
+)
+WELCOME_ART_TEMPLATE = ScreenTemplate("{color}{art}")
+WELCOME_FOOTER_TEMPLATE = ScreenTemplate(
+    "{cyan}Welcome to this unique BBS experience!",
+    "{cyan}Each time you connect, a new randomly generated BBS awaits...",
+    "",
+)
+
+# Message and file detail pages are as wide as the caller's screen allows,
+# so their rules are slots too
+MESSAGE_TEMPLATE = ScreenTemplate(
+    "{cyan}{bright}==== {board} ===={reset}",
+    "{green}{rule}",
+    "{white}Message: {yellow}#{number} of {total}",
+    "{white}From: {magenta}{author}",
+    "{white}Date: {magenta}{date}",
+    "{white}Subject: {yellow}{subject}",
+    "{green}{rule}",
+)
+MESSAGE_FOOTER_TEMPLATE = ScreenTemplate(
+    "{green}{rule}",
+    "{white}N{green}ext message, {white}Q{green}uit to board list",
+)
+TEXT_LINE_TEMPLATE = ScreenTemplate("{white}{line}")
+
+FILE_LIST_TEMPLATE = ScreenTemplate(
+    "{cyan}{bright}==== {category} Files ===={reset}",
+    "{green}" + RULE,
+    "{white}" + f"{'#':<3} {'Filename':<20} {'Size':<8} {'Date':<10} {'Downloads':<5}",
+    "{green}" + "-" * 60,
+)
+FILE_ROW_TEMPLATE = ScreenTemplate(
+    "{white}{number:<3} {yellow}{name:<20} {green}{size:<8} {magenta}{date:<10} {cyan}{downloads:<5}",
+)
+FILE_LIST_FOOTER_TEMPLATE = ScreenTemplate(
+    "{green}" + RULE,
+    "{white}Enter file number to view details, {white}Q{green} to return",
+)
+
+FILE_DETAILS_TEMPLATE = ScreenTemplate(
+    "{cyan}{bright}==== File Details ===={reset}",
+    "{green}{rule}",
+    "{white}Filename: {yellow}{name}",
+    "{white}Category: {yellow}{category}",
+    "{white}Size: {green}{size}",
+    "{white}Uploaded: {magenta}{date}",
+    "{white}Downloads: {cyan}{downloads}",
+    "{white}Uploaded by: {magenta}{uploader}",
+    "{green}{divider}",
+    "{white}Description:",
+)
+FILE_DETAILS_FOOTER_TEMPLATE = ScreenTemplate(
+    "{green}{rule}",
+    "{white}D{green}ownload file, {white}Q{green}uit to file list",
+)
+
+DOWNLOAD_TEMPLATE = ScreenTemplate(
+    "{cyan}{bright}==== Downloading File ===={reset}",
+    "{green}" + RULE,
+    "{white}Downloading: {yellow}{name}",
+    "{white}Size: {green}{size}",
+)
+
+DOOR_GAME_TEMPLATE = ScreenTemplate(
+    "{title_color}{banner}",
+    "{accent_color}" + RULE,
+    "{white}© {year} {company}",
+    "{white}All rights reserved",
+    "{accent_color}" + RULE,
+    "{yellow}{bright}{tagline}{reset}\n",
+    "{art_color}{art}",
+)
+DOOR_GAME_ERROR_TEMPLATE = ScreenTemplate(
+    "{red}{bright}* * * SYSTEM ERROR * * *{reset}",
+    "{red}{error}",
+    "{yellow}\nThis door game is temporarily out of order.",
+    "{yellow}The SysOp has been notified and promises to fix it",
+    "{yellow}right after finishing this pizza and Mountain Dew.\n",
+)
+
+
+class PageCache:
+    """Message and file detail pages, each rendered once into a ready-to-send buffer.
+
+    A page is kept per record and per everything else that goes into it:
+    the width and color profile it was rendered for, and the header values
+    that change, such as a file's download count. Messages are found by
+    value, since a board's MessageColumns builds a new Message on every
+    visit; file listings by identity.
+    """
+
+    def __init__(self, max_pages: int = 256):
+        self.max_pages = max_pages
+        self._pages: "collections.OrderedDict[Tuple, str]" = collections.OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def page(self, record: Any, key: Tuple, render) -> str:
+        """The page for `record` and `key`, calling `render()` to draw it on a miss"""
+        key = (record,) + key
+        page = self._pages.get(key)
+        if page is not None:
+            self.hits += 1
+            self._pages.move_to_end(key)
+            return page
+
+        self.misses += 1
+        page = render()
+        self._pages[key] = page
+        if len(self._pages) > self.max_pages:
+            self._pages.popitem(last=False)
+        return page
+
+    def clear(self):
+        """Drop every cached page"""
+        self._pages.clear()
+
+    def summary(self) -> str:
+        return f"{len(self._pages)} cached, {self.hits} hits, {self.misses} misses"
+
+
+@dataclass
+class ChatTurn:
+    """Latency and prompt-cache usage of one streamed SysOp reply"""
+    first_token: Optional[float]
+    total: float
+    chars: int
+    input_tokens: int = 0
+    cache_read_tokens: int = 0
+    cache_write_tokens: int = 0
+
+
+@dataclass
+class CacheStats:
+    """Prompt-cache accounting across a session"""
+    calls: int = 0
+    hits: int = 0
+    input_tokens: int = 0
+    cache_read_tokens: int = 0
+    cache_write_tokens: int = 0
+
+    def record(self, usage) -> Tuple[int, int, int]:
+        """Add one response's usage; returns (uncached input, cache read, cache write) tokens"""
+        input_tokens = getattr(usage, "input_tokens", 0) or 0
+        cache_read = getattr(usage, "cache_read_input_tokens", 0) or 0
+        cache_write = getattr(usage, "cache_creation_input_tokens", 0) or 0
+
+        self.calls += 1
+        if cache_read:
+            self.hits += 1
+        self.input_tokens += input_tokens
+        self.cache_read_tokens += cache_read
+        self.cache_write_tokens += cache_write
+        return input_tokens, cache_read, cache_write
+
+    @property
+    def hit_rate(self) -> float:
+        """Fraction of calls that read anything from the cache"""
+        return self.hits / self.calls if self.calls else 0.0
+
+    @property
+    def token_hit_rate(self) -> float:
+        """Fraction of all prompt tokens that were served from the cache"""
+        total = self.input_tokens + self.cache_read_tokens + self.cache_write_tokens
+        return self.cache_read_tokens / total if total else 0.0
+
+    def summary(self) -> str:
+        return (f"{self.calls} calls, {self.hit_rate:.0%} cache hits, "
+                f"{self.token_hit_rate:.0%} of prompt tokens cached "
+                f"(read {self.cache_read_tokens}, written {self.cache_write_tokens}, "
+                f"uncached {self.input_tokens})")
+
+
+class Prefetcher:
+    """Generates a world's boards and file areas in the background so they are
+    already cached by the time the caller opens them.
+
+    At most `max_in_flight` areas are prefetched at once. Each area is asked
+    for in several chunks, so the API requests they make are capped
+    separately at `max_requests`, leaving the dispatcher free for the
+    caller's own requests.
+    """
+
+    def __init__(self, session: "BBScapade", max_in_flight: int = 3, max_requests: int = 4):
+        self.session = session
+        self.semaphore = asyncio.Semaphore(max_in_flight)
+        self.requests = asyncio.Semaphore(max_requests)
+        self.tasks: Dict[Tuple[str, str], asyncio.Task] = {}
+        self.started: set = set()
+
+        # Cache statistics for the session: served from cache, joined a
+        # running prefetch, or generated on demand
+        self.hits = 0
+        self.joins = 0
+        self.misses = 0
+
+    def start(self, world: World):
+        """Queue generation of every board and file area in the world not already cached"""
+        for board_name in world.board_names:
+            if board_name not in self.session.board_messages:
+                self._schedule("board", board_name)
+        for category in world.file_areas:
+            if category not in self.session.file_categories:
+                self._schedule("files", category)
+
+    def _schedule(self, kind: str, name: str):
+        key = (kind, name)
+        if key not in self.tasks:
+            self.tasks[key] = asyncio.ensure_future(self._prefetch(kind, name))
+
+    async def _prefetch(self, kind: str, name: str):
+        async with self.semaphore:
+            self.started.add((kind, name))
+            try:
+                # Background priority: the dispatcher serves chat and
+                # on-demand loads first
+                content = await self.session.fetch_content(kind, name, Priority.BACKGROUND, self.requests)
+                self.session.content_cache(kind)[name] = content
+            except Exception:
+                logger.exception("Prefetch of %s %r failed", kind, name)
+
+    def claim(self, kind: str, name: str) -> Optional[asyncio.Task]:
+        """Return the running prefetch for this content, if there is one.
+
+        A prefetch that is still queued is cancelled so the caller can
+        generate it right away instead of waiting behind the rest of the queue.
+        """
+        task = self.tasks.pop((kind, name), None)
+        if task is None or task.done():
+            return None
+        if (kind, name) in self.started:
+            return task
+        task.cancel()
+        return None
+
+    def cancel(self):
+        """Stop all outstanding prefetches"""
+        for task in self.tasks.values():
+            task.cancel()
+        self.tasks.clear()
+
+
+class BBScapade:
+    def __init__(self, terminal=None, node: int = 1, baud: int = 2400,
+                 generator: Optional[ContentGenerator] = None, pool: Optional[WorldPool] = None,
+                 store: Optional[ContentStore] = None, world_id: Optional[str] = None,
+                 clock: Optional[Clock] = None):
+        self.generator = generator or ContentGenerator()
+        self.pool = pool
+        self.store = store
+        
+        # Dial a world that was generated before (needs the store)
+        self.world_id = world_id
+        # Every typing effect and pause in the session waits on this
+        self.clock = clock or Clock.real()
+        # Every screen goes out at the caller's line speed
+        self.term = ModemLine(terminal or ConsoleTerminal(), baud, self.clock)
+        # ...a whole frame at a time
+        self.screen = ScreenRenderer(self.term)
+        # Message and file detail pages, as sent to this caller; only ANSI
+        # color exists so far, but a page drawn for one profile must never
+        # be sent to a caller with another
+        self.pages = PageCache()
+        self.color_profile = "ansi"
+        self.node = node
+        self.baud = baud
+        self.logged_in = False
+        self.user_name = ""
+
+        # Session-scoped world and the content generated for it
+        self.world: Optional[World] = None
+        self._world_task: Optional[asyncio.Future] = None
+        self.board_messages: Dict[str, MessageColumns] = {}
+        self.file_categories: Dict[str, List[FileEntry]] = {}
+
+        # Number of times this session has asked Claude for a world; should
+        # stay at 1 (or 0 when served from the pool) no matter how many
+        # screens are visited, unless the world is invalidated
+        self.world_generations = 0
+        self.world_invalidations = 0
+
+        # Background content generation; created in run() once the event loop exists
+        self.prefetcher: Optional[Prefetcher] = None
+
+        # Time-to-first-token, total latency and cache usage of each SysOp
+        # reply, plus prompt-cache totals for the session
+        self.chat_turns: List[ChatTurn] = []
+        self.cache_stats = CacheStats()
+
+        # Screens that showed stand-in content because Claude ran over budget
+        self.fallbacks_served = 0
+
+    async def get_world(self) -> World:
+        """Return the session's BBS world, generating it on first use"""
+        if self.world is None:
+            self._start_world()
+            self.world = await self._world_task
+        return self.world
+
+    def _start_world(self):
+        """Start generating the world in the background if nobody has yet"""
+        if self._world_task is None:
+            self._world_task = asyncio.ensure_future(self._create_world())
+
+    async def _create_world(self) -> World:
+        """Revisit a stored world, take one from the pool or generate one, and start prefetching its content"""
+        world = None
+        if self.world_id and self.store:
+            world = await self.store.load_world_async(self.world_id)
+            if world is None:
+                logger.warning("Node %d: world %s not found in the content store", self.node, self.world_id)
+        
+        if world is None:
+            pooled = await self.pool.pop() if self.pool else None
+            if pooled:
+                logger.info("Node %d: world %r served from pool", self.node, pooled.world.name)
+                world = pooled.world
+                self.board_messages.update(pooled.board_messages)
+                self.file_categories.update(pooled.file_categories)
+                if self.store:
+                    for name, messages in pooled.board_messages.items():
+                        await self.store.put_async(world.id, "board", name, messages)
+                    for name, files in pooled.file_categories.items():
+                        await self.store.put_async(world.id, "files", name, files)
+            else:
+                self.world_generations += 1
+                world = await self.generator.generate_world()
+        
+        if self.store:
+            await self.store.save_world_async(world)
+        
+        if self.prefetcher:
+            self.prefetcher.start(world)
+        return world
+
+    def invalidate_world(self):
+        """Discard the current world and everything generated for it; the next get_world() makes a new one"""
+        if self._world_task:
+            self._world_task.cancel()
+            self.world_invalidations += 1
+        self._world_task = None
+        self.world = None
+        # A world dialed by id would only be loaded again
+        self.world_id = None
+        self.board_messages = {}
+        self.file_categories = {}
+        self.pages.clear()
+        if self.prefetcher:
+            self.prefetcher.cancel()
+            self.prefetcher = Prefetcher(self)
+
+    def content_cache(self, kind: str) -> Dict[str, Sequence[Any]]:
+        """The session cache for "board" messages or "files" listings"""
+        return self.board_messages if kind == "board" else self.file_categories
+
+    async def fetch_content(self, kind: str, name: str, priority: Priority = Priority.ON_DEMAND,
+                            limit: Optional[asyncio.Semaphore] = None) -> Sequence[Any]:
+        """Load board messages or file listings from the content store, generating and storing them on a miss.
+
+        Each API request made to generate them holds `limit` while it runs, if given.
+        """
+        world = await self.get_world()
+        key = (world.id, kind, name)
+        
+        # If a lower-priority request for this content is already queued,
+        # it now has someone waiting on it
+        self.generator.dispatcher.boost(key, priority)
+        
+        # Concurrent requests for the same content (callers sharing a world,
+        # or a prefetch racing the caller) share one generation
+        return await self.generator.flights.do(
+            key,
+            lambda: self._load_or_generate(world, kind, name, priority, key, limit)
+        )
+
+    async def _load_or_generate(self, world: World, kind: str, name: str, priority: Priority, key: Any,
+                                limit: Optional[asyncio.Semaphore] = None) -> Sequence[Any]:
+        if self.store:
+            items = await self.store.get_async(world.id, kind, name)
+            if items is not None:
+                return items
+        
+        if kind == "board":
+            items = await self.generator.generate_board_messages(name, priority, key, limit=limit)
+        else:
+            items = await self.generator.generate_category_files(name, priority, key, limit=limit)
+        items = content_records(kind, items)
+        
+        if self.store:
+            await self.store.put_async(world.id, kind, name, items)
+        return items
+
+    # How long a caller waits for a board's first message or a file area's
+    # first row before stand-in content is shown; the real content carries
+    # on generating in the background and is there on the next visit. A
+    # file listing that has started keeps scrolling in for as long as each
+    # new row arrives within the budget.
+    CONTENT_BUDGETS = {"board": 3.0, "files": 3.0}
+
+    async def _within_budget(self, kind: str, ready) -> bool:
+        """Wait for the `ready` coroutine for up to the screen's budget; False if the budget ran out"""
+        try:
+            await asyncio.wait_for(ready, self.CONTENT_BUDGETS[kind])
+            return True
+        except asyncio.TimeoutError:
+            logger.info("Node %d: %s content over its %.1fs budget, showing stand-in content",
+                        self.node, kind, self.CONTENT_BUDGETS[kind])
+            return False
+
+    async def _fallback_content(self, kind: str, name: str) -> Sequence[Any]:
+        """Stand-in content: the same board or category from another stored world, else canned content"""
+        self.fallbacks_served += 1
+        items = await self.store.latest_async(kind, name) if self.store else None
+        return items if items is not None else self.generator.fallback_content(kind, name)
+
+    async def _open_content(self, kind: str, name: str, loading_message: str) -> ContentProgress:
+        """Start loading content from the session cache, the store, a running prefetch or Claude, in that order.
+
+        Returns as soon as loading is under way. The ContentProgress fills
+        in as items finish generating, so the screen can start showing them
+        right away.
+        """
+        cache = self.content_cache(kind)
+        if name not in cache and self.store:
+            world = await self.get_world()
+            items = await self.store.get_async(world.id, kind, name)
+            if items is not None:
+                cache[name] = items
+        
+        if name in cache:
+            if self.prefetcher:
+                self.prefetcher.hits += 1
+            return ContentProgress(cache[name], done=True)
+
+        await self._print(loading_message)
+        world = await self.get_world()
+        key = (world.id, kind, name)
+        # Shared with the generator, and with any other caller watching the
+        # same content
+        progress = self.generator.progress.setdefault(key, ContentProgress())
+        
+        task = self.prefetcher.claim(kind, name) if self.prefetcher else None
+        if task:
+            self.prefetcher.joins += 1
+            self.generator.dispatcher.boost(key, Priority.ON_DEMAND)
+        
+        def finished(loader: asyncio.Future):
+            if self.generator.progress.get(key) is progress:
+                del self.generator.progress[key]
+            if loader.cancelled():
+                progress.fail(asyncio.CancelledError())
+            elif loader.exception():
+                progress.fail(loader.exception())
+            else:
+                progress.finish(loader.result())
+        
+        asyncio.ensure_future(self._load_content(kind, name, task)).add_done_callback(finished)
+        return progress
+
+    async def _load_content(self, kind: str, name: str, prefetch: Optional[asyncio.Task]) -> Sequence[Any]:
+        cache = self.content_cache(kind)
+        if prefetch:
+            await prefetch
+        if name not in cache:
+            if self.prefetcher:
+                self.prefetcher.misses += 1
+            cache[name] = await self.fetch_content(kind, name)
+        return cache[name]
+
+    async def _print(self, text="", end="\n"):
+        """Write text to the caller, resetting colors afterwards"""
+        await self.screen.write(f"{text}{Style.RESET_ALL}{end}" if text else end)
+
+    async def _draw(self, template: ScreenTemplate, **values):
+        """Write a precompiled screen template to the caller"""
+        await self.screen.write(template.render(**values))
+
+    async def _input(self, prompt=""):
+        """Show a prompt and wait for the caller to enter a line"""
+        await self.screen.write(prompt)
+        await self.screen.flush(settle=True)
+        line = await self.term.readline()
+        self.screen.typed()
+        await self.screen.write(Style.RESET_ALL)
+        return line
+
+    async def _pause(self, seconds: float):
+        """Show what has been drawn so far, then wait"""
+        await self.screen.flush()
+        await self.clock.sleep_async(seconds)
+
+    async def _clear_screen(self):
+        """Start drawing a new screen"""
+        await self.screen.flush()
+        self.screen.clear()
+
+    # The connect sequence lasts at least CONNECT_MIN, so even a pooled or
+    # offline world gets its handshake. It carries on until the world exists
+    # and the first board has been prefetched, waiting at most CONNECT_GRACE
+    # for that board once the world is there.
+    CONNECT_MIN = 1.5
+    CONNECT_GRACE = 4.0
+    CONNECT_DOTS = 10
+    CONNECT_TICK = 0.2
+
+    def connect_progress(self) -> float:
+        """How much of the world and its prefetched boards and file areas is ready, from 0.0 to 1.0"""
+        if self._world_task is None or not self._world_task.done():
+            return 0.0
+        if self._world_task.cancelled() or self._world_task.exception():
+            return 1.0
+        world = self._world_task.result()
+        areas = [("board", name) for name in world.board_names] + [("files", name) for name in world.file_areas]
+        if not areas:
+            return 1.0
+        ready = sum(1 for kind, name in areas if name in self.content_cache(kind))
+        return 0.5 + 0.5 * ready / len(areas)
+
+    def _connected(self) -> bool:
+        """Whether the world is ready, along with the board the caller will most likely read first"""
+        if self._world_task is None or not self._world_task.done():
+            return False
+        if self._world_task.cancelled() or self._world_task.exception():
+            # get_world() reports the failure on the welcome screen
+            return True
+        world = self._world_task.result()
+        if not world.board_names or world.board_names[0] in self.board_messages:
+            return True
+        task = self.prefetcher.tasks.get(("board", world.board_names[0])) if self.prefetcher else None
+        return task is None or task.done()
+
+    async def connect(self):
+        """Show the dial-up progress dots while the world is generated and its content prefetched"""
+        sound = DialupSound()
+        if self.term.local:
+            loop = asyncio.get_running_loop()
+            if await loop.run_in_executor(None, DialupSound.preload):
+                sound.play()
+
+        await self._print(f"{Fore.CYAN}Connecting to BBS", end="")
+        spinner = itertools.cycle("|/-\\")
+        await self.screen.write(next(spinner))
+
+        started = time.monotonic()
+        world_ready = None
+        dots = 0
+        try:
+            while True:
+                now = time.monotonic()
+                if world_ready is None and self.connect_progress() > 0:
+                    world_ready = now
+                grace = self.clock.duration(self.CONNECT_GRACE)
+                if now - started >= self.clock.duration(self.CONNECT_MIN) and (
+                        self._connected() or (world_ready is not None and now - world_ready >= grace)):
+                    break
+
+                shown = int(self.connect_progress() * self.CONNECT_DOTS)
+                await self.screen.write(f"\b{'.' * (shown - dots)}{next(spinner)}")
+                dots = max(dots, shown)
+                await asyncio.sleep(self.CONNECT_TICK)
+        finally:
+            sound.stop()
+
+        logger.info("Node %d: connected in %.1fs (%.0f%% of content ready)",
+                    self.node, time.monotonic() - started, self.connect_progress() * 100)
+        await self._print(f"\b{'.' * (self.CONNECT_DOTS - dots)} {Fore.GREEN}CONNECT {self.baud}")
+        await self._pause(0.5)
+
+    async def display_welcome_screen(self):
+        """Display the welcome ASCII art and info"""
+        # Clear the screen
+        await self._clear_screen()
+        
+        # Use the world generated for this session
+        world = await self.get_world()
+        
+        # Get a random font for the BBS name
+        font = random.choice(figlet_fonts.usable(WELCOME_FONTS))
+        
+        # Get random colors for different elements
+        name_color, tagline_color, border_color, label_color, value_color = random.choices(SCREEN_COLORS, k=5)
+        
+        # Display BBS name with random font, the tagline and sysop info
+        await self._draw(WELCOME_TEMPLATE, banner=figlet_fonts.render(world.name, font), tagline=world.tagline,
+                         sysop=world.sysop, established=world.established, nodes=world.nodes,
+                         name_color=name_color, tagline_color=tagline_color, border_color=border_color,
+                         label_color=label_color, value_color=value_color)
+        
+        # Random ASCII art chance (25%)
+        if random.random() < 0.25:
+            await self._draw(WELCOME_ART_TEMPLATE, color=random.choice(SCREEN_COLORS), art=random.choice(WELCOME_ARTS))
+        
+        await self._draw(WELCOME_FOOTER_TEMPLATE)
+
+    async def login_screen(self):
+        """Display the login screen and handle user authentication"""
+        await self._print(f"{Fore.GREEN}{'=' * 60}")
+        await self._print(f"{Fore.CYAN}{Style.BRIGHT}LOGIN REQUIRED{Style.RESET_ALL}")
+        await self._print(f"{Fore.GREEN}{'=' * 60}")
+        
+        self.user_name = await self._input(f"{Fore.WHITE}Enter your handle: {Fore.YELLOW}")
+        await self._print(f"{Fore.CYAN}Validating user credentials...")
+        await self._pause(1.5)
+        
+        await self._print(f"{Fore.GREEN}Welcome aboard, {Fore.YELLOW}{self.user_name}{Fore.GREEN}! You are on node {self.node}.")
+        self.logged_in = True
+        await self._pause(1)
+
+    async def navigate(self, screen):
+        """Run `screen` and every screen the caller goes to from it, until they return from it.
+
+        A screen is a coroutine, or for a screen that leads to others, an
+        async generator that yields the next screen and carries on where it
+        left off once the caller returns from that one. Screens never call
+        each other, so however long the caller wanders around the BBS, the
+        call stack stays as deep as a single screen, and only the screens
+        on the way back to the main menu are kept.
+        """
+        stack = [screen]
+        try:
+            while stack:
+                top = stack[-1]
+                if inspect.isasyncgen(top):
+                    try:
+                        stack.append(await top.__anext__())
+                    except StopAsyncIteration:
+                        stack.pop()
+                else:
+                    stack.pop()
+                    await top
+        finally:
+            # Screens the caller never got back to, after a hang-up or an error
+            for top in reversed(stack):
+                if inspect.isasyncgen(top):
+                    await top.aclose()
+                else:
+                    top.close()
+
+    MENU_STYLES = ("standard", "boxed", "arrow", "retro", "ascii")
+
+    async def main_menu(self):
+        """Display and handle the main menu"""
+        while self.logged_in:
+            await self._clear_screen()
             
-            # Get user choice with a randomized prompt
-            prompts = [
-                f"\n{highlight_color}Choose an option: {Fore.WHITE}",
-                f"\n{highlight_color}Enter selection: {Fore.WHITE}",
-                f"\n{highlight_color}Command: {Fore.WHITE}",
-                f"\n{highlight_color}Your choice? {Fore.WHITE}",
-                f"\n{highlight_color}What's your pleasure? {Fore.WHITE}"
-            ]
+            # Choose a random menu style for this session
+            highlight_color = await self._draw_main_menu(random.choice(self.MENU_STYLES))
             
-            choice = input(random.choice(prompts))
+            # Get user choice with a randomized prompt
+            choice = await self._input(f"\n{highlight_color}{random.choice(MENU_PROMPTS)}{Fore.WHITE}")
             
             if choice == "1":
-                self.message_boards()
+                yield self.message_boards()
             elif choice == "2":
-                self.file_archives()
+                yield self.file_archives()
             elif choice == "3":
-                self.door_games()
+                yield self.door_games()
             elif choice == "4":
-                self.chat_with_sysop()
+                yield self.chat_with_sysop()
             elif choice == "5":
-                self.logoff()
+                await self.logoff()
                 break
             else:
-                print(f"{Fore.RED}Invalid option. Please try again.")
-                time.sleep(1)
+                await self._print(f"{Fore.RED}Invalid option. Please try again.")
+                await self._pause(1)
 
-    def _slow_print(self, text, delay=0.03, end="\n"):
-        """Print text slowly, character by character"""
-        for char in text:
-            print(char, end="", flush=True)
-            time.sleep(delay)
-        print(end=end)
+    async def _draw_main_menu(self, menu_style: str) -> str:
+        """Draw the main menu in one of MENU_STYLES with random colors, returning the color for its prompt"""
+        # Four different random colors
+        title_color, option_color, number_color, highlight_color = random.sample(MENU_COLORS, 4)
+        art = random.choice(MENU_ARTS) if menu_style == "ascii" else ""
+        await self._draw(MENU_TEMPLATES[menu_style], title=title_color, option=option_color,
+                         number=number_color, highlight=highlight_color, art=art)
+        return highlight_color
 
-    def message_boards(self):
+    async def message_boards(self):
         """Display and navigate message boards"""
-        os.system('cls' if os.name == 'nt' else 'clear')
-        print(f"{Fore.CYAN}{Style.BRIGHT}==== MESSAGE BOARDS ===={Style.RESET_ALL}")
-        
-        # Get BBS info to access board names
-        bbs_info = self._generate_bbs_info()
-        board_names = bbs_info["board_names"]
-        
-        # Display available boards
-        print(f"{Fore.GREEN}Available message boards:\n")
-        for i, board in enumerate(board_names, 1):
-            print(f"{Fore.WHITE}{i}. {Fore.YELLOW}{board}")
-        print(f"{Fore.WHITE}{len(board_names) + 1}. {Fore.YELLOW}Return to Main Menu")
-        
-        # Get user choice
-        try:
-            choice = int(input(f"\n{Fore.GREEN}Select a board: {Fore.WHITE}"))
+        while True:
+            await self._clear_screen()
+            await self._print(f"{Fore.CYAN}{Style.BRIGHT}==== MESSAGE BOARDS ===={Style.RESET_ALL}")
+            
+            # Boards come from the session's world
+            board_names = (await self.get_world()).board_names
+            
+            # Display available boards
+            await self._print(f"{Fore.GREEN}Available message boards:\n")
+            for i, board in enumerate(board_names, 1):
+                await self._print(f"{Fore.WHITE}{i}. {Fore.YELLOW}{board}")
+            await self._print(f"{Fore.WHITE}{len(board_names) + 1}. {Fore.YELLOW}Return to Main Menu")
+            
+            # Get user choice
+            try:
+                choice = int(await self._input(f"\n{Fore.GREEN}Select a board: {Fore.WHITE}"))
+            except ValueError:
+                await self._print(f"{Fore.RED}Please enter a number.")
+                await self._pause(1)
+                continue
+            
             if 1 <= choice <= len(board_names):
-                self.view_board(board_names[choice - 1])
+                yield self.view_board(board_names[choice - 1])
             elif choice == len(board_names) + 1:
                 return
             else:
-                print(f"{Fore.RED}Invalid choice.")
-                time.sleep(1)
-                self.message_boards()
-        except ValueError:
-            print(f"{Fore.RED}Please enter a number.")
-            time.sleep(1)
-            self.message_boards()
+                await self._print(f"{Fore.RED}Invalid choice.")
+                await self._pause(1)
 
-    def view_board(self, board_name):
+    async def view_board(self, board_name):
         """View messages in a specific board"""
-        # Generate messages for this board if we don't have any
-        if not hasattr(self, 'board_messages') or board_name not in self.board_messages:
-            self._generate_board_messages(board_name)
-        
-        messages = self.board_messages[board_name]
+        # Usually already prefetched while the caller was logging in; if not,
+        # each message is shown as soon as it has been generated
+        messages = await self._open_content("board", board_name, f"{Fore.YELLOW}Loading messages from {board_name}...")
+        if not messages.done and not await self._within_budget("board", messages.wait_for(1)):
+            messages = ContentProgress(await self._fallback_content("board", board_name), done=True)
         current_msg_idx = 0
         
-        while current_msg_idx < len(messages):
-            os.system('cls' if os.name == 'nt' else 'clear')
-            message = messages[current_msg_idx]
-            
-            # Display message header
-            print(f"{Fore.CYAN}{Style.BRIGHT}==== {board_name} ===={Style.RESET_ALL}")
-            print(f"{Fore.GREEN}{'=' * 60}")
-            print(f"{Fore.WHITE}Message: {Fore.YELLOW}#{current_msg_idx + 1} of {len(messages)}")
-            print(f"{Fore.WHITE}From: {Fore.MAGENTA}{message['author']}")
-            print(f"{Fore.WHITE}Date: {Fore.MAGENTA}{message['date']}")
-            print(f"{Fore.WHITE}Subject: {Fore.YELLOW}{message['subject']}")
-            print(f"{Fore.GREEN}{'=' * 60}")
+        while await messages.wait_for(current_msg_idx + 1):
+            await self._clear_screen()
+            message = messages.items[current_msg_idx]
+            # "+" while more messages are still on the way
+            total = f"{len(messages.items)}" if messages.done else f"{len(messages.items)}+"
             
-            # Display message content with word wrap
-            content_lines = self._wrap_text(message['content'], 60)
-            for line in content_lines:
-                print(f"{Fore.WHITE}{line}")
-            
-            print(f"{Fore.GREEN}{'=' * 60}")
-            print(f"{Fore.WHITE}N{Fore.GREEN}ext message, {Fore.WHITE}Q{Fore.GREEN}uit to board list")
+            # Display message header, content with word wrap, and commands
+            await self.screen.write(self._message_page(board_name, message, current_msg_idx + 1, total))
             
             # Get user choice
-            choice = input(f"\n{Fore.YELLOW}Command: {Fore.WHITE}").upper()
+            choice = (await self._input(f"\n{Fore.YELLOW}Command: {Fore.WHITE}")).upper()
             
             if choice == 'N':
                 current_msg_idx += 1
-                if current_msg_idx >= len(messages):
-                    print(f"{Fore.YELLOW}End of messages.")
-                    time.sleep(1.5)
+                if current_msg_idx >= len(messages.items) and not messages.done:
+                    await self._print(f"{Fore.YELLOW}Loading next message...")
+                if not await messages.wait_for(current_msg_idx + 1):
+                    await self._print(f"{Fore.YELLOW}End of messages.")
+                    await self._pause(1.5)
                     break
             elif choice == 'Q':
                 break
             else:
-                print(f"{Fore.RED}Invalid command.")
-                time.sleep(1)
-        
-        # Return to board list
-        self.message_boards()
-
-    def _generate_board_messages(self, board_name):
-        """Generate random messages for a board using Claude"""
-        if not hasattr(self, 'board_messages'):
-            self.board_messages = {}
-        
-        # Initialize empty list for this board
-        self.board_messages[board_name] = []
-        
-        # Number of messages to generate (3-7)
-        num_messages = random.randint(3, 7)
-        
-        print(f"{Fore.YELLOW}Loading messages from {board_name}...")
-        
-        # Generate author names for this board
-        authors = self._generate_random_authors(num_messages)
-        
-        # Generate dates (random dates in the past, format: MM-DD-YY)
-        years = list(range(85, 96))  # 1985-1995
-        months = list(range(1, 13))
-        days = list(range(1, 29))  # Simplified - not checking month length
-        
-        dates = []
-        for _ in range(num_messages):
-            date = f"{random.choice(months):02d}-{random.choice(days):02d}-{random.choice(years):02d}"
-            dates.append(date)
-        
-        # Sort dates to make them chronological (oldest first)
-        dates.sort()
-        
-        # Generate message content using Claude
-        try:
-            # Make the API call to Claude to generate all messages at once
-            message = claude.messages.create(
-                model="claude-3-haiku-20240307",
-                max_tokens=800,
-                temperature=1.0,
-                system="You are a creative writer generating content for a nostalgic BBS simulation set in the late 1980s/early 1990s. Create weird, zany, and funny messages that might appear on a message board. The style should be reminiscent of old adventure games like Maniac Mansion, Space Quest, or Zork - full of strange scenarios, paranormal phenomena, and quirky humor. Keep each message between 3-6 sentences.",
-                messages=[
-                    {
-                        "role": "user",
-                        "content": f"Generate {num_messages} bizarre, funny messages for a BBS board called '{board_name}'. Each message should include a subject line and content. The messages should be weird, zany, and in the style of old 80s adventure games like Maniac Mansion. Return the results as JSON with this format: [{{\"subject\": \"...\", \"content\": \"...\"}}, ...]. Make the content appropriately weird for this specific board topic."
-                    }
-                ]
-            )
-            
-            # Extract content and parse JSON
-            content = message.content[0].text
-            import json
-            import re
-            
-            # Try to find and parse JSON from the response
-            json_match = re.search(r'\[.*\]', content, re.DOTALL)
-            
-            if json_match:
-                json_str = json_match.group(0)
-                try:
-                    # Parse the JSON string
-                    message_data = json.loads(json_str)
-                    
-                    # Create message objects
-                    for i in range(min(len(message_data), num_messages)):
-                        msg = {
-                            'author': authors[i],
-                            'date': dates[i],
-                            'subject': message_data[i]['subject'],
-                            'content': message_data[i]['content']
-                        }
-                        self.board_messages[board_name].append(msg)
-                    
-                except (json.JSONDecodeError, ValueError) as e:
-                    print(f"{Fore.RED}Error parsing message data: {e}")
-                    self._generate_fallback_messages(board_name, num_messages, authors, dates)
-            else:
-                self._generate_fallback_messages(board_name, num_messages, authors, dates)
-                
-        except Exception as e:
-            print(f"{Fore.RED}Error generating messages: {e}")
-            self._generate_fallback_messages(board_name, num_messages, authors, dates)
-        
-        # If no messages were generated, use fallback
-        if len(self.board_messages[board_name]) == 0:
-            self._generate_fallback_messages(board_name, num_messages, authors, dates)
-            
-        time.sleep(1)  # Brief pause for "loading" effect
-
-    def _generate_fallback_messages(self, board_name, num_messages, authors, dates):
-        """Generate fallback messages if Claude API fails"""
-        fallback_messages = [
-            {
-                'subject': "Strange lights in the sky last night",
-                'content': "Did anyone else see those weird lights hovering over the old mill? They were pulsating green and purple, and I swear they followed me home. My toaster has been speaking in Latin ever since. Should I be concerned or just make more toast?"
-            },
-            {
-                'subject': "My computer is possessed",
-                'content': "Every time I try to download a file, my computer plays the theme from Knight Rider and the floppy drive ejects with incredible force. Yesterday it knocked over my Star Trek figurines and rearranged them in strange symbols. Has anyone experienced similar hardware issues?"
-            },
-            {
-                'subject': "Time travel paradox question",
-                'content': "So I accidentally stepped into a temporal vortex in my basement while looking for Christmas decorations. Now I've met my younger self and we're going bowling on Thursdays. Is this causing a paradox? Also, should I tell him about his future baldness or let him discover it naturally?"
-            },
-            {
-                'subject': "Need help with tentacle infestation",
-                'content': "After playing that new game I downloaded from the file section, purple tentacles started growing out of my keyboard. They seem to like Mountain Dew and have composed a sonnet. Any recommended cleaning solutions that won't offend their artistic sensibilities?"
-            },
-            {
-                'subject': "Secret government conspiracy",
-                'content': "I've intercepted secret communications that prove the mall food court is actually a front for alien intelligence gathering. The Orange Julius guy has three eyes under his hat, and the pretzels contain mind-control salt. Meet me behind the arcade if you want to know more."
-            },
-            {
-                'subject': "My dog learned BASIC programming",
-                'content': "I left my programming manual on the floor and now my Golden Retriever is writing code. His first program was just 'FETCH BALL' in an infinite loop, but he's getting better. Anyone know if there's a market for canine software developers? He works for treats."
-            },
-            {
-                'subject': "Haunted floppy disk",
-                'content': "I found an unmarked 5.25\" floppy at a garage sale. When I run it, it shows only a text adventure where all paths lead to a digital recreation of my own bedroom. Last night it printed 'BEHIND YOU' without being connected to a printer. Should I continue playing?"
-            }
-        ]
-        
-        for i in range(min(len(fallback_messages), num_messages)):
-            msg = {
-                'author': authors[i],
-                'date': dates[i],
-                'subject': fallback_messages[i]['subject'],
-                'content': fallback_messages[i]['content']
-            }
-            self.board_messages[board_name].append(msg)
-
-    def _generate_random_authors(self, count):
-        """Generate random BBS-style usernames for message authors"""
-        prefixes = ["Cyber", "Hack", "Pixel", "Digital", "Quantum", "Retro", "Rad", "Neon", "Disk", "Data", 
-                   "Modem", "Glitch", "Bit", "Byte", "Floppy", "Dial", "Logic", "Turbo", "Laser", "Vector"]
-        
-        suffixes = ["Master", "Wizard", "Kid", "Punk", "Surfer", "Slayer", "Runner", "Jockey", "Ninja", "Guru",
-                   "Lord", "Pirate", "Cowboy", "Phantom", "Ghost", "Warrior", "Wrangler", "Dude", "Hacker", "Phoenix"]
-        
-        numbers = ["", ""] + [str(random.randint(1, 99)) for _ in range(3)]  # 40% chance of having a number
-        
-        authors = []
-        for _ in range(count):
-            name = random.choice(prefixes) + random.choice(suffixes) + random.choice(numbers)
-            authors.append(name)
-        
-        return authors
+                await self._print(f"{Fore.RED}Invalid command.")
+                await self._pause(1)
 
     def _wrap_text(self, text, width):
         """Wrap text to a specified width"""
-        import textwrap
         return textwrap.wrap(text, width)
 
-    def file_archives(self):
+    @property
+    def text_width(self) -> int:
+        """Width of message and file description text: 60 columns on an 80-column screen"""
+        return max(20, self.term.columns * 3 // 4)
+
+    def _message_page(self, board_name, message, number, total) -> str:
+        """A message with its header and commands, rendered for the caller's screen"""
+        width = self.text_width
+
+        def render():
+            return (MESSAGE_TEMPLATE.render(board=board_name, number=number, total=total, author=message.author,
+                                            date=format_date(message.date), subject=message.subject,
+                                            rule="=" * width)
+                    + "".join(TEXT_LINE_TEMPLATE.render(line=line)
+                              for line in self._wrap_text(message.content, width))
+                    + MESSAGE_FOOTER_TEMPLATE.render(rule="=" * width))
+
+        return self.pages.page(message, (width, self.color_profile, board_name, number, total), render)
+
+    def _file_page(self, file, category) -> str:
+        """A file's details with its description and commands, rendered for the caller's screen"""
+        width = self.text_width
+
+        def render():
+            return (FILE_DETAILS_TEMPLATE.render(name=file.name, category=category, size=format_size(file.size),
+                                                 date=format_date(file.date), downloads=file.downloads,
+                                                 uploader=file.uploader, rule="=" * width, divider="-" * width)
+                    + "".join(TEXT_LINE_TEMPLATE.render(line=line)
+                              for line in self._wrap_text(file.description, width))
+                    + FILE_DETAILS_FOOTER_TEMPLATE.render(rule="=" * width))
+
+        # The download count goes up with every download
+        return self.pages.page(file, (width, self.color_profile, category, file.downloads), render)
+
+    async def file_archives(self):
         """Browse and download files from the BBS archives"""
-        # Get BBS info to access board names
-        bbs_info = self._generate_bbs_info()
+        # Categories come from the session's world
+        world = await self.get_world()
         
         # Main file archives menu
         while True:
-            os.system('cls' if os.name == 'nt' else 'clear')
-            print(f"{Fore.CYAN}{Style.BRIGHT}==== FILE ARCHIVES ===={Style.RESET_ALL}")
-            print(f"{Fore.GREEN}Available file categories:\n")
+            await self._clear_screen()
+            await self._print(f"{Fore.CYAN}{Style.BRIGHT}==== FILE ARCHIVES ===={Style.RESET_ALL}")
+            await self._print(f"{Fore.GREEN}Available file categories:\n")
             
             # Display categories based on board names plus a general category
-            categories = ["General Software"] + bbs_info["board_names"]
+            categories = world.file_areas
             
             for i, category in enumerate(categories, 1):
-                print(f"{Fore.WHITE}{i}. {Fore.YELLOW}{category}")
-            print(f"{Fore.WHITE}{len(categories) + 1}. {Fore.YELLOW}Return to Main Menu")
+                await self._print(f"{Fore.WHITE}{i}. {Fore.YELLOW}{category}")
+            await self._print(f"{Fore.WHITE}{len(categories) + 1}. {Fore.YELLOW}Return to Main Menu")
             
             # Get user choice
             try:
-                choice = input(f"\n{Fore.GREEN}Select a category: {Fore.WHITE}")
+                choice = await self._input(f"\n{Fore.GREEN}Select a category: {Fore.WHITE}")
                 if choice.strip().lower() == 'q':
                     break
                     
                 choice = int(choice)
                 if 1 <= choice <= len(categories):
-                    self.browse_files(categories[choice - 1])
+                    yield self.browse_files(categories[choice - 1])
                 elif choice == len(categories) + 1:
                     break
                 else:
-                    print(f"{Fore.RED}Invalid choice.")
-                    time.sleep(1)
+                    await self._print(f"{Fore.RED}Invalid choice.")
+                    await self._pause(1)
             except ValueError:
-                print(f"{Fore.RED}Please enter a number or Q to quit.")
-                time.sleep(1)
+                await self._print(f"{Fore.RED}Please enter a number or Q to quit.")
+                await self._pause(1)
 
-    def browse_files(self, category):
+    async def browse_files(self, category):
         """Browse files in a specific category"""
-        # Generate files for this category if we don't have any
-        if not hasattr(self, 'file_categories') or category not in self.file_categories:
-            self._generate_category_files(category)
-            
-        files = self.file_categories[category]
+        # Usually already prefetched while the caller was logging in; if not,
+        # the listing scrolls in as rows are generated
+        files = await self._open_content("files", category, f"{Fore.YELLOW}Loading file listings for {category}...")
+        if not files.done and not await self._within_budget("files", files.wait_for(1)):
+            files = ContentProgress(await self._fallback_content("files", category), done=True)
         
         while True:
-            os.system('cls' if os.name == 'nt' else 'clear')
-            print(f"{Fore.CYAN}{Style.BRIGHT}==== {category} Files ===={Style.RESET_ALL}")
-            print(f"{Fore.GREEN}{'=' * 60}")
-            
-            # Display file list with details
-            print(f"{Fore.WHITE}{'#':<3} {'Filename':<20} {'Size':<8} {'Date':<10} {'Downloads':<5}")
-            print(f"{Fore.GREEN}{'-' * 60}")
+            await self._clear_screen()
+            await self._draw(FILE_LIST_TEMPLATE, category=category)
             
-            for i, file in enumerate(files, 1):
-                print(f"{Fore.WHITE}{i:<3} {Fore.YELLOW}{file['name']:<20} {Fore.GREEN}{file['size']:<8} "
-                      f"{Fore.MAGENTA}{file['date']:<10} {Fore.CYAN}{file['downloads']:<5}")
+            # Display file list with details, adding rows as they arrive
+            shown = 0
+            while True:
+                await self.screen.write("".join(
+                    FILE_ROW_TEMPLATE.render(number=i, name=file.name, size=format_size(file.size),
+                                             date=format_date(file.date), downloads=file.downloads)
+                    for i, file in enumerate(files.items[shown:], shown + 1)))
+                shown = len(files.items)
+                if files.done:
+                    break
+                await self.screen.flush()
+                try:
+                    await asyncio.wait_for(files.wait_for(shown + 1), self.CONTENT_BUDGETS["files"])
+                except asyncio.TimeoutError:
+                    # The rest shows up the next time the list is drawn
+                    await self._print(f"{Fore.YELLOW}More files on the way...")
+                    break
             
-            print(f"{Fore.GREEN}{'=' * 60}")
-            print(f"{Fore.WHITE}Enter file number to view details, {Fore.WHITE}Q{Fore.GREEN} to return")
+            await self._draw(FILE_LIST_FOOTER_TEMPLATE)
             
             # Get user choice
-            choice = input(f"\n{Fore.YELLOW}Command: {Fore.WHITE}")
+            choice = await self._input(f"\n{Fore.YELLOW}Command: {Fore.WHITE}")
             
             if choice.upper() == 'Q':
                 break
                 
             try:
                 file_idx = int(choice) - 1
-                if 0 <= file_idx < len(files):
-                    self.view_file_details(files[file_idx], category)
+                if 0 <= file_idx < shown:
+                    yield self.view_file_details(files.items[file_idx], category)
                 else:
-                    print(f"{Fore.RED}Invalid file number.")
-                    time.sleep(1)
+                    await self._print(f"{Fore.RED}Invalid file number.")
+                    await self._pause(1)
             except ValueError:
-                print(f"{Fore.RED}Please enter a number or Q.")
-                time.sleep(1)
+                await self._print(f"{Fore.RED}Please enter a number or Q.")
+                await self._pause(1)
 
-    def view_file_details(self, file, category):
+    async def view_file_details(self, file, category):
         """View details for a specific file and option to download"""
         while True:
-            os.system('cls' if os.name == 'nt' else 'clear')
-            print(f"{Fore.CYAN}{Style.BRIGHT}==== File Details ===={Style.RESET_ALL}")
-            print(f"{Fore.GREEN}{'=' * 60}")
-            
-            # Display file details
-            print(f"{Fore.WHITE}Filename: {Fore.YELLOW}{file['name']}")
-            print(f"{Fore.WHITE}Category: {Fore.YELLOW}{category}")
-            print(f"{Fore.WHITE}Size: {Fore.GREEN}{file['size']}")
-            print(f"{Fore.WHITE}Uploaded: {Fore.MAGENTA}{file['date']}")
-            print(f"{Fore.WHITE}Downloads: {Fore.CYAN}{file['downloads']}")
-            print(f"{Fore.WHITE}Uploaded by: {Fore.MAGENTA}{file['uploader']}")
-            print(f"{Fore.GREEN}{'-' * 60}")
-            
-            # Display file description with word wrap
-            print(f"{Fore.WHITE}Description:")
-            description_lines = self._wrap_text(file['description'], 60)
-            for line in description_lines:
-                print(f"{Fore.WHITE}{line}")
-                
-            print(f"{Fore.GREEN}{'=' * 60}")
-            print(f"{Fore.WHITE}D{Fore.GREEN}ownload file, {Fore.WHITE}Q{Fore.GREEN}uit to file list")
+            await self._clear_screen()
+            # Display file details, description with word wrap, and commands
+            await self.screen.write(self._file_page(file, category))
             
             # Get user choice
-            choice = input(f"\n{Fore.YELLOW}Command: {Fore.WHITE}").upper()
+            choice = (await self._input(f"\n{Fore.YELLOW}Command: {Fore.WHITE}")).upper()
             
             if choice == 'D':
-                self.download_file(file)
+                yield self.download_file(file)
             elif choice == 'Q':
                 break
             else:
-                print(f"{Fore.RED}Invalid command.")
-                time.sleep(1)
+                await self._print(f"{Fore.RED}Invalid command.")
+                await self._pause(1)
 
-    def download_file(self, file):
+    async def download_file(self, file):
         """Simulate downloading a file"""
-        os.system('cls' if os.name == 'nt' else 'clear')
-        print(f"{Fore.CYAN}{Style.BRIGHT}==== Downloading File ===={Style.RESET_ALL}")
-        print(f"{Fore.GREEN}{'=' * 60}")
+        await self._clear_screen()
+        await self._draw(DOWNLOAD_TEMPLATE, name=file.name, size=format_size(file.size))
         
-        print(f"{Fore.WHITE}Downloading: {Fore.YELLOW}{file['name']}")
-        print(f"{Fore.WHITE}Size: {Fore.GREEN}{file['size']}")
-        
-        # Parse the size to simulate download time
-        size_value = float(file['size'].split()[0])
-        size_unit = file['size'].split()[1]
-        
-        # Adjust time based on size unit (KB, MB)
-        if size_unit == "KB":
-            total_chunks = int(size_value / 5) + 1  # 5KB chunks
+        # Download time follows the size as shown (KB, MB)
+        kb = file.size / 1024
+        if kb < 1024:
+            total_chunks = int(kb / 5) + 1  # 5KB chunks
         else:  # MB
-            total_chunks = int(size_value * 20) + 1  # More chunks for MB files
+            total_chunks = int(kb / 1024 * 20) + 1  # More chunks for MB files
             
         # Cap total chunks to reasonable range
         total_chunks = min(max(total_chunks, 5), 30)
         
         # Simulate download progress
-        print(f"{Fore.WHITE}Progress: ", end="")
+        await self._print(f"{Fore.WHITE}Progress: ", end="")
         for i in range(total_chunks):
             # Calculate progress percentage
             progress = int((i / total_chunks) * 100)
             
             # Simulate variable download speeds
             if random.random() < 0.2:  # 20% chance of slow chunk
-                time.sleep(0.3)
+                await self._pause(0.3)
             else:
-                time.sleep(0.1)
+                await self._pause(0.1)
                 
             # Show progress
-            print(f"{Fore.GREEN}▓", end="", flush=True)
+            await self._print(f"{Fore.GREEN}▓", end="")
             
             # Show percentage every few chunks
             if i % 5 == 0 or i == total_chunks - 1:
-                print(f" {progress}%", end="", flush=True)
+                await self._print(f" {progress}%", end="")
                 
-        print(f"\n{Fore.GREEN}Download complete!")
+        await self._print(f"\n{Fore.GREEN}Download complete!")
         
         # Update download counter
-        file['downloads'] += 1
-        
-        # Generate a random funny message about the download
-        download_messages = [
-            "Your digital contraband has been secured!",
-            "File successfully smuggled through the information superhighway!",
-            "Download complete! No viruses detected... probably.",
-            "Congratulations! You've just increased your nerd cred by +5 points!",
-            "File downloaded faster than a caffeinated squirrel!",
-            "Your bits have successfully traveled through time from 1992!",
-            "Warning: This file may contain rad 90s content!",
-            "File downloaded and authenticated with dial-up handshake!",
-            "Download verified by digital archaeologists!",
-            "File transfer complete! Please rewind before returning."
-        ]
-        
-        print(f"{Fore.YELLOW}{random.choice(download_messages)}")
-        input(f"\n{Fore.GREEN}Press Enter to continue...")
-
-    def _generate_category_files(self, category):
-        """Generate themed files for a category using Claude"""
-        if not hasattr(self, 'file_categories'):
-            self.file_categories = {}
-            
-        # Initialize empty list for this category
-        self.file_categories[category] = []
-        
-        # Number of files to generate (10-20)
-        num_files = random.randint(10, 20)
-        
-        print(f"{Fore.YELLOW}Loading file listings for {category}...")
-        
-        # Generate file details
-        
-        # 1. Generate random uploaders
-        uploaders = self._generate_random_authors(num_files)
-        
-        # 2. Generate random dates (format: MM-DD-YY)
-        years = list(range(85, 96))  # 1985-1995
-        months = list(range(1, 13))
-        days = list(range(1, 29))  # Simplified
-        
-        dates = []
-        for _ in range(num_files):
-            date = f"{random.choice(months):02d}-{random.choice(days):02d}-{random.choice(years):02d}"
-            dates.append(date)
-        
-        # Sort dates (older files first)
-        dates.sort()
-        
-        # 3. Random download counts (more for older files)
-        downloads = []
-        for i in range(num_files):
-            # Older files have more downloads (generally)
-            base_downloads = random.randint(0, 50)
-            age_factor = (num_files - i) / num_files  # 1.0 for oldest, near 0 for newest
-            download_count = int(base_downloads + (age_factor * random.randint(0, 150)))
-            downloads.append(download_count)
-        
-        try:
-            # Make API call to Claude to generate themed files
-            message = claude.messages.create(
-                model="claude-3-haiku-20240307",
-                max_tokens=1000,
-                temperature=1.0,
-                system="You are generating content for a nostalgic BBS file section from the late 1980s/early 1990s. Create weird, amusing, and period-appropriate file listings for downloading. Files should match the category theme and include typical file types from that era (.zip, .arj, .exe, .txt, .gif, .bmp, .com, etc.). Be creative and quirky but appropriate.",
-                messages=[
-                    {
-                        "role": "user",
-                        "content": f"Generate {num_files} file listings for a BBS file section called '{category}'. Each file should have a name (8.3 format preferred but not required) and a brief description. Make them weird, quirky, and appropriate for the late 80s/early 90s BBS era. The files should relate to the '{category}' theme. Return the results as JSON in this format: [{{\"name\": \"FILENAME.EXT\", \"description\": \"...\", \"size\": \"XXX KB or X.XX MB\"}}, ...]. Size should be 25KB-3MB range, mostly smaller files."
-                    }
-                ]
-            )
-            
-            # Extract content and parse JSON
-            content = message.content[0].text
-            import json
-            import re
-            
-            # Try to find and parse JSON from the response
-            json_match = re.search(r'\[.*\]', content, re.DOTALL)
-            
-            if json_match:
-                json_str = json_match.group(0)
-                try:
-                    # Parse the JSON string
-                    file_data = json.loads(json_str)
-                    
-                    # Create file objects
-                    for i in range(min(len(file_data), num_files)):
-                        # Make sure each file has required fields
-                        if all(field in file_data[i] for field in ["name", "description", "size"]):
-                            file_obj = {
-                                'name': file_data[i]['name'],
-                                'description': file_data[i]['description'],
-                                'size': file_data[i]['size'],
-                                'date': dates[i],
-                                'uploader': uploaders[i],
-                                'downloads': downloads[i]
-                            }
-                            self.file_categories[category].append(file_obj)
-                    
-                except (json.JSONDecodeError, ValueError) as e:
-                    print(f"{Fore.RED}Error parsing file data: {e}")
-                    self._generate_fallback_files(category, num_files, uploaders, dates, downloads)
-            else:
-                self._generate_fallback_files(category, num_files, uploaders, dates, downloads)
-                
-        except Exception as e:
-            print(f"{Fore.RED}Error generating files: {e}")
-            self._generate_fallback_files(category, num_files, uploaders, dates, downloads)
+        file.downloads += 1
         
-        # If no files were generated, use fallback
-        if len(self.file_categories[category]) == 0:
-            self._generate_fallback_files(category, num_files, uploaders, dates, downloads)
-            
-        time.sleep(1)  # Brief pause for "loading" effect
+        # Show a random funny message about the download
+        await self._print(f"{Fore.YELLOW}{random.choice(DOWNLOAD_MESSAGES)}")
+        await self._input(f"\n{Fore.GREEN}Press Enter to continue...")
 
-    def _generate_fallback_files(self, category, num_files, uploaders, dates, downloads):
-        """Generate fallback files if Claude API fails"""
-        # Generic file extensions
-        extensions = ["ZIP", "EXE", "COM", "TXT", "GIF", "BMP", "ARJ", "LZH", "WAV", "MOD", "ANS", "BAS"]
-        
-        # File sizes
-        sizes = ["12 KB", "45 KB", "128 KB", "256 KB", "512 KB", "785 KB", "1.2 MB", "2.1 MB"]
-        
-        # Generate generic files based on category
-        for i in range(num_files):
-            # Create a suitable filename for the category
-            words = category.split()
-            prefix = ''.join([word[0] for word in words])[:3].upper()
-            name = f"{prefix}{random.randint(1, 999)}.{random.choice(extensions)}"
+    async def door_games(self):
+        """Browse and attempt to play classic BBS door games"""
+        while True:
+            await self._clear_screen()
+            await self._print(f"{Fore.CYAN}{Style.BRIGHT}==== DOOR GAMES ===={Style.RESET_ALL}")
             
-            # Generic description based on file type
-            ext = name.split('.')[-1].upper()
+            # Generate a random game name, a new one each time round
+            game = self._generate_random_door_game()
             
-            if ext in ["ZIP", "ARJ", "LZH"]:
-                desc = f"Archive of {category.lower()} files and utilities."
-            elif ext in ["EXE", "COM"]:
-                desc = f"Executable program related to {category.lower()}. May require DOS."
-            elif ext == "TXT":
-                desc = f"Documentation or text file about {category.lower()}."
-            elif ext in ["GIF", "BMP"]:
-                desc = f"Image file showing {category.lower()} related graphics."
-            elif ext == "WAV":
-                desc = f"Sound file with {category.lower()} audio."
-            elif ext == "MOD":
-                desc = f"Tracker music module with cool {category.lower()} tunes."
-            elif ext == "ANS":
-                desc = f"ANSI art file depicting {category.lower()} scenes."
-            elif ext == "BAS":
-                desc = f"BASIC source code for a {category.lower()} utility."
-            else:
-                desc = f"File related to {category.lower()}. Download to find out more!"
-                
-            # Add the file
-            file_obj = {
-                'name': name,
-                'description': desc,
-                'size': random.choice(sizes),
-                'date': dates[i] if i < len(dates) else "01-01-91",
-                'uploader': uploaders[i] if i < len(uploaders) else "SysOp",
-                'downloads': downloads[i] if i < len(downloads) else random.randint(0, 100)
-            }
+            # Display game selection
+            await self._print(f"{Fore.GREEN}Available games:\n")
+            await self._print(f"{Fore.WHITE}1. {Fore.YELLOW}{game['name']}")
+            await self._print(f"{Fore.WHITE}2. {Fore.YELLOW}Return to Main Menu")
             
-            self.file_categories[category].append(file_obj)
-
-    def door_games(self):
-        """Browse and attempt to play classic BBS door games"""
-        os.system('cls' if os.name == 'nt' else 'clear')
-        print(f"{Fore.CYAN}{Style.BRIGHT}==== DOOR GAMES ===={Style.RESET_ALL}")
-        
-        # Generate a random game name
-        game = self._generate_random_door_game()
-        
-        # Display game selection
-        print(f"{Fore.GREEN}Available games:\n")
-        print(f"{Fore.WHITE}1. {Fore.YELLOW}{game['name']}")
-        print(f"{Fore.WHITE}2. {Fore.YELLOW}Return to Main Menu")
-        
-        # Get user choice
-        try:
-            choice = input(f"\n{Fore.GREEN}Select an option: {Fore.WHITE}")
+            # Get user choice
+            choice = await self._input(f"\n{Fore.GREEN}Select an option: {Fore.WHITE}")
             if choice == "1":
-                self._display_door_game(game)
+                yield self._display_door_game(game)
             elif choice == "2":
                 return
             else:
-                print(f"{Fore.RED}Invalid choice.")
-                time.sleep(1)
-                self.door_games()
-        except ValueError:
-            print(f"{Fore.RED}Please enter a number.")
-            time.sleep(1)
-            self.door_games()
+                await self._print(f"{Fore.RED}Invalid choice.")
+                await self._pause(1)
 
     def _generate_random_door_game(self):
         """Generate a random door game name and details"""
-        # Game name parts
-        prefixes = ["Cyber", "Galactic", "Mega", "Quantum", "Astro", "Neon", "Digital", 
-                   "Turbo", "Rad", "Techno", "Laser", "Pixel", "Retro", "Ultra", "Hyper"]
-        
-        main_words = ["Quest", "Warriors", "Battle", "Lords", "Dungeon", "Realm", "Maze", 
-                     "Empire", "Raiders", "Traders", "Command", "Arena", "Conquest", "Clash"]
-        
-        suffixes = ["II", "3000", "Master", "Online", "Pro", "Plus", "X", "Deluxe", "Adventure",
-                   "Challenge", "World", "Zone", "Championship"]
-        
-        # Generate a random game name
-        prefix = random.choice(prefixes)
-        main = random.choice(main_words)
-        
-        # 50% chance to add a suffix
-        if random.random() < 0.5:
-            suffix = " " + random.choice(suffixes)
-        else:
-            suffix = ""
-            
-        name = f"{prefix} {main}{suffix}"
-        
-        # Generate a year (1987-1993)
-        year = random.randint(1987, 1993)
-        
-        # Generate a fake company name
-        company_prefixes = ["Stellar", "Atomic", "Byte", "Razor", "Binary", "Digital", "Thunder", 
-                           "Lightning", "Silicon", "Mystic", "Radical", "Elite", "Omega"]
-        
-        company_suffixes = ["Software", "Games", "Interactive", "Systems", "Productions", 
-                           "Entertainment", "Computing", "Designs", "Studios"]
-        
-        company = f"{random.choice(company_prefixes)} {random.choice(company_suffixes)}"
-        
-        # Generate a tagline
-        taglines = [
-            "Enter the arena... if you dare!",
-            "The final frontier of online gaming!",
-            "Where legends are made!",
-            "Your reality just got virtual!",
-            "Challenge awaits the brave!",
-            "The ultimate test of skill!",
-            "Can you survive the digital onslaught?",
-            "Prepare for electronic combat!",
-            "Journey into the digital unknown!",
-            "Fame and fortune await the victorious!",
-            "The electronic battlefield beckons!",
-            "Are you elite enough?",
-            "Venture beyond the modem's call!"
-        ]
-        
-        return {
-            'name': name,
-            'year': year,
-            'company': company,
-            'tagline': random.choice(taglines)
-        }
+        return self.generator.engine.door_game()
 
-    def _display_door_game(self, game):
+    async def _display_door_game(self, game):
         """Display a door game title screen and then show out of order message"""
-        os.system('cls' if os.name == 'nt' else 'clear')
+        await self._clear_screen()
         
         # Random colors
-        colors = [Fore.CYAN, Fore.GREEN, Fore.YELLOW, Fore.MAGENTA, Fore.RED, Fore.BLUE, Fore.WHITE]
-        title_color = random.choice(colors)
-        accent_color = random.choice([c for c in colors if c != title_color])
+        title_color, accent_color = random.sample(SCREEN_COLORS, 2)
         
         # Generate ASCII art title
-        try:
-            fonts = ['big', 'block', 'bubble', 'digital', 'ivrit', 'banner']
-            font = random.choice(fonts)
-            title_art = pyfiglet.figlet_format(game['name'], font=font)
-        except Exception:
-            # Fallback
-            title_art = pyfiglet.figlet_format(game['name'], font='standard')
-        
-        # Display title screen
-        print(f"{title_color}{title_art}")
-        print(f"{accent_color}{'=' * 60}")
-        print(f"{Fore.WHITE}© {game['year']} {game['company']}")
-        print(f"{Fore.WHITE}All rights reserved")
-        print(f"{accent_color}{'=' * 60}")
-        
-        # Display tagline
-        print(f"{Fore.YELLOW}{Style.BRIGHT}{game['tagline']}{Style.RESET_ALL}\n")
-        
-        # Random ASCII art for the game
-        game_arts = [
-            r"""
-             _____
-            |     |
-            | ◢■◣ |
-            | ■■■ |
-            |_____|
-            /    /|
-           /____/ |
-           |____|/
-            """,
-            r"""
-                ╔═══╗
-               ╔╝███╚╗
-               ╚╗███╔╝
-                ╚═══╝
-             ╔═╗     ╔═╗
-             ║ ╚═════╝ ║
-             ╚═════════╝
-            """,
-            r"""
-              /\
-             /  \
-            |    |
-            |    |--O
-            |    |  |'-.__
-           _|    |__|     `-.
-          /               /\ `\
-          \_______________/  \__)
-            """,
-            r"""
-             .-------.
-            /   o   /|
-           /_______/ |
-           |       | |
-           |       | /
-           |       |/
-            """,
-            r"""
-                 /\
-                /  \
-               /    \
-              /      \
-             /        \
-            /__________\
-            \__________/
-            """,
-        ]
+        title_art = figlet_fonts.render(game['name'], random.choice(figlet_fonts.usable(DOOR_GAME_FONTS)))
         
-        print(f"{random.choice(colors)}{random.choice(game_arts)}")
+        # Display title screen, tagline and a random ASCII art for the game
+        await self._draw(DOOR_GAME_TEMPLATE, title_color=title_color, accent_color=accent_color, banner=title_art,
+                         year=game['year'], company=game['company'], tagline=game['tagline'],
+                         art_color=random.choice(SCREEN_COLORS), art=random.choice(DOOR_GAME_ARTS))
         
         # Loading animation
-        print(f"{Fore.WHITE}Loading game", end="")
+        await self._print(f"{Fore.WHITE}Loading game", end="")
         for _ in range(5):
-            time.sleep(0.5)
-            print(".", end="", flush=True)
-        print("\n")
+            await self._pause(0.5)
+            await self._print(".", end="")
+        await self._print("\n")
         
         # Out of order message
-        time.sleep(1.5)
-        print(f"{Fore.RED}{Style.BRIGHT}* * * SYSTEM ERROR * * *{Style.RESET_ALL}")
-        
-        # Random funny error messages
-        error_messages = [
-            "DOOR32.SYS not found. Did someone leave it open?",
-            "Error: Game requires 640K of RAM. Your system has only 638K available.",
-            "Fatal exception: CPU not radical enough for this gnarly game.",
-            "ALLOC: Memory fragmentation detected. Please defragment your brain and try again.",
-            "FOSSIL driver reports modem is too old for time travel functions.",
-            "ERROR: Required ANSI.SYS driver is on vacation until further notice.",
-            "CRITICAL: Failed to initialize the awesome-o-meter.",
-            "4913: Insufficient floppy disk capacity for storing high scores.",
-            "ERROR: SysOp unplugged the game to charge their Walkman.",
-            "VORTEX.DLL load failure: Please ensure your flux capacitor is properly connected."
-        ]
+        await self._pause(1.5)
+        await self._draw(DOOR_GAME_ERROR_TEMPLATE, error=random.choice(DOOR_GAME_ERRORS))
         
-        print(f"{Fore.RED}{random.choice(error_messages)}")
-        print(f"{Fore.YELLOW}\nThis door game is temporarily out of order.")
-        print(f"{Fore.YELLOW}The SysOp has been notified and promises to fix it")
-        print(f"{Fore.YELLOW}right after finishing this pizza and Mountain Dew.\n")
-        
-        input(f"{Fore.GREEN}Press Enter to return to the games menu...")
-        self.door_games()
+        await self._input(f"{Fore.GREEN}Press Enter to return to the games menu...")
 
-    def chat_with_sysop(self):
+    async def chat_with_sysop(self):
         """Chat with the quirky AI SysOp of the BBS"""
-        os.system('cls' if os.name == 'nt' else 'clear')
-        print(f"{Fore.CYAN}{Style.BRIGHT}==== CHAT WITH SYSOP ===={Style.RESET_ALL}")
-        print(f"{Fore.GREEN}{'=' * 60}")
+        await self._clear_screen()
+        await self._print(f"{Fore.CYAN}{Style.BRIGHT}==== CHAT WITH SYSOP ===={Style.RESET_ALL}")
+        await self._print(f"{Fore.GREEN}{'=' * 60}")
         
-        # Get BBS info to personalize the SysOp
-        bbs_info = self._generate_bbs_info()
-        sysop_name = bbs_info["sysop"]
-        bbs_name = bbs_info["name"]
+        # Use the session's world to personalize the SysOp
+        world = await self.get_world()
+        sysop_name = world.sysop
         
         # Initialize chat history
         chat_history = []
         
         # Add system message
-        system_message = self._generate_sysop_personality(bbs_info)
+        system = self._sysop_system(world)
         
         # Welcome message
-        print(f"{Fore.YELLOW}Establishing direct connection to SysOp terminal...")
-        time.sleep(1)
-        print(f"{Fore.GREEN}Connection established!")
-        time.sleep(0.5)
+        await self._print(f"{Fore.YELLOW}Establishing direct connection to SysOp terminal...")
+        await self._pause(1)
+        await self._print(f"{Fore.GREEN}Connection established!")
+        await self._pause(0.5)
         
         # Initial message from SysOp
-        initial_message = self._get_sysop_response(
-            system_message, 
+        initial_message = await self._get_sysop_response(
+            sysop_name,
+            system, 
             chat_history, 
             f"You are chatting with {self.user_name} who just connected to your BBS. Give them a weird, quirky greeting that shows your strange personality. Keep it to 2-3 sentences."
         )
         
-        self._display_sysop_message(sysop_name, initial_message)
         chat_history.append({"role": "assistant", "content": initial_message})
         
         # Chat loop
         while True:
             # Get user input
-            user_message = input(f"{Fore.GREEN}[{self.user_name}]: {Fore.WHITE}")
+            user_message = await self._input(f"{Fore.GREEN}[{self.user_name}]: {Fore.WHITE}")
             
             # Check for exit
             if user_message.lower() in ["bye", "goodbye", "exit", "quit"]:
@@ -1191,43 +4109,48 @@ class BBScapade:
             # Add user message to history
             chat_history.append({"role": "user", "content": user_message})
             
-            # Get SysOp response
-            print(f"{Fore.YELLOW}SysOp is typing", end="")
-            for _ in range(3):
-                time.sleep(0.3)
-                print(".", end="", flush=True)
-            print()
+            # Get SysOp response, shown as it streams in
+            await self._print(f"{Fore.YELLOW}SysOp is typing...")
             
-            sysop_response = self._get_sysop_response(system_message, chat_history)
-            self._display_sysop_message(sysop_name, sysop_response)
+            sysop_response = await self._get_sysop_response(sysop_name, system, chat_history)
             
             # Add SysOp response to history
             chat_history.append({"role": "assistant", "content": sysop_response})
         
         # Farewell message
-        farewell = self._get_sysop_response(
-            system_message,
+        await self._get_sysop_response(
+            sysop_name,
+            system,
             chat_history,
             f"The user {self.user_name} is leaving the chat. Give a strange farewell message that's true to your weird character. Keep it brief."
         )
+        await self._pause(1)
         
-        self._display_sysop_message(sysop_name, farewell)
-        time.sleep(1)
+        if self.chat_turns:
+            first_tokens = [turn.first_token for turn in self.chat_turns if turn.first_token is not None]
+            logger.info(
+                "Node %d: %d SysOp replies, mean first token %.2fs, mean total %.2fs",
+                self.node,
+                len(self.chat_turns),
+                sum(first_tokens) / len(first_tokens) if first_tokens else 0.0,
+                sum(turn.total for turn in self.chat_turns) / len(self.chat_turns)
+            )
+            logger.info("Node %d: prompt cache %s", self.node, self.cache_stats.summary())
         
-        print(f"{Fore.YELLOW}\nDisconnecting from SysOp terminal...")
-        time.sleep(1)
-        print(f"{Fore.RED}Connection terminated.")
-        time.sleep(0.5)
+        await self._print(f"{Fore.YELLOW}\nDisconnecting from SysOp terminal...")
+        await self._pause(1)
+        await self._print(f"{Fore.RED}Connection terminated.")
+        await self._pause(0.5)
         
-        input(f"{Fore.GREEN}Press Enter to return to main menu...")
+        await self._input(f"{Fore.GREEN}Press Enter to return to main menu...")
 
-    def _generate_sysop_personality(self, bbs_info):
+    def _generate_sysop_personality(self, world: World):
         """Generate a unique, weird personality for the SysOp based on BBS info"""
         # Extract info from the BBS
-        sysop_name = bbs_info["sysop"]
-        bbs_name = bbs_info["name"]
-        tagline = bbs_info["tagline"]
-        boards = ", ".join(bbs_info["board_names"])
+        sysop_name = world.sysop
+        bbs_name = world.name
+        tagline = world.tagline
+        boards = ", ".join(world.board_names)
         
         # Generate random quirks
         speech_quirks = [
@@ -1297,97 +4220,410 @@ class BBScapade:
         
         return system_prompt
 
-    def _get_sysop_response(self, system_message, chat_history, override_message=None):
-        """Get a response from the SysOp using Claude"""
+    # Claude 3 Haiku caches no prompt prefix shorter than this many tokens
+    CACHE_MIN_TOKENS = 2048
+
+    def _sysop_system(self, world: World) -> List[Dict[str, Any]]:
+        """The SysOp's system prompt for a chat, identical on every turn.
+
+        The persona is usually a few hundred tokens, too short for Claude to
+        cache, so it only gets a cache breakpoint of its own if it is long
+        enough; otherwise the chat history's breakpoint caches it along with
+        the conversation once that is.
+        """
+        system = [{"type": "text", "text": self._generate_sysop_personality(world)}]
+        if estimate_tokens({"system": system}) >= self.CACHE_MIN_TOKENS:
+            system[0]["cache_control"] = {"type": "ephemeral"}
+        return system
+
+    # How long the SysOp may take to start typing before a canned reply is
+    # used instead
+    CHAT_BUDGET = 5.0
+
+    async def _get_sysop_response(self, sysop_name, system, chat_history, override_message=None):
+        """Stream a response from the SysOp to the caller as Claude writes it and return its text.
+
+        `system` is the chat's system prompt from _sysop_system.
+        """
+        messages = self._build_chat_messages(chat_history, override_message)
+        
+        # Random color for this message
+        colors = [Fore.CYAN, Fore.GREEN, Fore.YELLOW, Fore.MAGENTA, Fore.RED, Fore.BLUE]
+        await self.screen.write(f"{random.choice(colors)}[{sysop_name}]: {Fore.WHITE}")
+        await self.screen.flush()
+        
+        if self.generator.offline:
+            # No Claude: the SysOp rambles procedurally
+            response = self.generator.engine.sysop_reply()
+            async with BaudRenderer(self.screen) as renderer:
+                renderer.feed(response)
+            await self._print()
+            return response
+        
+        started = time.monotonic()
+        first_token = None
+        parts = []
+        usage = (0, 0, 0)
+        request = dict(
+            model="claude-3-haiku-20240307",
+            max_tokens=300,
+            temperature=0.9,
+            system=system,
+            messages=messages
+        )
+        
+        typing = asyncio.Event()
+        
+        async def stream_reply():
+            nonlocal first_token
+            try:
+                async with self.generator.client.messages.stream(**request) as stream:
+                    async for text in stream.text_stream:
+                        if first_token is None:
+                            first_token = time.monotonic() - started
+                            typing.set()
+                        parts.append(text)
+                        renderer.feed(text)
+                    return await stream.get_final_message()
+            except Exception as e:
+                # Once text is on the caller's screen a retry would repeat
+                # it, so keep what made it through
+                if not parts:
+                    raise
+                logger.warning("SysOp response stream broke: %s", e)
+                return None
+        
         try:
-            # Prepare the messages
-            messages = []
-            
-            # Add chat history (limit to last 10 exchanges to save tokens)
-            for msg in chat_history[-10:]:
-                messages.append(msg)
-                
-            # Add override message if provided
-            if override_message:
-                messages.append({"role": "user", "content": override_message})
-                
-            # Make API call to Claude
-            response = claude.messages.create(
-                model="claude-3-haiku-20240307",
-                max_tokens=300,
-                temperature=0.9,
-                system=system_message,
-                messages=messages
-            )
-            
-            return response.content[0].text
+            # Interactive priority: goes ahead of any queued content generation
+            async with BaudRenderer(self.screen) as renderer:
+                reply = asyncio.ensure_future(self.generator.dispatcher.call(
+                    stream_reply,
+                    Priority.INTERACTIVE,
+                    estimate_tokens(request)
+                ))
+                started_typing = asyncio.ensure_future(typing.wait())
+                try:
+                    done, _ = await asyncio.wait({reply, started_typing}, timeout=self.CHAT_BUDGET,
+                                                 return_when=asyncio.FIRST_COMPLETED)
+                    if not done:
+                        self.fallbacks_served += 1
+                        raise asyncio.TimeoutError(f"no reply within {self.CHAT_BUDGET:.1f}s")
+                    final = await reply
+                finally:
+                    started_typing.cancel()
+                    reply.cancel()
+            if final is not None:
+                usage = self.cache_stats.record(final.usage)
             
+        except CallerDisconnected:
+            raise
         except Exception as e:
-            # Fallback responses if the API fails
-            print(f"{Fore.RED}Error getting SysOp response: {e}")
+            logger.warning("Error getting SysOp response: %s", e)
             
-            fallback_responses = [
-                "KZZZT! *The terminal flickers* Sorry about that... cosmic rays interfering with the mainframe again! What were we talking about?",
-                "Hang on... gotta recalibrate my brain-to-BBS interface... *makes strange typing noises* Ok I'm back!",
-                "ERROR 42: SysOp brain buffer overflow! Rebooting consciousness... *strange humming noise* I'm functional again!",
-                "BLEEP! Sorry, my pet lizard Pixel just knocked over my stack of floppy disks. What a MESS! Anyway...",
-                "*distant dial-up modem sounds* Sorry, the aliens were trying to download my thoughts again. I installed better firewalls in my tinfoil hat.",
-                "ZzZt! The government almost traced this connection! Had to bounce the signal through my microwave. ANYWAY, what's new in your sector?",
-                "Had to pause to drink some CYBER-COLA to keep my systems operational! The caffeine helps my neurons connect to the digital realm!",
-                "Whoa! My mechanical keyboard just started typing by itself again. I think it's trying to communicate with me. Not now, keyboard!"
-            ]
+            if not parts:
+                fallback = self._fallback_sysop_response()
+                async with BaudRenderer(self.screen) as renderer:
+                    renderer.feed(fallback)
+                parts.append(fallback)
+        
+        await self._print()
+        
+        total = time.monotonic() - started
+        response = "".join(parts)
+        self.chat_turns.append(ChatTurn(first_token, total, len(response), *usage))
+        logger.info(
+            "Node %d: SysOp reply first token %s, total %.2fs, %d chars, "
+            "input tokens %d uncached / %d cache read / %d cache write",
+            self.node,
+            f"{first_token:.2f}s" if first_token is not None else "n/a",
+            total,
+            len(response),
+            *usage
+        )
+        return response
+
+    # Chat history is trimmed in steps of this many messages, so the prefix
+    # sent to Claude stays byte-identical (and cacheable) between trims
+    HISTORY_WINDOW = 10
+
+    def _build_chat_messages(self, chat_history, override_message=None):
+        """Build the messages for a SysOp call with a cache breakpoint on the history"""
+        # Keep between HISTORY_WINDOW and 2 * HISTORY_WINDOW - 1 recent messages.
+        # A plain sliding window would change the first message on every turn
+        # and invalidate the cache each time.
+        start = max(0, len(chat_history) - len(chat_history) % self.HISTORY_WINDOW - self.HISTORY_WINDOW)
+        messages = [{"role": msg["role"], "content": msg["content"]} for msg in chat_history[start:]]
+        
+        # Mark the end of the conversation so far; the next turn reads
+        # everything up to here back from the cache. One-off instructions
+        # (greeting, farewell) stay after the breakpoint.
+        if messages:
+            last = messages[-1]
+            last["content"] = [{"type": "text", "text": last["content"], "cache_control": {"type": "ephemeral"}}]
             
-            return random.choice(fallback_responses)
+        # Add override message if provided
+        if override_message:
+            messages.append({"role": "user", "content": override_message})
+        
+        return messages
 
-    def _display_sysop_message(self, sysop_name, message):
-        """Display a message from the SysOp with formatting"""
-        # Random color for this message
-        colors = [Fore.CYAN, Fore.GREEN, Fore.YELLOW, Fore.MAGENTA, Fore.RED, Fore.BLUE]
-        color = random.choice(colors)
+    def _fallback_sysop_response(self):
+        """Pick a canned SysOp line for when the API fails"""
+        fallback_responses = [
+            "KZZZT! *The terminal flickers* Sorry about that... cosmic rays interfering with the mainframe again! What were we talking about?",
+            "Hang on... gotta recalibrate my brain-to-BBS interface... *makes strange typing noises* Ok I'm back!",
+            "ERROR 42: SysOp brain buffer overflow! Rebooting consciousness... *strange humming noise* I'm functional again!",
+            "BLEEP! Sorry, my pet lizard Pixel just knocked over my stack of floppy disks. What a MESS! Anyway...",
+            "*distant dial-up modem sounds* Sorry, the aliens were trying to download my thoughts again. I installed better firewalls in my tinfoil hat.",
+            "ZzZt! The government almost traced this connection! Had to bounce the signal through my microwave. ANYWAY, what's new in your sector?",
+            "Had to pause to drink some CYBER-COLA to keep my systems operational! The caffeine helps my neurons connect to the digital realm!",
+            "Whoa! My mechanical keyboard just started typing by itself again. I think it's trying to communicate with me. Not now, keyboard!"
+        ]
         
-        # Display the message
-        print(f"{color}[{sysop_name}]: {Fore.WHITE}{message}")
+        return random.choice(fallback_responses)
 
-    def logoff(self):
+    async def logoff(self):
         """Log off from the BBS"""
-        os.system('cls' if os.name == 'nt' else 'clear')
-        print(f"{Fore.CYAN}Logging off from BBScapade...")
-        time.sleep(1)
-        print(f"{Fore.GREEN}Thank you for visiting BBScapade!")
-        print(f"{Fore.GREEN}Call back anytime for a new BBS experience!")
-        print()
-        print(f"{Fore.YELLOW}NO CARRIER")
+        await self._clear_screen()
+        await self._print(f"{Fore.CYAN}Logging off from BBScapade...")
+        await self._pause(1)
+        await self._print(f"{Fore.GREEN}Thank you for visiting BBScapade!")
+        await self._print(f"{Fore.GREEN}Call back anytime for a new BBS experience!")
+        if self.store and self.world and self.term.local:
+            await self._print(f"{Fore.GREEN}Or dial this one again with: {Fore.WHITE}--world {self.world.id}")
+        await self._print()
+        await self._print(f"{Fore.YELLOW}NO CARRIER")
         self.logged_in = False
+        
+        # One world per session: 1 generated, or 0 when it came from the
+        # pool or the store, plus one for each time it was invalidated
+        if self.world_generations > 1 + self.world_invalidations:
+            logger.warning("Node %d: world generated %d times in one session", self.node, self.world_generations)
+        else:
+            logger.info("Node %d: world generations %d, invalidations %d",
+                        self.node, self.world_generations, self.world_invalidations)
+        if self.cache_stats.calls:
+            logger.info("Node %d: session prompt cache %s", self.node, self.cache_stats.summary())
+        logger.info("Node %d: content requests %s", self.node, self.generator.flights.summary())
+        logger.info("Node %d: structured output %s", self.node, self.generator.stats.summary())
+        if self.fallbacks_served:
+            logger.info("Node %d: %d screens fell back after their latency budget", self.node, self.fallbacks_served)
+        logger.info("Node %d: API dispatcher %s", self.node, self.generator.dispatcher.summary())
+        logger.info("Node %d: ANSI output %s", self.node, self.screen.ansi.summary())
+        logger.info("Node %d: pages %s at %dx%d", self.node, self.pages.summary(), self.term.columns, self.term.rows)
 
-    def run(self):
+    async def run(self):
         """Main application flow"""
+        self.prefetcher = Prefetcher(self)
+
         try:
-            # Setup signal handler for clean exit
-            signal.signal(signal.SIGINT, self._handle_exit)
+            # Generate the world once, in the background while the modem
+            # screeches; boards and file areas are prefetched as soon as it
+            # exists. Every screen after this reuses it.
+            self._start_world()
             
-            # Play dialup sound
-            self.play_dialup_sound()
+            # Dial in, for as long as that takes
+            await self.connect()
             
             # Show welcome screen
-            self.display_welcome_screen()
+            await self.display_welcome_screen()
             
             # Show login screen
-            self.login_screen()
+            await self.login_screen()
             
-            # Show main menu
-            self.main_menu()
+            # Show main menu, and every screen the caller goes to from there
+            await self.navigate(self.main_menu())
+            await self.screen.flush(settle=True)
             
+        except CallerDisconnected:
+            raise
         except Exception as e:
-            print(f"{Fore.RED}An error occurred: {e}")
-            sys.exit(1)
+            await self._print(f"{Fore.RED}An error occurred: {e}")
+            await self.screen.flush(settle=True)
+            raise
+        finally:
+            self.prefetcher.cancel()
+
+
+def _handle_exit(sig, frame):
+    """Handle exit signals gracefully"""
+    print(f"\n{Fore.YELLOW}Disconnecting from BBScapade...")
+    print(f"{Fore.YELLOW}NO CARRIER{Style.RESET_ALL}")
+    sys.exit(0)
+
+
+class BBSServer:
+    """Multi-node telnet server running one BBScapade session per caller"""
+
+    def __init__(self, host: str = "0.0.0.0", port: int = 2323, max_nodes: int = 250, baud: int = 2400,
+                 generator: Optional[ContentGenerator] = None, pool: Optional[WorldPool] = None,
+                 store: Optional[ContentStore] = None, world_id: Optional[str] = None,
+                 clock: Optional[Clock] = None):
+        self.host = host
+        self.port = port
+        self.max_nodes = max_nodes
+        self.baud = baud
+        self.nodes_in_use = set()
+
+        # Shared by every session
+        self.generator = generator or ContentGenerator()
+        self.pool = pool
+        self.store = store
+        self.clock = clock or Clock.real()
+
+        # When set, every caller dials the same stored world
+        self.world_id = world_id
+
+    def _allocate_node(self) -> Optional[int]:
+        """Take the lowest free node number, or None if the BBS is full"""
+        for node in range(1, self.max_nodes + 1):
+            if node not in self.nodes_in_use:
+                self.nodes_in_use.add(node)
+                return node
+        return None
+
+    async def handle_caller(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Run a full BBS session for one telnet connection"""
+        terminal = TelnetTerminal(reader, writer)
+        peer = writer.get_extra_info("peername")
+        node = self._allocate_node()
+
+        if node is None:
+            logger.warning("Rejecting %s: all %d nodes busy", peer, self.max_nodes)
+            try:
+                await terminal.write(f"{Fore.RED}All nodes are busy. Try again later!{Style.RESET_ALL}\nNO CARRIER\n")
+            except CallerDisconnected:
+                pass
+            await terminal.close()
+            return
+
+        logger.info("Node %d: connect from %s", node, peer)
+        terminal.negotiate()
+        try:
+            session = BBScapade(terminal, node=node, baud=self.baud, generator=self.generator,
+                                pool=self.pool, store=self.store, world_id=self.world_id, clock=self.clock)
+            await session.run()
+        except CallerDisconnected:
+            logger.info("Node %d: caller dropped carrier", node)
+        except Exception:
+            logger.exception("Node %d: session crashed", node)
+        finally:
+            self.nodes_in_use.discard(node)
+            await terminal.close()
+            logger.info("Node %d: disconnected", node)
+
+    async def serve_forever(self):
+        """Accept callers until cancelled"""
+        server = await asyncio.start_server(self.handle_caller, self.host, self.port)
+        addresses = ", ".join(str(sock.getsockname()) for sock in server.sockets)
+        logger.info("BBScapade listening on %s", addresses)
+        refill = asyncio.ensure_future(self.pool.run()) if self.pool else None
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            if refill:
+                refill.cancel()
+
+
+async def run_local(session: BBScapade, pool: Optional[WorldPool] = None):
+    """Run a single local session, topping up the world pool in the background"""
+    refill = asyncio.ensure_future(pool.run()) if pool else None
+    try:
+        await session.run()
+    finally:
+        if refill:
+            refill.cancel()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="BBScapade - An AI-powered BBS nostalgia experience")
+    parser.add_argument("--serve", action="store_true", help="run as a multi-node telnet server")
+    parser.add_argument("--host", default="0.0.0.0", help="address to listen on in server mode")
+    parser.add_argument("--port", type=int, default=2323, help="port to listen on in server mode")
+    parser.add_argument("--max-nodes", type=int, default=250, help="maximum simultaneous callers in server mode")
+    parser.add_argument("--baud", type=int, default=2400, help="modem speed every screen is sent at (300-57600)")
+    parser.add_argument("--verbose", action="store_true", help="log timings and errors to stderr")
+    parser.add_argument("--pool-dir", default=os.path.join("cache", "worlds"),
+                        help="directory holding pre-generated worlds")
+    parser.add_argument("--pool-depth", type=int, default=0,
+                        help="number of ready worlds to keep in the pool (0 disables the pool)")
+    parser.add_argument("--pool-concurrency", type=int, default=2,
+                        help="worlds generated at once while refilling the pool")
+    parser.add_argument("--pool-max-age", type=float, default=24 * 3600,
+                        help="seconds before a pooled world is thrown away")
+    parser.add_argument("--store", default=os.path.join("cache", "content.db"),
+                        help="SQLite file caching generated content across sessions ('' disables it)")
+    parser.add_argument("--store-max-mb", type=float, default=256, help="size limit of the content store")
+    parser.add_argument("--store-max-age-days", type=float, default=30,
+                        help="days before unused stored content is evicted")
+    parser.add_argument("--world", help="id of a stored world to dial instead of a new one")
+    parser.add_argument("--rpm", type=int, default=50, help="Claude API requests per minute across all callers")
+    parser.add_argument("--tpm", type=int, default=50000, help="Claude API tokens per minute across all callers")
+    parser.add_argument("--max-in-flight", type=int, default=16, help="Claude API requests running at once")
+    parser.add_argument("--offline", action="store_true",
+                        help="Generate everything locally and never call Claude (no API key needed)")
+    parser.add_argument("--speed", type=float, default=1.0,
+                        help="run typing effects and pauses this many times faster (0 skips them)")
+    parser.add_argument("--turbo", action="store_true", help="skip every typing effect and pause, same as --speed 0")
+    args = parser.parse_args()
+    if not 300 <= args.baud <= 57600:
+        parser.error("--baud must be between 300 and 57600")
+
+    # Load environment variables from .env file
+    from dotenv import load_dotenv
+    load_dotenv()
+
+    if not args.offline and not os.getenv("CLAUDE_API_KEY"):
+        print(f"{Fore.RED}Error: CLAUDE_API_KEY not found in environment variables.")
+        print(f"{Fore.YELLOW}Please create a .env file with your API key or set it in your environment.")
+        print(f"{Fore.YELLOW}Running offline for now.{Style.RESET_ALL}")
+        args.offline = True
+    if not args.offline:
+        # Import the SDK in the background while the first screens draw, so
+        # the first API call doesn't have to
+        threading.Thread(target=importlib.import_module, args=("anthropic",), daemon=True).start()
+
+    clock = Clock.zero() if args.turbo else Clock.scaled(args.speed)
+    generator = ContentGenerator(dispatcher=ApiDispatcher(args.rpm, args.tpm, args.max_in_flight),
+                                 offline=args.offline)
+    store = None
+    if args.store:
+        store = ContentStore(args.store, int(args.store_max_mb * 1024 * 1024), args.store_max_age_days * 24 * 3600)
+    pool = None
+    if args.pool_depth > 0:
+        pool = WorldPool(generator, args.pool_dir, args.pool_depth, args.pool_concurrency, args.pool_max_age)
+
+    if args.serve or args.verbose:
+        logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+    # Parse the figlet fonts before the first welcome screen needs one
+    threading.Thread(target=figlet_fonts.preload, daemon=True).start()
+
+    if args.serve:
+        try:
+            server = BBSServer(args.host, args.port, args.max_nodes, args.baud, generator, pool, store, args.world,
+                               clock)
+            asyncio.run(server.serve_forever())
+        except KeyboardInterrupt:
+            pass
+        return
+
+    # Setup signal handler for clean exit
+    signal.signal(signal.SIGINT, _handle_exit)
+
+    # Decode the dialup sound while the session starts up
+    threading.Thread(target=DialupSound.preload, daemon=True).start()
 
-    def _handle_exit(self, sig, frame):
-        """Handle exit signals gracefully"""
-        print(f"\n{Fore.YELLOW}Disconnecting from BBScapade...")
-        print(f"{Fore.YELLOW}NO CARRIER")
-        sys.exit(0)
+    try:
+        session = BBScapade(baud=args.baud, generator=generator, pool=pool, store=store, world_id=args.world,
+                            clock=clock)
+        asyncio.run(run_local(session, pool))
+    except CallerDisconnected:
+        _handle_exit(None, None)
+    except Exception:
+        sys.exit(1)
 
 
 if __name__ == "__main__":
-    bbs = BBScapade()
-    bbs.run()
\ No newline at end of file
+    main()
\ No newline at end of file
@@ -0,0 +1,821 @@
+#!/usr/bin/env python3
+"""Benchmarks for BBScapade.
+
+    python bench.py procedural [--boards 1000]
+    python bench.py startup [--runs 5] [--target-ms 500]
+    python bench.py frames [--rounds 50]
+    python bench.py banners [--screens 1000]
+    python bench.py ansi [--draws 20]
+    python bench.py templates [--renders 20000]
+    python bench.py soak [--navigations 100000]
+    python bench.py memory [--boards 10000] [--messages 1000000]
+    python bench.py structured [--requests 20]
+    python bench.py chat [--turns 8]
+
+procedural: time the local procedural engine per world, board and file area.
+startup: import-time breakdown of bbscapade, and time from process start to
+the welcome screen of an offline session, against a target.
+frames: cost of drawing a screen (time, writes, bytes) over a scripted walk
+through the message boards, and the cost of clearing the local console.
+banners: figlet banners drawn with pyfiglet.figlet_format against the font
+registry and banner cache, and the cost of a warm welcome screen.
+ansi: bytes per screen as written and as sent after the ANSI minimizer, for
+every main menu style and content screen.
+templates: renders per second of every precompiled screen template, and of
+building each main menu style and the welcome screen in a session.
+soak: a scripted caller going round every screen of the BBS, with the
+memory in use and the depth of the call stack sampled as it goes.
+memory: memory held by a large set of boards, with each message kept as a
+dict (as earlier releases did), as a Message record and in MessageColumns.
+structured: parse failure and retry rates of BBS info and board messages
+asked for as JSON in free text (as earlier releases did) and through forced
+tool calls. Makes live API calls, so needs CLAUDE_API_KEY.
+chat: size of the SysOp's system prompt against the smallest prefix Claude
+will cache and, with CLAUDE_API_KEY set, the cache reads and writes of each
+turn of a scripted chat.
+"""
+
+import argparse
+import asyncio
+import contextlib
+import itertools
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def _report(label, samples):
+    """Print mean / p50 / p95 / max of a list of durations in seconds, in microseconds"""
+    ordered = sorted(samples)
+    p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+    print(f"  {label:<22} mean {statistics.mean(samples) * 1e6:8.1f} us   "
+          f"p50 {ordered[len(ordered) // 2] * 1e6:8.1f} us   "
+          f"p95 {p95 * 1e6:8.1f} us   max {ordered[-1] * 1e6:8.1f} us")
+
+
+def bench_procedural(args):
+    import bbscapade
+
+    started = time.perf_counter()
+    engine = bbscapade.ProceduralEngine(seed=args.seed)
+    print(f"Corpus loaded and chain trained in {(time.perf_counter() - started) * 1000:.1f} ms "
+          f"({len(engine.chain.starts)} sentences, {len(engine.chain.transitions)} states)")
+
+    day = bbscapade.parse_date("01-01-91")
+    worlds, boards, areas = [], [], []
+    for _ in range(args.boards):
+        started = time.perf_counter()
+        world = engine.world_info()
+        worlds.append(time.perf_counter() - started)
+
+        # One board of 3-7 messages and one file area of 10-20 files, as the
+        # generator would ask for them
+        board = world["board_names"][0]
+        count = engine.random.randint(3, 7)
+        authors = engine.authors(count)
+        started = time.perf_counter()
+        engine.messages(board, authors, [day] * count)
+        boards.append(time.perf_counter() - started)
+
+        count = engine.random.randint(10, 20)
+        uploaders = engine.authors(count)
+        started = time.perf_counter()
+        engine.files(board, uploaders, [day] * count, [0] * count)
+        areas.append(time.perf_counter() - started)
+
+    print(f"Procedural generation over {args.boards} iterations:")
+    _report("world", worlds)
+    _report("board (3-7 messages)", boards)
+    _report("file area (10-20)", areas)
+
+
+def _import_breakdown():
+    """Cumulative microseconds for bbscapade, and (module, microseconds) for each module it imports directly"""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", "import bbscapade"],
+                            cwd=HERE, capture_output=True, text=True, check=True)
+    direct = []
+    for line in result.stderr.splitlines():
+        _, cumulative, name = line.split("|")
+        if not cumulative.strip().isdigit():
+            continue  # the header line
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        if depth == 0:
+            if name.strip() == "bbscapade":
+                return int(cumulative), sorted(direct, key=lambda row: -row[1])
+            # Something imported at interpreter startup, not by us
+            direct = []
+        elif depth == 1:
+            direct.append((name.strip(), int(cumulative)))
+    raise RuntimeError("bbscapade missing from -X importtime output")
+
+
+class _CaptureTerminal:
+    """Terminal that counts what is written, for timing screens without a
+    caller, and passes it on to `console` if there is one. Lines read come
+    from `script`, and the caller hangs up at its end."""
+
+    local = False
+    columns = 80
+    rows = 24
+
+    def __init__(self, script=(), console=None):
+        self.console = console
+        self.written = 0
+        self.writes = 0
+        self.reads = 0
+        self.script = list(script)
+        # When the first line was asked for: everything before is start-up
+        self.first_read = None
+
+    async def write(self, text):
+        self.written += len(text)
+        self.writes += 1
+        if self.console:
+            await self.console.write(text)
+
+    async def readline(self):
+        import bbscapade
+        if self.first_read is None:
+            self.first_read = (time.perf_counter(), self.writes, self.written)
+        if self.reads >= len(self.script):
+            raise bbscapade.CallerDisconnected()
+        self.reads += 1
+        return self.script[self.reads - 1]
+
+    async def clear(self):
+        if self.console:
+            await self.console.clear()
+
+    async def close(self):
+        pass
+
+
+class _ScreenMeter(_CaptureTerminal):
+    """Scripted terminal recording, for each screen, the bytes the session
+    wrote and the bytes sent after ANSI minimizing. A screen ends where a
+    line is read; `script` holds (screen name, line typed) pairs."""
+
+    def __init__(self, script):
+        super().__init__([line for _, line in script])
+        self.names = [name for name, _ in script]
+        self.session = None
+        self.screens = []
+        self._mark = (0, 0)
+
+    def measure(self, name):
+        """Record the bytes since the last screen ended under `name`"""
+        ansi = self.session.screen.ansi
+        self.screens.append((name, ansi.raw_bytes - self._mark[0], ansi.sent_bytes - self._mark[1]))
+        self._mark = (ansi.raw_bytes, ansi.sent_bytes)
+        # Draw the next screen in full, so screens compare on their own
+        self.session.screen.front = None
+
+    async def readline(self):
+        if self.reads < len(self.names):
+            self.measure(self.names[self.reads])
+        return await super().readline()
+
+
+class _SoakTerminal(_CaptureTerminal):
+    """Terminal typing the lines of `route` over and over, `navigations`
+    lines in all, and sampling the memory in use and the depth of the call
+    stack every `every` lines."""
+
+    def __init__(self, route, navigations, every):
+        super().__init__()
+        self.route = itertools.cycle(route)
+        self.navigations = navigations
+        self.every = every
+        # (lines typed, bytes allocated, stack frames)
+        self.samples = []
+
+    async def readline(self):
+        import bbscapade
+        if self.reads >= self.navigations:
+            raise bbscapade.CallerDisconnected()
+        if self.reads % self.every == 0:
+            depth = 0
+            frame = sys._getframe()
+            while frame is not None:
+                depth += 1
+                frame = frame.f_back
+            self.samples.append((self.reads, tracemalloc.get_traced_memory()[0], depth))
+        self.reads += 1
+        return next(self.route)
+
+
+def _first_screen(args):
+    """Child process for `startup`: print seconds spent importing and until the welcome screen is drawn"""
+    started = time.perf_counter()
+    import bbscapade
+    imported = time.perf_counter()
+
+    async def welcome():
+        generator = bbscapade.ContentGenerator(offline=True)
+        session = bbscapade.BBScapade(terminal=_CaptureTerminal(), generator=generator, store=None)
+        await session.display_welcome_screen()
+
+    asyncio.run(welcome())
+    print(imported - started, time.perf_counter() - started)
+
+
+def bench_startup(args):
+    total, direct = _import_breakdown()
+    print(f"import bbscapade: {total / 1000:.1f} ms")
+    for name, us in direct[:args.top]:
+        print(f"  {name:<28} {us / 1000:8.1f} ms")
+
+    imports, screens = [], []
+    for _ in range(args.runs):
+        started = time.perf_counter()
+        output = subprocess.run([sys.executable, os.path.abspath(__file__), "_first-screen"],
+                                cwd=HERE, capture_output=True, text=True, check=True).stdout
+        elapsed = time.perf_counter() - started
+        imported, _ = (float(value) for value in output.split())
+        imports.append(imported)
+        screens.append(elapsed)
+
+    first_screen = statistics.median(screens) * 1000
+    print(f"Offline session, median of {args.runs} runs:")
+    print(f"  import (in process)          {statistics.median(imports) * 1000:8.1f} ms")
+    print(f"  process start to welcome     {first_screen:8.1f} ms  "
+          f"(target {args.target_ms:.0f} ms: {'OK' if first_screen <= args.target_ms else 'OVER'})")
+    if first_screen > args.target_ms:
+        sys.exit(1)
+
+
+def bench_frames(args):
+    # Drawn to a real console whose output goes nowhere, so writes, flushes
+    # and clears cost what they do for a local caller
+    result = subprocess.run([sys.executable, os.path.abspath(__file__), "_frames",
+                             str(args.rounds), str(args.seed)],
+                            cwd=HERE, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True, check=True)
+    frames, seconds, writes, written, partial = json.loads(result.stderr.splitlines()[-1])
+    print(f"{frames} frames, offline session on a zero clock:")
+    print(f"  time per frame   {seconds / frames * 1e6:10.1f} us")
+    print(f"  writes per frame {writes / frames:10.1f}")
+    print(f"  bytes per frame  {written / frames:10.1f}")
+    if partial is not None:
+        print(f"  partial repaints {partial:10d} of {frames}")
+
+    result = subprocess.run([sys.executable, os.path.abspath(__file__), "_clear", str(args.clears)],
+                            cwd=HERE, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True, check=True)
+    print(f"Local console clear: {float(result.stderr) * 1e6:.1f} us")
+
+
+def _frames(args):
+    """Child process for `frames`: print frames, seconds, writes, bytes and partial repaints to stderr as JSON"""
+    import bbscapade
+
+    # Log in, open the message boards, then page through the first board
+    # and back out, over and over. Every line read ends one frame.
+    script = ["sysop", "1"] + ["1", "N", "N", "N", "Q"] * args.rounds
+    terminal = _CaptureTerminal(script, console=bbscapade.ConsoleTerminal())
+    bbscapade.random.seed(args.seed)
+    generator = bbscapade.ContentGenerator(engine=bbscapade.ProceduralEngine(seed=args.seed), offline=True)
+    session = bbscapade.BBScapade(terminal=terminal, generator=generator, store=None, clock=bbscapade.Clock.zero())
+
+    async def walk():
+        try:
+            await session.run()
+        except bbscapade.CallerDisconnected:
+            pass
+
+    asyncio.run(walk())
+    ended = time.perf_counter()
+
+    # From the login prompt on, leaving out connecting and the welcome screen
+    started, writes, written = terminal.first_read
+    screen = getattr(session, "screen", None)
+    print(json.dumps([terminal.reads, ended - started, terminal.writes - writes, terminal.written - written,
+                      screen.partial_frames if screen else None]), file=sys.stderr)
+
+
+def _clear(args):
+    """Child process for `frames`: print seconds per ConsoleTerminal.clear() to stderr"""
+    import bbscapade
+
+    async def clear():
+        terminal = bbscapade.ConsoleTerminal()
+        started = time.perf_counter()
+        for _ in range(args.count):
+            await terminal.clear()
+        return (time.perf_counter() - started) / args.count
+
+    print(asyncio.run(clear()), file=sys.stderr)
+
+
+def bench_banners(args):
+    import bbscapade
+    import pyfiglet
+
+    engine = bbscapade.ProceduralEngine(seed=args.seed)
+    names = [engine.world_info()["name"] for _ in range(args.names)]
+    fonts = bbscapade.WELCOME_FONTS
+
+    samples = []
+    for name in names:
+        for font in fonts:
+            started = time.perf_counter()
+            pyfiglet.figlet_format(name, font=font)
+            samples.append(time.perf_counter() - started)
+    print(f"Banners, {len(names)} names x {len(fonts)} fonts:")
+    _report("figlet_format", samples)
+
+    registry = bbscapade.FigletFonts()
+    started = time.perf_counter()
+    registry.preload()
+    print(f"  {'preload':<22} {(time.perf_counter() - started) * 1000:8.1f} ms for {len(registry.fonts)} fonts")
+    for label in ("render (drawn)", "render (cached)"):
+        samples = []
+        for name in names:
+            for font in fonts:
+                started = time.perf_counter()
+                registry.render(name, font)
+                samples.append(time.perf_counter() - started)
+        _report(label, samples)
+
+    # The welcome screen, once its fonts are parsed and its banner drawn
+    async def welcome():
+        session = bbscapade.BBScapade(terminal=_CaptureTerminal(), generator=bbscapade.ContentGenerator(offline=True),
+                                      store=None, clock=bbscapade.Clock.zero())
+        session.world = bbscapade.World.from_dict(engine.world_info())
+        samples = []
+        for _ in range(args.screens + len(fonts) * 10):
+            started = time.perf_counter()
+            await session.display_welcome_screen()
+            samples.append(time.perf_counter() - started)
+        # Leave out the warm-up: the first few draws of each font
+        return samples[len(fonts) * 10:]
+
+    bbscapade.figlet_fonts.preload()
+    _report("welcome screen (warm)", asyncio.run(welcome()))
+
+
+def bench_ansi(args):
+    import bbscapade
+
+    bbscapade.random.seed(args.seed)
+    engine = bbscapade.ProceduralEngine(seed=args.seed)
+    world = bbscapade.World.from_dict(engine.world_info())
+    boards, areas = len(world.board_names), len(world.file_areas)
+
+    # Every content screen once, in the order a caller would see them;
+    # None marks main menu visits, measured per style below
+    script = [
+        ("welcome and login", "sysop"), (None, "1"),
+        ("message boards", "1"), ("message", "N"), ("message", "Q"), ("message boards", str(boards + 1)),
+        (None, "2"), ("file archives", "1"), ("file list", "1"), ("file details", "D"), ("download", ""),
+        ("file details", "Q"), ("file list", "Q"), ("file archives", str(areas + 1)),
+        (None, "3"), ("door games", "1"), ("door game", ""), ("door games", "2"),
+        (None, "4"), ("sysop chat", "hello"), ("sysop chat", "bye"), ("sysop chat", ""), (None, "5"),
+    ]
+    terminal = _ScreenMeter(script)
+    generator = bbscapade.ContentGenerator(engine=engine, offline=True)
+    session = bbscapade.BBScapade(terminal=terminal, generator=generator, store=None, clock=bbscapade.Clock.zero())
+    session.world = world
+    terminal.session = session
+
+    async def walk():
+        await session.display_welcome_screen()
+        await session.login_screen()
+        await session.navigate(session.main_menu())
+        await session.screen.flush(settle=True)
+        terminal.measure("logoff")
+
+        # Each menu style, with its random colors drawn a few times
+        for style in session.MENU_STYLES:
+            for _ in range(args.draws):
+                await session._clear_screen()
+                await session._draw_main_menu(style)
+                await session.screen.flush(settle=True)
+                terminal.measure(f"main menu ({style})")
+
+    asyncio.run(walk())
+
+    totals = {}
+    for name, raw, sent in terminal.screens:
+        if name is not None:
+            count, raw_total, sent_total = totals.get(name, (0, 0, 0))
+            totals[name] = (count + 1, raw_total + raw, sent_total + sent)
+    print(f"{'Bytes per screen':<26} {'before':>8} {'after':>8} {'saved':>6}")
+    for name, (count, raw, sent) in totals.items():
+        print(f"  {name:<24} {raw / count:8.0f} {sent / count:8.0f} {1 - sent / raw:6.0%}")
+    print(f"Whole walk: {session.screen.ansi.summary()}")
+
+
+def bench_templates(args):
+    import bbscapade
+
+    def rate(draw, count):
+        started = time.perf_counter()
+        for _ in range(count):
+            draw()
+        return count / (time.perf_counter() - started)
+
+    templates = {name: value for name, value in vars(bbscapade).items()
+                 if isinstance(value, getattr(bbscapade, "ScreenTemplate", ()))}
+    for style, template in getattr(bbscapade, "MENU_TEMPLATES", {}).items():
+        templates[f"MENU_TEMPLATES[{style!r}]"] = template
+    if templates:
+        print("Template renders:")
+        for name, template in templates.items():
+            values = {slot: slot.upper() for slot in template.slots}
+            print(f"  {name:<36} {rate(lambda: template.render(**values), args.renders):>10,.0f} /s")
+
+    # Whole screens as a session builds them, up to (not including) the
+    # renderer sending them to the terminal
+    engine = bbscapade.ProceduralEngine(seed=args.seed)
+    session = bbscapade.BBScapade(terminal=_CaptureTerminal(), generator=bbscapade.ContentGenerator(offline=True),
+                                  store=None, clock=bbscapade.Clock.zero())
+    session.world = bbscapade.World.from_dict(engine.world_info())
+    bbscapade.figlet_fonts.preload()
+
+    async def builds(draw, count):
+        for _ in range(count // 10):
+            session.screen.clear()
+            await draw()
+        started = time.perf_counter()
+        for _ in range(count):
+            session.screen.clear()
+            await draw()
+        return count / (time.perf_counter() - started)
+
+    screens = [(f"main menu ({style})", lambda style=style: session._draw_main_menu(style))
+               for style in session.MENU_STYLES]
+    screens.append(("welcome", session.display_welcome_screen))
+    print("Screen builds:")
+    for name, draw in screens:
+        print(f"  {name:<36} {asyncio.run(builds(draw, args.renders // 10)):>10,.0f} /s")
+
+
+def bench_soak(args):
+    import bbscapade
+
+    bbscapade.random.seed(args.seed)
+    engine = bbscapade.ProceduralEngine(seed=args.seed)
+    terminal = _SoakTerminal([], args.navigations, max(1, args.navigations // args.samples))
+    generator = bbscapade.ContentGenerator(engine=engine, offline=True)
+    session = bbscapade.BBScapade(terminal=terminal, generator=generator, store=None, clock=bbscapade.Clock.zero())
+    # The session makes its own world, as it would for a caller, and should
+    # never make another however many screens use it
+    world = asyncio.run(session.get_world())
+    boards, areas = len(world.board_names), len(world.file_areas)
+
+    # Every screen, every way back from it, and some bad input; the caller
+    # goes back and forth inside each part of the BBS `laps` times before
+    # returning to the main menu
+    route = (
+        ["1"] + ["1", "N", "Q"] * args.laps + ["x", str(boards + 1)]
+        + ["2", "1"] + ["1", "D", "", "Q"] * args.laps + ["Q", str(areas + 1)]
+        + ["3"] + ["1", ""] * args.laps + ["9", "2"]
+        + ["4", "hello", "bye", ""]
+        + ["9"]
+    )
+    terminal.route = itertools.cycle(route)
+    session.logged_in = True
+    bbscapade.figlet_fonts.preload()
+
+    async def soak():
+        # Older trees ran the main menu, and every screen under it, as one
+        # nest of calls
+        navigate = getattr(session, "navigate", None)
+        await (navigate(session.main_menu()) if navigate else session.main_menu())
+
+    tracemalloc.start()
+    started = time.perf_counter()
+    failure = None
+    try:
+        asyncio.run(soak())
+    except bbscapade.CallerDisconnected:
+        pass
+    except RecursionError as e:
+        failure = e
+    elapsed = time.perf_counter() - started
+    tracemalloc.stop()
+
+    print(f"Soak, {terminal.reads:,} navigations in {elapsed:.1f}s on a zero clock:")
+    print(f"  {'lines typed':>12} {'memory':>10} {'stack':>6}")
+    for reads, allocated, depth in terminal.samples[::max(1, len(terminal.samples) // 10)]:
+        print(f"  {reads:>12,} {allocated / 1024:>7.0f} KB {depth:>6}")
+    if failure is not None:
+        print(f"  failed after {terminal.reads:,} navigations: {type(failure).__name__}: {failure}")
+        return
+    # Past the warm-up (first content, banners and pages drawn), memory
+    # should stay put
+    settled = terminal.samples[len(terminal.samples) // 10:]
+    growth = settled[-1][1] - settled[0][1]
+    depths = {depth for _, _, depth in terminal.samples}
+    print(f"  memory growth after warm-up: {growth / 1024:+.0f} KB; stack depth {min(depths)}-{max(depths)} frames")
+    print(f"  world generations: {session.world_generations}"
+          + ("" if session.world_generations == 1 else " (expected 1)"))
+
+
+def _board_layout(bbscapade, engine, layout, boards, per_board, texts, first_day, last_day):
+    """Boards of procedural messages kept as `layout`: "dicts", "records" or "columns" """
+    rng = engine.random
+    result = []
+    for _ in range(boards):
+        messages = []
+        for day in sorted(rng.randrange(first_day, last_day) for _ in range(per_board)):
+            subject, content = rng.choice(texts)
+            # A fresh handle string per message, as generation produces them
+            author = engine.handle()
+            if layout == "dicts":
+                messages.append({"author": author, "date": bbscapade.format_date(day),
+                                 "subject": subject, "content": content})
+            else:
+                messages.append(bbscapade.Message(author, day, subject, content))
+        result.append(bbscapade.MessageColumns(messages) if layout == "columns" else messages)
+    return result
+
+
+def bench_memory(args):
+    import bbscapade
+
+    engine = bbscapade.ProceduralEngine(seed=args.seed)
+    # Message text is drawn from a shared pool, so only what each message
+    # costs on top of its text is measured
+    texts = [(message["subject"], message["content"])
+             for message in (engine.message(f"Board {i}") for i in range(args.texts))]
+    first_day = bbscapade.parse_date("01-01-85")
+    last_day = bbscapade.parse_date("12-31-95")
+    per_board = max(1, args.messages // args.boards)
+    count = per_board * args.boards
+
+    print(f"Memory for {args.boards:,} boards of {per_board:,} messages ({count:,} messages, "
+          f"text from a pool of {len(texts):,} shared):")
+    baseline = None
+    for layout, label in (("dicts", "dicts"), ("records", "Message records"), ("columns", "MessageColumns")):
+        engine.random.seed(args.seed)
+        tracemalloc.start()
+        started = time.perf_counter()
+        content = _board_layout(bbscapade, engine, layout, args.boards, per_board, texts, first_day, last_day)
+        elapsed = time.perf_counter() - started
+        allocated = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+
+        # Every date, read back and compared as a day. Dict dates are
+        # "MM-DD-YY" text, which sorts by month first, so they're parsed;
+        # the cost of that is part of what the dict layout is measured on.
+        # Columns are scanned as columns, without building a record each.
+        started = time.perf_counter()
+        if layout == "dicts":
+            latest = max(bbscapade.parse_date(message["date"]) for board in content for message in board)
+        elif layout == "columns":
+            latest = max(max(board.dates) for board in content if len(board))
+        else:
+            latest = max(message.date for board in content for message in board)
+        latest = bbscapade.format_date(latest)
+        scan = time.perf_counter() - started
+
+        # Every message as a screen sees it, one at a time: for columns, a
+        # Message built from each row
+        started = time.perf_counter()
+        for board in content:
+            for message in board:
+                pass
+        rows = time.perf_counter() - started
+        del content
+
+        baseline = baseline or allocated
+        print(f"  {label:<16} {allocated / 2 ** 20:8.1f} MB  {allocated / count:6.1f} B/message  "
+              f"{allocated / baseline:5.0%} of dicts   built in {elapsed:5.1f}s   "
+              f"dates read in {scan:4.2f}s (latest {latest})   every row in {rows:4.2f}s")
+
+
+# How BBS info and board messages were asked for, and parsed, before content
+# generation moved to forced tool calls; kept so the two can be compared
+_FREE_TEXT_BBS_SYSTEM = ("You are generating content for a nostalgic BBS simulation. Create weird, absurd, and "
+                         "hilarious BBS details. Be creative, funny, and strange but keep it appropriate.")
+_FREE_TEXT_BBS_PROMPT = ("Generate a JSON-like structure for a fictional BBS with the following fields: name (short "
+                         "name, max 20 chars), tagline (funny/weird slogan), sysop (bizarre username), established "
+                         "(year between 1985-1995), nodes (number between 1-8), and a list of 3-5 bizarre "
+                         "board_names. Make it weird, absurd, and hilarious but appropriate. Return ONLY valid JSON.")
+_FREE_TEXT_MESSAGES_SYSTEM = (
+    "You are a creative writer generating content for a nostalgic BBS simulation set in the late 1980s/early 1990s. "
+    "Create weird, zany, and funny messages that might appear on a message board. The style should be reminiscent of "
+    "old adventure games like Maniac Mansion, Space Quest, or Zork - full of strange scenarios, paranormal phenomena, "
+    "and quirky humor. Keep each message between 3-6 sentences.")
+_FREE_TEXT_MESSAGES_PROMPT = (
+    "Generate {count} bizarre, funny messages for a BBS board called '{board}'. Each message should include a subject "
+    "line and content. The messages should be weird, zany, and in the style of old 80s adventure games like Maniac "
+    "Mansion. Return the results as JSON with this format: [{{\"subject\": \"...\", \"content\": \"...\"}}, ...]. "
+    "Make the content appropriately weird for this specific board topic.")
+_BBS_FIELDS = ("name", "tagline", "sysop", "established", "nodes", "board_names")
+
+
+async def _free_text_bbs_info(bbscapade, generator, stats):
+    """Ask for BBS info as JSON in prose, up to three times; True once a reply is usable"""
+    for attempt in range(3):
+        stats.requests += 1
+        if attempt:
+            stats.retries += 1
+        message = await generator._create(bbscapade.Priority.ON_DEMAND, label="free_text",
+                                          model="claude-3-haiku-20240307", max_tokens=300, temperature=1.0,
+                                          system=_FREE_TEXT_BBS_SYSTEM,
+                                          messages=[{"role": "user", "content": _FREE_TEXT_BBS_PROMPT}])
+        match = re.search(r"\{.*\}", message.content[0].text, re.DOTALL)
+        try:
+            info = json.loads(match.group(0)) if match else None
+        except json.JSONDecodeError:
+            info = None
+        if isinstance(info, dict) and all(name in info for name in _BBS_FIELDS) \
+                and isinstance(info["board_names"], list):
+            return True
+        stats.parse_failures += 1
+    return False
+
+
+async def _free_text_messages(bbscapade, generator, stats, board, count):
+    """Ask for `count` messages as a JSON array in prose; the number of usable messages"""
+    stats.requests += 1
+    message = await generator._create(bbscapade.Priority.ON_DEMAND, label="free_text",
+                                      model="claude-3-haiku-20240307", max_tokens=200 * count + 100, temperature=1.0,
+                                      system=_FREE_TEXT_MESSAGES_SYSTEM,
+                                      messages=[{"role": "user",
+                                                 "content": _FREE_TEXT_MESSAGES_PROMPT.format(count=count, board=board)}])
+    parser = bbscapade.JsonArrayParser()
+    items = parser.feed(message.content[0].text)
+    if not parser.started:
+        stats.parse_failures += 1
+        return 0
+    if getattr(message, "stop_reason", None) == "max_tokens":
+        stats.truncated += 1
+    usable = [item for item in items if isinstance(item, dict) and "subject" in item and "content" in item]
+    stats.rejected += len(items) - len(usable)
+    # Extra messages were dropped, as _gather_chunks does
+    return min(len(usable), count)
+
+
+def bench_structured(args):
+    import bbscapade
+
+    if not os.getenv("CLAUDE_API_KEY"):
+        sys.exit("bench.py structured compares live replies, so it needs CLAUDE_API_KEY")
+
+    engine = bbscapade.ProceduralEngine(seed=args.seed)
+    boards = [engine.world_info()["board_names"][0] for _ in range(args.requests)]
+    count = bbscapade.ContentGenerator.MESSAGES_PER_REQUEST
+
+    async def compare():
+        results = []
+        free_text = bbscapade.ContentGenerator()
+        stats = bbscapade.GenerationStats()
+        worlds = messages = 0
+        for board in boards:
+            worlds += await _free_text_bbs_info(bbscapade, free_text, stats)
+            messages += await _free_text_messages(bbscapade, free_text, stats, board, count)
+        results.append(("free text", stats, worlds, messages))
+
+        tools = bbscapade.ContentGenerator()
+        worlds = messages = 0
+        for board in boards:
+            with contextlib.suppress(RuntimeError):
+                await tools.generate_bbs_info(fallback=False)
+                worlds += 1
+            with contextlib.suppress(RuntimeError):
+                messages += len(await tools.generate_board_messages(board, num_messages=count, fallback=False))
+        results.append(("forced tool", tools.stats, worlds, messages))
+        return results
+
+    print(f"Structured output, {args.requests} BBS infos and {args.requests} boards of {count} messages each way:")
+    for label, stats, worlds, messages in asyncio.run(compare()):
+        print(f"  {label:<12} {worlds}/{args.requests} BBS infos, {messages}/{args.requests * count} messages")
+        print(f"  {'':<12} {stats.summary()}")
+
+
+# What the scripted caller says to the SysOp, in turn
+_CHAT_LINES = (
+    "hi! anything good on the boards today?",
+    "who posts the most around here?",
+    "what's the best file to download?",
+    "is the BBS haunted?",
+    "what's in your basement?",
+    "which board should I read first?",
+    "any tips for a new caller?",
+    "what's the weirdest post you've seen?",
+)
+
+
+def bench_chat(args):
+    import bbscapade
+
+    live = bool(os.getenv("CLAUDE_API_KEY"))
+    bbscapade.random.seed(args.seed)
+    engine = bbscapade.ProceduralEngine(seed=args.seed)
+    lines = [_CHAT_LINES[turn % len(_CHAT_LINES)] for turn in range(args.turns)]
+    terminal = _CaptureTerminal(lines + ["bye", ""])
+    generator = bbscapade.ContentGenerator(engine=engine, offline=not live)
+    session = bbscapade.BBScapade(terminal=terminal, generator=generator, store=None, clock=bbscapade.Clock.zero())
+    session.user_name = "bench"
+
+    async def chat():
+        world = await session.get_world()
+        system = session._sysop_system(world)
+        if live:
+            with contextlib.suppress(bbscapade.CallerDisconnected):
+                await session.chat_with_sysop()
+        return system
+
+    system = asyncio.run(chat())
+    tokens = bbscapade.estimate_tokens({"system": system})
+    print(f"SysOp system prompt: ~{tokens:,} tokens, "
+          f"{'cached' if 'cache_control' in system[-1] else 'too short to cache on its own'}; "
+          f"Claude caches from {session.CACHE_MIN_TOKENS:,}")
+    if not live:
+        print("  set CLAUDE_API_KEY to chat for real and see the cache reads")
+        return
+    print(f"  {'turn':>4} {'uncached':>9} {'cache read':>11} {'cache write':>12}")
+    for number, turn in enumerate(session.chat_turns, 1):
+        print(f"  {number:>4} {turn.input_tokens:>9,} {turn.cache_read_tokens:>11,} {turn.cache_write_tokens:>12,}")
+    print(f"  {session.cache_stats.summary()}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="BBScapade benchmarks")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    procedural = commands.add_parser("procedural", help="Local procedural content engine")
+    procedural.add_argument("--boards", type=int, default=1000, help="Worlds, boards and file areas to generate")
+    procedural.add_argument("--seed", type=int, default=None, help="Random seed, for repeatable output")
+    procedural.set_defaults(run=bench_procedural)
+
+    startup = commands.add_parser("startup", help="Import time and time to the first screen")
+    startup.add_argument("--runs", type=int, default=5, help="Process starts to time")
+    startup.add_argument("--target-ms", type=float, default=500, help="Time to the welcome screen to stay under")
+    startup.add_argument("--top", type=int, default=10, help="Slowest imports to list")
+    startup.set_defaults(run=bench_startup)
+
+    frames = commands.add_parser("frames", help="Cost of drawing each screen")
+    frames.add_argument("--rounds", type=int, default=50, help="Times to page through the first board")
+    frames.add_argument("--seed", type=int, default=1, help="Random seed, for repeatable screens")
+    frames.add_argument("--clears", type=int, default=200, help="Console clears to time")
+    frames.set_defaults(run=bench_frames)
+
+    banners = commands.add_parser("banners", help="Figlet font registry and banner cache")
+    banners.add_argument("--names", type=int, default=15, help="BBS names to draw in every welcome font")
+    banners.add_argument("--screens", type=int, default=1000, help="Welcome screens to time")
+    banners.add_argument("--seed", type=int, default=1, help="Random seed, for repeatable names")
+    banners.set_defaults(run=bench_banners)
+
+    ansi = commands.add_parser("ansi", help="Bytes per screen before and after ANSI minimizing")
+    ansi.add_argument("--draws", type=int, default=20, help="Times to draw each main menu style")
+    ansi.add_argument("--seed", type=int, default=1, help="Random seed, for repeatable screens")
+    ansi.set_defaults(run=bench_ansi)
+
+    templates = commands.add_parser("templates", help="Renders per second of each screen template")
+    templates.add_argument("--renders", type=int, default=20000, help="Renders of each template to time")
+    templates.add_argument("--seed", type=int, default=1, help="Random seed, for a repeatable world")
+    templates.set_defaults(run=bench_templates)
+
+    soak = commands.add_parser("soak", help="Memory and stack depth over a long scripted session")
+    soak.add_argument("--navigations", type=int, default=100000, help="Lines the caller types")
+    soak.add_argument("--laps", type=int, default=1000,
+                      help="Times round each part of the BBS before going back to the main menu")
+    soak.add_argument("--samples", type=int, default=100, help="Times to sample memory and stack depth")
+    soak.add_argument("--seed", type=int, default=1, help="Random seed, for a repeatable world")
+    soak.set_defaults(run=bench_soak)
+
+    memory = commands.add_parser("memory", help="Memory held by board messages in each layout")
+    memory.add_argument("--boards", type=int, default=10000, help="Boards to fill")
+    memory.add_argument("--messages", type=int, default=1000000, help="Messages across all the boards")
+    memory.add_argument("--texts", type=int, default=1000, help="Distinct subjects and contents to draw from")
+    memory.add_argument("--seed", type=int, default=1, help="Random seed, for repeatable content")
+    memory.set_defaults(run=bench_memory)
+
+    structured = commands.add_parser("structured", help="Parse failures and retries, free text against tool calls")
+    structured.add_argument("--requests", type=int, default=20, help="BBS infos and boards to ask for each way")
+    structured.add_argument("--seed", type=int, default=1, help="Random seed, for repeatable board names")
+    structured.set_defaults(run=bench_structured)
+
+    chat = commands.add_parser("chat", help="Prompt caching of a SysOp chat")
+    chat.add_argument("--turns", type=int, default=8, help="Lines the caller says before leaving")
+    chat.add_argument("--seed", type=int, default=1, help="Random seed, for a repeatable world")
+    chat.set_defaults(run=bench_chat)
+
+    first_screen = commands.add_parser("_first-screen")
+    first_screen.set_defaults(run=_first_screen)
+
+    frames_child = commands.add_parser("_frames")
+    frames_child.add_argument("rounds", type=int)
+    frames_child.add_argument("seed", type=int)
+    frames_child.set_defaults(run=_frames)
+
+    clear = commands.add_parser("_clear")
+    clear.add_argument("count", type=int)
+    clear.set_defaults(run=_clear)
+
+    args = parser.parse_args()
+    args.run(args)
+
+
+if __name__ == "__main__":
+    main()